@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+'''
+Serialization Benchmark Suite
+-----------------------------
+
+Measures every registered format against every benchmark schema:
+
+- encode and decode throughput (messages per second)
+- per message encode and decode latency percentiles
+- the average encoded size of a message
+
+Python 2 has no counter of the blocks it allocates (only the net count
+of gc tracked objects), so allocations are not measured.
+
+Every result has the same keys.  Formats whose libraries are not
+installed are reported with a ``skipped`` status, and a format that
+fails on a schema with an ``error`` status and the error as its reason
+(instead of stopping the run); the measurements of both are None.
+
+Run::
+
+    python bench/benchmark.py --output results.json
+    python bench/benchmark.py --baseline results.json --threshold 0.10
+
+When a baseline is supplied, every throughput that dropped by more
+than the threshold is reported and the script exits with status 1.
+'''
+import os
+import sys
+import json
+import optparse
+import platform
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from rosetta import format
+from schemas import schemas, build
+
+#---------------------------------------------------------------------------#
+# Format Adapters
+#---------------------------------------------------------------------------#
+# The binary format does not tag its records with their type, so the
+# decoder is handed the message type as well.
+#---------------------------------------------------------------------------#
+def _decoder(name, serializer, message):
+    if name == 'binary':
+        return lambda data: serializer.deserialize(data, message)
+    return serializer.deserialize
+
+#---------------------------------------------------------------------------#
+# Measurements
+#---------------------------------------------------------------------------#
+def _percentiles(samples):
+    ''' Compute the latency percentiles of a set of samples
+    :param samples: The latencies in seconds
+    :return: The percentiles in microseconds
+    '''
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(p * len(samples)))] * 1e6
+    return { 'p50':pick(0.50), 'p90':pick(0.90), 'p99':pick(0.99), 'max':samples[-1] * 1e6 }
+
+def _throughput(function, inputs):
+    ''' Measure how many calls per second a function manages
+    :param function: The function to call
+    :param inputs: The inputs to call the function with
+    :return: The calls per second
+    '''
+    start = timer()
+    for entry in inputs: function(entry)
+    return len(inputs) / (timer() - start)
+
+def _latencies(function, inputs):
+    ''' Measure the latency of every call of a function
+    :param function: The function to call
+    :param inputs: The inputs to call the function with
+    :return: The latency percentiles
+    '''
+    samples = []
+    for entry in inputs:
+        start = timer()
+        function(entry)
+        samples.append(timer() - start)
+    return _percentiles(samples)
+
+#---------------------------------------------------------------------------#
+# Results
+#---------------------------------------------------------------------------#
+METRICS = ( 'encode_rate', 'decode_rate', 'encode_latency', 'decode_latency',
+    'encoded_size' )
+
+def _result(status, reason=None, **metrics):
+    ''' Build a result, which always has the same keys
+    :param status: 'ok', 'skipped' or 'error'
+    :param reason: Why the format was skipped or failed
+    :param metrics: The measurements (the missing ones are None)
+    :return: The result
+    '''
+    result = dict.fromkeys(METRICS)
+    result.update(metrics)
+    result.update({ 'status':status, 'reason':reason })
+    return result
+
+def measure(name, serializer, message, count):
+    ''' Benchmark a single format against a single schema
+    :param name: The name of the format
+    :param serializer: The format serializer
+    :param message: The message type to benchmark
+    :param count: The number of messages to run through
+    :return: The measurements
+    '''
+    messages = [build(message, seed) for seed in range(count)]
+    encode = serializer.serialize
+    decode = _decoder(name, serializer, message)
+    packets = [encode(entry) for entry in messages]
+    decode(packets[0]) # make sure the format round trips at all
+
+    return _result('ok',
+        encode_rate    = _throughput(encode, messages),
+        decode_rate    = _throughput(decode, packets),
+        encode_latency = _latencies(encode, messages),
+        decode_latency = _latencies(decode, packets),
+        encoded_size   = sum([len(packet) for packet in packets]) / float(count))
+
+def run(formats, shapes, count):
+    ''' Run the benchmark suite
+    :param formats: The names of the formats to benchmark
+    :param shapes: The names of the schemas to benchmark
+    :param count: The number of messages per measurement
+    :return: The results keyed by 'format/schema'
+    '''
+    results = {}
+    for name in formats:
+        available = format.is_available(name)
+        serializer = available and format.get_format(name)
+        for shape in shapes:
+            key = '%s/%s' % (name, shape)
+            if not available:
+                results[key] = _result('skipped', 'format is not available')
+                continue
+            try:
+                results[key] = measure(name, serializer, schemas[shape], count)
+            except Exception, ex:
+                results[key] = _result('error', '%s: %s' % (ex.__class__.__name__, ex))
+    return results
+
+#---------------------------------------------------------------------------#
+# Baseline Comparison
+#---------------------------------------------------------------------------#
+def compare(results, baseline, threshold):
+    ''' Find the throughputs that regressed against a baseline
+    :param results: The current results
+    :param baseline: The stored baseline results
+    :param threshold: The allowed relative slowdown (0.10 is 10%)
+    :return: A list of (key, metric, baseline, current) regressions
+
+    Only the results measured in both runs are compared.
+    '''
+    regressions = []
+    for key, current in sorted(results.items()):
+        previous = baseline.get(key, {})
+        for metric in ('encode_rate', 'decode_rate'):
+            if current[metric] is None or previous.get(metric) is None:
+                continue
+            if current[metric] < previous[metric] * (1.0 - threshold):
+                regressions.append((key, metric, previous[metric], current[metric]))
+    return regressions
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+def main(arguments):
+    parser = optparse.OptionParser()
+    parser.add_option('-f', '--formats', default=','.join(format.registered_formats()),
+        help='comma separated formats to benchmark')
+    parser.add_option('-s', '--schemas', default=','.join(sorted(schemas.keys())),
+        help='comma separated schemas to benchmark')
+    parser.add_option('-n', '--count', type='int', default=2000,
+        help='messages per measurement')
+    parser.add_option('-o', '--output', help='file to write the json results to')
+    parser.add_option('-b', '--baseline', help='json results to compare against')
+    parser.add_option('-t', '--threshold', type='float', default=0.10,
+        help='allowed relative throughput drop against the baseline')
+    options, _ = parser.parse_args(arguments)
+
+    results = run(options.formats.split(','), options.schemas.split(','), options.count)
+    document = {
+        'python'  : platform.python_version(),
+        'count'   : options.count,
+        'results' : results,
+    }
+    text = json.dumps(document, indent=2, sort_keys=True)
+    if options.output:
+        handle = open(options.output, 'w')
+        try: handle.write(text)
+        finally: handle.close()
+    else: print text
+
+    if options.baseline:
+        handle = open(options.baseline)
+        try: baseline = json.load(handle)['results']
+        finally: handle.close()
+        regressions = compare(results, baseline, options.threshold)
+        for key, metric, previous, current in regressions:
+            sys.stderr.write('%s %s regressed: %.0f -> %.0f msg/s\n'
+                % (key, metric, previous, current))
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
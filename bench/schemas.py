@@ -0,0 +1,107 @@
+'''
+Benchmark Message Schemas
+-------------------------
+
+Representative message shapes used by the benchmark suite:
+
+- tiny     a handful of small fields (heartbeats, acks)
+- wide     200 mixed integer/string/bool fields (execution reports)
+- repeated a few scalars and large repeated numeric fields (book depth)
+- strings  mostly long string fields (free text, identifiers)
+
+Every schema comes with a factory that builds a populated message so
+that the serializers do not just encode defaults.
+'''
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+
+#---------------------------------------------------------------------------#
+# Schemas
+#---------------------------------------------------------------------------#
+class Tiny(Message):
+    sequence = IntField(size=4)
+    symbol   = StringField(size=8)
+    active   = BoolField()
+
+    class Meta:
+        encoded_name = 'BenchTiny'
+        app_label = 'bench'
+
+class Strings(Message):
+    account  = StringField(size=16)
+    symbol   = StringField(size=12)
+    text     = StringField(size=128)
+    comment  = StringField(size=256)
+    origin   = StringField(size=32)
+    route    = StringField(size=32)
+
+    class Meta:
+        encoded_name = 'BenchStrings'
+        app_label = 'bench'
+
+class Repeated(Message):
+    symbol   = StringField(size=8)
+    levels   = IntField(size=2)
+    prices   = IntField(size=8, repeated=True, count=100)
+    sizes    = IntField(size=4, repeated=True, count=100)
+
+    class Meta:
+        encoded_name = 'BenchRepeated'
+        app_label = 'bench'
+
+def _build_wide(count=200):
+    ''' Builds a message type with the requested number of fields
+    :param count: The number of fields to declare
+    :return: The built message type
+    '''
+    attrs = { '__module__': __name__ }
+    for index in range(count):
+        kind = index % 3
+        if kind == 0:   attrs['int_%03d' % index]  = IntField(size=4)
+        elif kind == 1: attrs['str_%03d' % index]  = StringField(size=8)
+        else:           attrs['bool_%03d' % index] = BoolField()
+
+    class Meta:
+        encoded_name = 'BenchWide'
+        app_label = 'bench'
+    attrs['Meta'] = Meta
+    return type('Wide', (Message,), attrs)
+
+Wide = _build_wide()
+
+#---------------------------------------------------------------------------#
+# Factories
+#---------------------------------------------------------------------------#
+def _sample_value(field, seed):
+    ''' Build a representative value for a field
+    :param field: The field to build a value for
+    :param seed: A number used to vary the values
+    :return: The sample value
+    '''
+    if field.repeated:
+        return field.new_repeated([(seed + i) % 1000 for i in range(field.count or 1)])
+    name = field.get_type_name()
+    if name == 'integar':   return seed % (2 ** (8 * min(field.size, 4) - 1))
+    if name == 'bool':      return bool(seed % 2)
+    if name == 'float':     return seed / 4.0
+    if name == 'character': return 'ABC'[seed % 3]
+    if name == 'padding':   return field.value
+    return ('%s%d' % (field.name, seed))[:field.size]
+
+def build(message, seed=0):
+    ''' Build a populated instance of a message type
+    :param message: The message type to build
+    :param seed: A number used to vary the values
+    :return: The populated message
+    '''
+    instance = message()
+    for field in message._meta.fields:
+        setattr(instance, field.name, _sample_value(field, seed))
+    return instance
+
+schemas = {
+    'tiny'     : Tiny,
+    'wide'     : Wide,
+    'repeated' : Repeated,
+    'strings'  : Strings,
+}
@@ -0,0 +1,261 @@
+'''
+Columnar Message Batches
+------------------------
+
+A batch stores a collection of messages of a single type as a NumPy
+structured array.  The record dtype of the array is derived from the
+fields of the message and matches the fixed width binary layout of the
+compiled codec (see :mod:`rosetta.core.codec`) byte for byte, so:
+
+- a buffer of encoded records is decoded in one call with
+  ``numpy.frombuffer`` (without copying the buffer)
+- the whole batch is encoded in one call with ``tostring``
+- every field can be accessed as a column by its name
+
+Example::
+
+    batch = MessageBatch.from_buffer(ExampleMessage, data)
+    total = batch.column('count').sum()
+    first = batch[0]
+
+The mapping of field types to their record dtype is:
+
+- string    -> ``S{size}``
+- character -> ``S1``
+- padding   -> not stored (skipped by the record offsets)
+- bool      -> ``bool``
+- integar   -> ``int{8*size}`` for sizes 1/2/4/8, otherwise
+  ``S{size}`` with the column converted to ``int64`` on access
+- float     -> ``float32/float64`` for sizes 4/8, otherwise
+  ``S{size}`` with the column converted to ``float64`` on access
+- enum      -> the integar dtype of its size
+- repeated  -> a ``(count,)`` subarray of the value dtype, so the
+  column of a repeated field is a two dimensional array
+- bits      -> the unsigned integer shared by the bit group, with the
+  field shifted and masked out of the whole column at once on access
+
+NumPy is an optional dependency and is only required when a batch is
+actually created.
+'''
+from rosetta.core.codec import get_field_offsets, get_field_groups, BitGroup
+from rosetta.core.exceptions import ConfigurationException
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+#---------------------------------------------------------------------------#
+# Logger
+#---------------------------------------------------------------------------#
+import logging
+_logger = logging.getLogger('rosetta.core.batch')
+
+#---------------------------------------------------------------------------#
+# Field Type Dtypes
+#---------------------------------------------------------------------------#
+# Each builder returns the record dtype of the field and the dtype the
+# column should be converted to when it is read (or None if the stored
+# column can be returned directly).
+#---------------------------------------------------------------------------#
+_byte_orders = { '!':'>', '>':'>', '<':'<', '=':'=', '@':'=' }
+
+def _string_dtype(field, order):
+    return ('S%d' % field.size, None)
+
+def _character_dtype(field, order):
+    return ('S1', None)
+
+def _bool_dtype(field, order):
+    return ('?', None)
+
+def _integer_dtype(field, order):
+    if field.size in (1, 2, 4, 8):
+        return ('%si%d' % (order, field.size), None)
+    return ('S%d' % field.size, 'i8')
+
+def _float_dtype(field, order):
+    if field.size in (4, 8):
+        return ('%sf%d' % (order, field.size), None)
+    return ('S%d' % field.size, 'f8')
+
+data_types = {
+    'string'    : _string_dtype,
+    'character' : _character_dtype,
+    'bool'      : _bool_dtype,
+    'integar'   : _integer_dtype,
+    'float'     : _float_dtype,
+    'enum'      : _integer_dtype,
+}
+
+def _bits_column(field, group, column):
+    ''' Helper to build the converter of a field in a bit group
+    :param field: The bit field to convert
+    :param group: The bit group holding the field
+    :param column: The name of the record column holding the group
+    :return: convert(records) -> the field column
+    '''
+    shift, mask = group.shifts[field.name], (1 << field.bits) - 1
+    if field.get_type_name() == 'bool':
+        return lambda records: (records[column] >> shift & mask) == 1
+    return lambda records: (records[column] >> shift & mask).astype('i8')
+
+def build_dtype(options):
+    ''' Builds the record dtype for the supplied message options
+    :param options: The options of the message to build a dtype for
+    :return: (record dtype, column conversion map)
+
+    A bit group is stored as a single unsigned column (named after the
+    offset of the group) that its fields are converted from.
+    '''
+    if numpy is None:
+        raise ConfigurationException('numpy is required for message batches')
+
+    order = _byte_orders[options.byte_order]
+    names, formats, offsets, conversions = [], [], [], {}
+    groups = dict([(field.name, unit) for unit in get_field_groups(options.fields)
+        if isinstance(unit, BitGroup) for field in unit.fields])
+    for field, _, _, _, offset in get_field_offsets(options):
+        if field.name in groups:
+            group, column = groups[field.name], '_bits%d' % offset
+            conversions[field.name] = _bits_column(field, group, column)
+            if column in names: continue
+            names.append(column)
+            formats.append('%su%d' % (order, group.size))
+            offsets.append(offset)
+            continue
+        if field.get_type_name() not in data_types:
+            continue # padding is only used to compute the offsets
+        dtype, convert = data_types[field.get_type_name()](field, order)
+        if field.repeated:
+            dtype = (dtype, (field.count,))
+        names.append(field.name)
+        formats.append(dtype)
+        offsets.append(offset)
+        if convert: conversions[field.name] = convert
+
+    dtype = numpy.dtype({ 'names':names, 'formats':formats,
+        'offsets':offsets, 'itemsize':options.get_codec().size })
+    return dtype, conversions
+
+#---------------------------------------------------------------------------#
+# Batch
+#---------------------------------------------------------------------------#
+class MessageBatch(object):
+    ''' A columnar collection of messages of a single type
+
+    :param message: The message type stored in the batch
+    :param records: The underlying structured record array
+    '''
+
+    def __init__(self, message, size=0, records=None):
+        ''' Initialize a new instance
+        :param message: The message type to store
+        :param size: The number of (zeroed) records to allocate
+        :param records: An existing record array to wrap
+
+        The records are decoded straight out of the memory of the array,
+        so an array that is not contiguous (a strided slice of another
+        batch, say) is copied first and no longer shares its memory.
+        '''
+        self.message = message
+        self._codec = message._meta.get_codec()
+        self._dtype, self._conversions = build_dtype(message._meta)
+        if records is None:
+            records = numpy.zeros(size, dtype=self._dtype)
+        elif records.dtype != self._dtype:
+            raise ConfigurationException('records are not %s records'
+                % message._meta.object_name)
+        elif not records.flags.c_contiguous:
+            records = numpy.ascontiguousarray(records)
+        self.records = records
+
+    @classmethod
+    def from_buffer(cls, message, buffer, count=-1, offset=0):
+        ''' Decode a buffer of encoded records without copying it
+        :param message: The message type of the records
+        :param buffer: The buffer of fixed width records
+        :param count: The number of records to read (-1 for all)
+        :param offset: The offset in the buffer to start at
+        :return: The decoded message batch
+        '''
+        batch = cls(message)
+        batch.records = numpy.frombuffer(buffer, dtype=batch._dtype,
+            count=count, offset=offset)
+        return batch
+
+    @classmethod
+    def from_messages(cls, message, messages):
+        ''' Build a batch from a collection of message instances
+        :param message: The message type of the messages
+        :param messages: The messages to store
+        :return: The built message batch
+        '''
+        messages = list(messages)
+        batch = cls(message, len(messages))
+        buffer, size = batch.records, batch._codec.size
+        pack_into = batch._codec.pack_into
+        for index, entry in enumerate(messages):
+            pack_into(buffer, index * size, entry)
+        return batch
+
+    def encode(self):
+        ''' Encode the whole batch to fixed width records
+        :return: The encoded records
+        '''
+        return self.records.tostring()
+
+    def column(self, name):
+        ''' Retrieve a single field of every record
+        :param name: The name of the field to retrieve
+        :return: The column array
+        '''
+        convert = self._conversions.get(name)
+        if callable(convert):
+            return convert(self.records)
+        column = self.records[name]
+        if convert:
+            column = column.astype(convert)
+        return column
+
+    def to_messages(self):
+        ''' Convert the batch to a list of message instances
+        :return: The list of messages
+        '''
+        return list(self)
+
+    #-----------------------------------------------------------------------#
+    # The Candy
+    #-----------------------------------------------------------------------#
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        ''' Retrieve a single record as a message instance
+        :param index: The index of the record to retrieve
+        :return: The decoded message
+        '''
+        if index < 0: index += len(self.records)
+        if not 0 <= index < len(self.records):
+            raise IndexError('batch index out of range')
+        return self._codec.unpack_from(self.records, index * self._codec.size)
+
+    def __setitem__(self, index, message):
+        ''' Store a message instance into a single record
+        :param index: The index of the record to store to
+        :param message: The message to store
+        '''
+        if index < 0: index += len(self.records)
+        if not 0 <= index < len(self.records):
+            raise IndexError('batch index out of range')
+        self._codec.pack_into(self.records, index * self._codec.size, message)
+
+    def __iter__(self):
+        unpack_from, size = self._codec.unpack_from, self._codec.size
+        for index in xrange(len(self.records)):
+            yield unpack_from(self.records, index * size)
+
+#---------------------------------------------------------------------------#
+# Exported Symbols
+#---------------------------------------------------------------------------#
+__all__ = ( 'MessageBatch', 'build_dtype' )
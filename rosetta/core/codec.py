@@ -0,0 +1,719 @@
+'''
+Compiled Message Codecs
+------------------------
+
+Walking the field list of a message and calling ``setattr`` for each
+field is fine for the text formats, but it is far too slow for the
+fixed width binary layout described by the field sizes.  Instead, the
+first time a message type is packed or unpacked we compile a codec for
+it:
+
+- a single ``struct.Struct`` that describes the entire record
+- a straight line ``pack``/``pack_into`` function that reads every
+  field off of the message and hands them to the struct in one call
+- a straight line ``unpack_from`` function that assigns every decoded
+  value back to a new (or supplied) message
+
+The codec is cached on the message options and is retrieved with::
+
+    codec = ExampleMessage._meta.get_codec()
+    data  = codec.pack(message)
+    copy  = codec.unpack_from(data)
+
+The mapping of field types to their binary representation follows the
+django idea of a backend ``data_types`` table keyed by the field type
+name:
+
+- string    -> ``Ns`` (NUL padded, trailing NULs stripped on decode)
+- character -> ``1s``
+- padding   -> ``Nx`` (skipped on decode)
+- bool      -> ``?``
+- integar   -> ``b/h/i/q`` for sizes 1/2/4/8, otherwise zero
+  padded ascii digits of the given size
+- float     -> ``f/d`` for sizes 4/8, otherwise zero padded ascii
+  digits with the field precision
+- enum      -> the integar format of the value (by default in the
+  smallest width holding every value of the enumeration); a value that
+  is not in the enumeration raises an :class:`EncodeException`
+
+Like ``struct`` does for the binary codes, the ascii fields raise an
+:class:`EncodeException` for a value with more digits than the field
+holds rather than sending it truncated, and so do the string fields for
+a value longer than the field.
+
+Consecutive fields declared with ``bits`` (booleans, small enums and
+integars) are packed together into the smallest unsigned integer that
+holds all of their bits, in declaration order starting at the least
+significant bit::
+
+    class Report(Message):
+        is_open  = BoolField(bits=1)
+        is_short = BoolField(bits=1)
+        side     = EnumField(enum=Side, bits=2)   # one byte for all three
+
+A bit field value that does not fit in its bits (including a negative
+one) raises an :class:`EncodeException` instead of being masked.
+
+Optional fields (that are not bit fields) are not part of the fixed
+record.  A message with optional fields is encoded as the fixed record
+of its other fields followed by a presence bitmap (one bit per optional
+field in declaration order) and then only the optional fields whose
+value differs from their default.  On decode the message is first reset
+to the defaults of its layout (see :func:`rosetta.core.pool.reset_message`),
+so the absent fields hold the same values as a new message.  Such sparse
+records vary in size, so they cannot be used with views or batches.
+
+Repeated numeric fields are laid out as ``count`` consecutive values
+in a single ``Ns`` block.  The block is copied to and from the ``array``
+holding the field values in one call (swapping the bytes if the message
+byte order is not the native one), so no python object is created per
+value.
+
+The byte order is taken from the ``byte_order`` Meta option and
+defaults to network order.
+'''
+import sys
+import array
+import struct
+from rosetta.core.exceptions import ConfigurationException, EncodeException
+from rosetta.core.pool import reset_message, get_default
+
+#---------------------------------------------------------------------------#
+# Logger
+#---------------------------------------------------------------------------#
+import logging
+_logger = logging.getLogger('rosetta.core.codec')
+
+#---------------------------------------------------------------------------#
+# Field Type Formats
+#---------------------------------------------------------------------------#
+# Each builder returns the struct code for the field, an expression used
+# to convert the message value before packing, and an expression used to
+# convert the unpacked value back to the message value.  The expressions
+# wrap the value expression in place of their %s marker (or are None if
+# no value is stored).  An expression may also refer to the field helper
+# (see get_field_helper) with a %h marker.
+#---------------------------------------------------------------------------#
+_integer_codes = { 1:'b', 2:'h', 4:'i', 8:'q' }
+_float_codes   = { 4:'f', 8:'d' }
+
+def _require_size(field):
+    ''' Helper to make sure a field can be laid out
+    :param field: The field to check
+    :return: The size of the field
+    '''
+    if field.size <= 0:
+        raise ConfigurationException('field %s has no binary size' % field.name)
+    return field.size
+
+def _string_format(field):
+    size = _require_size(field)
+    return ('%ds' % size, '%h.pack(%s)', "%s.rstrip('\\x00')")
+
+def _character_format(field):
+    return ('1s', '%h.pack(%s)', "%s.rstrip('\\x00')")
+
+def _padding_format(field):
+    return ('%dx' % field.size, None, None)
+
+def _bool_format(field):
+    return ('?', '%s', '%s')
+
+def _integer_format(field):
+    size = _require_size(field)
+    if size in _integer_codes:
+        return (_integer_codes[size], '%s', '%s')
+    return ('%ds' % size, '%h.pack(%s)', 'int(%s)')
+
+def _enum_format(field):
+    size = _require_size(field)
+    if size in _integer_codes:
+        return (_integer_codes[size], '%h.pack(%s)', '%s')
+    return ('%ds' % size, '%h.pack(%s)', 'int(%s)')
+
+def _float_format(field):
+    size = _require_size(field)
+    if size in _float_codes:
+        return (_float_codes[size], '%s', '%s')
+    return ('%ds' % size, '%h.pack(%s)', 'float(%s)')
+
+data_types = {
+    'string'    : _string_format,
+    'character' : _character_format,
+    'padding'   : _padding_format,
+    'bool'      : _bool_format,
+    'integar'   : _integer_format,
+    'float'     : _float_format,
+    'enum'      : _enum_format,
+}
+
+def _repeated_format(field):
+    code = field.get_typecode()
+    if code is None or field.count <= 0:
+        raise ConfigurationException('repeated field %s needs a numeric type and count'
+            % field.name)
+    size = array.array(code).itemsize * field.count
+    return ('%ds' % size, '%h.pack(%s)', '%h.unpack(%s)')
+
+def get_field_format(field):
+    ''' Retrieve the binary format information for a field
+    :param field: The field to retrieve the format for
+    :return: (struct code, encode expression, decode expression)
+    '''
+    if field.repeated:
+        return _repeated_format(field)
+    try:
+        builder = data_types[field.get_type_name()]
+    except (AttributeError, KeyError):
+        raise ConfigurationException('field %s has no binary format' % field.name)
+    return builder(field)
+
+#---------------------------------------------------------------------------#
+# Bit Fields
+#---------------------------------------------------------------------------#
+_bit_codes = { 1:'B', 2:'H', 4:'I', 8:'Q' }
+
+class BitGroup(object):
+    ''' A run of consecutive bit fields sharing one unsigned integer
+
+    :param fields: The fields in the group
+    :param shifts: A map of field name to its bit offset in the group
+    :param size: The size of the shared integer in bytes
+    :param code: The struct code of the shared integer
+    '''
+    __slots__ = ('fields', 'shifts', 'size', 'code')
+
+    def __init__(self, fields):
+        ''' Initialize a new instance
+        :param fields: The bit fields to pack together
+        '''
+        self.fields, self.shifts, used = tuple(fields), {}, 0
+        for field in self.fields:
+            self.shifts[field.name] = used
+            used += field.bits
+        self.size = min([size for size in _bit_codes if size * 8 >= used])
+        self.code = _bit_codes[self.size]
+
+    def get_encode(self, message):
+        ''' Retrieve the expression that packs the group
+        :param message: The expression of the message to read from
+        :return: The expression of the shared integer
+
+        Booleans are packed by their truth, while any other value that
+        does not fit in the bits of its field is handed to _overflow
+        (see _bit_overflow) rather than being masked.
+        '''
+        parts = []
+        for field in self.fields:
+            access, shift = '%s.%s' % (message, field.name), self.shifts[field.name]
+            if field.get_type_name() == 'bool':
+                parts.append('(1 if %s else 0) << %d' % (access, shift))
+                continue
+            if field.get_type_name() == 'enum':
+                parts.append("(%s if %s in %r else _invalid('%s', %s)) << %d"
+                    % (access, access, tuple(sorted(field.enum.values)), field.name,
+                       access, shift))
+                continue
+            parts.append("(%s if 0 <= %s <= %d else _overflow('%s', %s, %d)) << %d"
+                % (access, access, (1 << field.bits) - 1, field.name, access,
+                   field.bits, shift))
+        return '(%s)' % ' | '.join(parts)
+
+    def get_decode(self, field):
+        ''' Retrieve the expression that unpacks a field of the group
+        :param field: The field to unpack
+        :return: The expression of the field value (in place of %s)
+        '''
+        value = '%%s >> %d & %d' % (self.shifts[field.name], (1 << field.bits) - 1)
+        if field.get_type_name() == 'bool':
+            return '(%s) == 1' % value
+        return '(%s)' % value
+
+def _bit_overflow(name, value, bits):
+    ''' Helper to refuse a value that does not fit in its bit field
+    :param name: The name of the bit field
+    :param value: The value that does not fit
+    :param bits: The number of bits of the field
+    '''
+    raise EncodeException('%r does not fit in the %d bits of field %s'
+        % (value, bits, name))
+
+def _invalid_enum(name, value):
+    ''' Helper to refuse a value that is not in the enum of its field
+    :param name: The name of the enum field
+    :param value: The value that is not in the enumeration
+    '''
+    raise EncodeException('%r is not a value of the enum of field %s' % (value, name))
+
+def _check_bits(field):
+    ''' Helper to make sure a field can be packed as bits
+    :param field: The field to check
+    '''
+    if field.repeated or field.get_type_name() not in ('bool', 'integar', 'enum'):
+        raise ConfigurationException('field %s cannot be packed as bits' % field.name)
+    if not 0 < field.bits <= 64:
+        raise ConfigurationException('field %s has an invalid bit count' % field.name)
+    enum = getattr(field, 'enum', None)
+    if enum is not None and [v for v in enum.values if not 0 <= v < 1 << field.bits]:
+        raise ConfigurationException('enum %s does not fit in %d bits'
+            % (field.name, field.bits))
+
+def get_field_groups(fields):
+    ''' Group the consecutive bit fields of a message
+    :param fields: The ordered fields of the message
+    :return: A list of the fields and BitGroups in record order
+    '''
+    result, pending, used = [], [], 0
+    for field in fields:
+        if not getattr(field, 'bits', 0):
+            if pending: result.append(BitGroup(pending))
+            result.append(field)
+            pending, used = [], 0
+            continue
+        _check_bits(field)
+        if used + field.bits > 64:
+            result.append(BitGroup(pending))
+            pending, used = [], 0
+        pending.append(field)
+        used += field.bits
+    if pending: result.append(BitGroup(pending))
+    return result
+
+def get_sparse_fields(fields):
+    ''' Retrieve the fields stored after the presence bitmap
+    :param fields: The ordered fields of the message
+    :return: The ordered list of optional fields
+    '''
+    return [field for field in fields if field.optional and not field.bits
+        and field.get_type_name() != 'padding']
+
+def get_bitmap_codes(count):
+    ''' Helper to retrieve the struct codes of a presence bitmap
+    :param count: The number of optional fields
+    :return: A list of the struct code of each bitmap word
+    '''
+    if not count: return []
+    if count <= 64:
+        return [min([(size, code) for size, code in _bit_codes.items()
+            if size * 8 >= count])[1]]
+    return ['Q'] * ((count + 63) // 64)
+
+_ascii_types = { 'integar':_integer_codes, 'enum':_integer_codes, 'float':_float_codes }
+
+def get_field_helper(field, byte_order):
+    ''' Retrieve the helper bound to the %h marker of a field format
+    :param field: The field to retrieve the helper for
+    :param byte_order: The byte order of the message
+    :return: The helper object or None if the field needs none
+    '''
+    if field.repeated:
+        return ArrayPacker(field, byte_order)
+    if field.get_type_name() in ('string', 'character'):
+        return StringPacker(field)
+    if field.get_type_name() == 'enum':
+        return EnumPacker(field)
+    codes = _ascii_types.get(field.get_type_name())
+    if codes is not None and field.size not in codes:
+        return AsciiPacker(field)
+    return None
+
+def get_field_offsets(options):
+    ''' Retrieve the binary format and record offset of every field
+    :param options: The options of the message to inspect
+    :return: A list of (field, struct code, encode, decode, offset)
+
+    The offsets honour the alignment rules of the message byte order.
+    The fields of a bit group all share the code and offset of the group
+    (and have no encode expression, as the group is packed as a whole).
+    Messages with optional fields have no fixed offsets.
+    '''
+    if get_sparse_fields(options.fields):
+        raise ConfigurationException('%s has optional fields and no fixed layout'
+            % options.object_name)
+    order, codes, result = options.byte_order, '', []
+    for unit in get_field_groups(options.fields):
+        if isinstance(unit, BitGroup):
+            code = unit.code
+            codes += code
+            offset = struct.calcsize(order + codes) - struct.calcsize(order + code)
+            result.extend([(field, code, None, unit.get_decode(field), offset)
+                for field in unit.fields])
+            continue
+        code, encode, decode = get_field_format(unit)
+        codes += code
+        offset = struct.calcsize(order + codes) - struct.calcsize(order + code)
+        result.append((unit, code, encode, decode, offset))
+    return result
+
+#---------------------------------------------------------------------------#
+# Ascii Values
+#---------------------------------------------------------------------------#
+class AsciiPacker(object):
+    ''' Writes the value of a number field as zero padded ascii digits
+
+    :param field: The number field to pack
+    :param size: The number of characters the field holds
+    :param text: The format string of the value
+    '''
+    __slots__ = ('field', 'size', 'text')
+
+    def __init__(self, field):
+        ''' Initialize a new instance
+        :param field: The number field to pack
+        '''
+        self.field = field
+        self.size  = field.size
+        if field.get_type_name() == 'float':
+            self.text = '%%0%d.%df' % (field.size, field.precision)
+        else: self.text = '%%0%dd' % field.size
+
+    def pack(self, value):
+        ''' Convert the field value to its digits
+        :param value: The value to pack
+        :return: The digits of the value
+        '''
+        text = self.text % value
+        if len(text) > self.size:
+            raise EncodeException('%r does not fit in the %d characters of field %s'
+                % (value, self.size, self.field.name))
+        return text
+
+#---------------------------------------------------------------------------#
+# String Values
+#---------------------------------------------------------------------------#
+class StringPacker(object):
+    ''' Refuses the string values that are longer than their field
+
+    :param field: The string field to pack
+    :param size: The number of bytes the field holds
+    '''
+    __slots__ = ('field', 'size')
+
+    def __init__(self, field):
+        ''' Initialize a new instance
+        :param field: The string field to pack
+        '''
+        self.field = field
+        self.size  = 1 if field.get_type_name() == 'character' else field.size
+
+    def pack(self, value):
+        ''' Check that the field value fits in the field
+        :param value: The value to pack
+        :return: The value (struct pads it with NULs)
+        '''
+        if len(value) > self.size:
+            raise EncodeException('%r does not fit in the %d bytes of field %s'
+                % (value, self.size, self.field.name))
+        return value
+
+#---------------------------------------------------------------------------#
+# Enum Values
+#---------------------------------------------------------------------------#
+class EnumPacker(object):
+    ''' Refuses the values that are not in the enum of their field
+
+    :param field: The enum field to pack
+    :param values: The values of the enumeration
+    :param ascii: The AsciiPacker of the value (or None if it is binary)
+    '''
+    __slots__ = ('field', 'values', 'ascii')
+
+    def __init__(self, field):
+        ''' Initialize a new instance
+        :param field: The enum field to pack
+        '''
+        self.field  = field
+        self.values = frozenset(field.enum.values)
+        self.ascii  = AsciiPacker(field) if field.size not in _integer_codes else None
+
+    def pack(self, value):
+        ''' Check that the field value is in the enumeration
+        :param value: The value to pack
+        :return: The value (or its digits for an ascii field)
+        '''
+        if value not in self.values:
+            _invalid_enum(self.field.name, value)
+        if self.ascii is not None:
+            return self.ascii.pack(value)
+        return value
+
+#---------------------------------------------------------------------------#
+# Repeated Values
+#---------------------------------------------------------------------------#
+_native_order = sys.byteorder == 'little' and '<' or '>'
+_byte_orders  = { '!':'>', '>':'>', '<':'<', '=':_native_order, '@':_native_order }
+
+class ArrayPacker(object):
+    ''' Copies the values of a repeated field to and from their block
+
+    :param field: The repeated field to pack
+    :param byte_order: The byte order of the message
+    '''
+    __slots__ = ('field', 'count', 'swap', 'blank', 'enum')
+
+    def __init__(self, field, byte_order):
+        ''' Initialize a new instance
+        :param field: The repeated field to pack
+        :param byte_order: The byte order of the message
+        '''
+        self.field = field
+        self.count = field.count
+        self.swap  = _byte_orders[byte_order] != _native_order
+        self.blank = field.new_repeated([0] * field.count)
+        enum = getattr(field, 'enum', None)
+        self.enum  = frozenset(enum.values) if enum is not None else None
+
+    def pack(self, values):
+        ''' Convert the field values to their encoded block
+        :param values: The array (or sequence) of values to pack
+        :return: The block holding exactly count values
+
+        Fewer than count values are padded with zeros, while more than
+        count values raise an EncodeException rather than being dropped
+        (as do the values of an enum field that are not in its enum).
+        '''
+        if self.enum is not None and not self.enum.issuperset(values):
+            _invalid_enum(self.field.name, [v for v in values if v not in self.enum][0])
+        if not isinstance(values, array.array) or values.typecode != self.blank.typecode:
+            values = self.field.new_repeated(values)
+        if len(values) > self.count:
+            raise EncodeException('%d values do not fit in the %d of field %s'
+                % (len(values), self.count, self.field.name))
+        if len(values) != self.count:
+            values = (values + self.blank)[:self.count]
+        elif self.swap:
+            values = values[:]
+        if self.swap:
+            values.byteswap()
+        return values.tostring()
+
+    def unpack(self, block):
+        ''' Convert an encoded block back to the field values
+        :param block: The encoded block
+        :return: The array of decoded values
+        '''
+        values = self.field.new_repeated(block)
+        if self.swap:
+            values.byteswap()
+        return values
+
+#---------------------------------------------------------------------------#
+# Codec
+#---------------------------------------------------------------------------#
+class Codec(object):
+    ''' The compiled binary codec for a single message type
+
+    :param struct: The struct describing the fixed part of the record
+    :param size: The size of the fixed part of the record in bytes
+    :param fixed: False if the record has optional fields (and varies in size)
+    :param pack: pack(message) -> string
+    :param pack_into: pack_into(buffer, offset, message) -> end offset
+    :param unpack_from: unpack_from(buffer, offset=0, message=None) -> message
+    :param unpack_next: unpack_next(buffer, offset=0, message=None) -> (message, end offset)
+    '''
+
+    def __init__(self, struct, namespace, fixed=True):
+        ''' Initialize a new instance
+        :param struct: The compiled record struct
+        :param namespace: The namespace holding the generated functions
+        :param fixed: True if every record has the same size
+        '''
+        self.struct      = struct
+        self.size        = struct.size
+        self.fixed       = fixed
+        self.pack        = namespace['pack']
+        self.pack_into   = namespace['pack_into']
+        self.unpack_from = namespace['unpack_from']
+        self.unpack_next = namespace['unpack_next']
+
+def _compile_sparse(options, fields, namespace, masks):
+    ''' Helper to generate the code of the optional fields
+    :param options: The options of the message to compile
+    :param fields: The optional fields of the message
+    :param namespace: The namespace to bind the field helpers in
+    :param masks: The names of the bitmap words
+    :return: (encode lines, decode lines)
+    '''
+    encoders, decoders = [], []
+    for index, field in enumerate(fields):
+        code, encode, decode = get_field_format(field)
+        layout = struct.Struct(options.byte_order + code)
+        helper = get_field_helper(field, options.byte_order)
+        if helper is not None:
+            namespace['_oh%d' % index] = helper
+            encode = encode.replace('%h', '_oh%d' % index)
+            decode = decode.replace('%h', '_oh%d' % index)
+        mask, bit = masks[index // 64], 1 << (index % 64)
+        access = 'message.%s' % field.name
+        namespace['_os%d' % index] = layout.pack
+        namespace['_or%d' % index] = layout.unpack_from
+        if field.repeated:
+            present = 'len(%s)' % access
+        else:
+            namespace['_od%d' % index] = get_default(options.get_layout(), field.name)
+            present = '%s != _od%d' % (access, index)
+        encoders.extend([
+            '    if %s:' % present,
+            '        %s |= %d' % (mask, bit),
+            '        parts.append(_os%d(%s))' % (index, encode.replace('%s', access)),
+        ])
+        decoders.extend([
+            '    if %s & %d:' % (mask, bit),
+            '        %s = %s' % (access, decode.replace('%s',
+                '_or%d(buffer, position)[0]' % index)),
+            '        position += %d' % layout.size,
+        ])
+    return encoders, decoders
+
+def compile_codec(options):
+    ''' Builds the codec for the supplied message options
+    :param options: The options of the message to compile
+    :return: The compiled codec
+    '''
+    formats, encoders, decoders = [], [], []
+    namespace = {}
+    sparse = get_sparse_fields(options.fields)
+    fields = [field for field in options.fields if field not in sparse]
+    for index, field in enumerate(get_field_groups(fields)):
+        if isinstance(field, BitGroup):
+            formats.append(field.code)
+            encoders.append(field.get_encode('message'))
+            value = '_v%d' % index
+            for member in field.fields:
+                decoders.append((member.name, field.get_decode(member).replace('%s', value),
+                    member is field.fields[0] and value or None))
+            continue
+        code, encode, decode = get_field_format(field)
+        formats.append(code)
+        access = 'message.%s' % field.name
+        helper = get_field_helper(field, options.byte_order)
+        if helper is not None:
+            namespace['_h%d' % index] = helper
+            encode = encode.replace('%h', '_h%d' % index)
+            decode = decode.replace('%h', '_h%d' % index)
+        if encode is not None:
+            encoders.append(encode.replace('%s', access))
+            value = '_v%d' % index
+            decoders.append((field.name, decode.replace('%s', value), value))
+        else:
+            namespace['_c%d' % index] = field.value
+            decoders.append((field.name, '_c%d' % index, None))
+
+    masks = ['_m%d' % index for index, _ in enumerate(get_bitmap_codes(len(sparse)))]
+    formats.extend(get_bitmap_codes(len(sparse)))
+    layout = struct.Struct(options.byte_order + ''.join(formats))
+    total  = getattr(options, 'total_size', None)
+    if total and sparse:
+        raise ConfigurationException('%s has optional fields and a total_size'
+            % options.object_name)
+    if total:
+        if total < layout.size:
+            raise ConfigurationException('%s is larger than its total_size'
+                % options.object_name)
+        formats.append('%dx' % (total - layout.size))
+        layout = struct.Struct(options.byte_order + ''.join(formats))
+
+    if sparse:
+        source = _sparse_source(options, sparse, namespace, masks, encoders, decoders)
+    else: source = _fixed_source(encoders, decoders)
+
+    namespace.update({
+        '_pack'        : layout.pack,
+        '_pack_into'   : layout.pack_into,
+        '_unpack_from' : layout.unpack_from,
+        '_overflow'    : _bit_overflow,
+        '_invalid'     : _invalid_enum,
+        '_reset'       : reset_message,
+        '_error'       : struct.error,
+        '_new'         : object.__new__,
+        '_message'     : options.message,
+        '_size'        : layout.size,
+    })
+    code = compile('\n'.join(source) + '\n', '<codec %s>' % options.object_name, 'exec')
+    exec code in namespace
+    _logger.debug('compiled codec for %s: %s' % (options.object_name, layout.format))
+    return Codec(layout, namespace, not sparse)
+
+def _unpack_source(name, targets, decoders, reset=False):
+    ''' Helper to generate the start of an unpack function
+    :param name: The name of the generated function
+    :param targets: The names the fixed struct is unpacked to
+    :param decoders: The (field name, expression, target) of the fixed fields
+    :param reset: True to reset the message to its defaults first
+    :return: The source lines
+    '''
+    source = ['def %s(buffer, offset=0, message=None):' % name]
+    if targets:
+        source.append('    (%s, ) = _unpack_from(buffer, offset)' % ', '.join(targets))
+    source.extend([
+        '    if message is None:',
+        '        message = _new(_message)',
+    ])
+    if reset: source.append('    _reset(message)')
+    source.extend(['    message.%s = %s' % (name, expr) for name, expr, _ in decoders])
+    return source
+
+def _fixed_source(encoders, decoders):
+    ''' Helper to generate the functions of a fixed width codec
+    :param encoders: The expressions of the fixed struct values
+    :param decoders: The (field name, expression, target) of the fixed fields
+    :return: The source lines
+    '''
+    targets = [name for _, _, name in decoders if name]
+    source  = [
+        'def pack(message):',
+        '    return _pack(%s)' % ', '.join(encoders),
+        'def pack_into(buffer, offset, message):',
+        '    _pack_into(buffer, offset%s)' % ''.join([', ' + v for v in encoders]),
+        '    return offset + _size',
+    ]
+    source.extend(_unpack_source('unpack_from', targets, decoders))
+    source.extend([
+        '    return message',
+        'def unpack_next(buffer, offset=0, message=None):',
+        '    return unpack_from(buffer, offset, message), offset + _size',
+    ])
+    return source
+
+def _sparse_source(options, sparse, namespace, masks, encoders, decoders):
+    ''' Helper to generate the functions of a codec with optional fields
+    :param options: The options of the message to compile
+    :param sparse: The optional fields of the message
+    :param namespace: The namespace to bind the field helpers in
+    :param masks: The names of the bitmap words
+    :param encoders: The expressions of the fixed struct values
+    :param decoders: The (field name, expression, target) of the fixed fields
+    :return: The source lines
+    '''
+    packs, unpacks = _compile_sparse(options, sparse, namespace, masks)
+    targets = [name for _, _, name in decoders if name] + masks
+    source  = ['def pack(message):', '    parts = []']
+    source.extend(['    %s = 0' % mask for mask in masks])
+    source.extend(packs)
+    source.extend([
+        "    return _pack(%s) + ''.join(parts)" % ', '.join(encoders + masks),
+        'def pack_into(buffer, offset, message):',
+        '    data = pack(message)',
+        '    end = offset + len(data)',
+        '    if end > len(buffer):',
+        "        raise _error('pack_into requires a buffer of at least %d bytes' % end)",
+        '    buffer[offset:end] = data',
+        '    return end',
+    ])
+    source.extend(_unpack_source('unpack_next', targets, decoders, True))
+    source.append('    position = offset + _size')
+    source.extend(unpacks)
+    source.extend([
+        '    return message, position',
+        'def unpack_from(buffer, offset=0, message=None):',
+        '    return unpack_next(buffer, offset, message)[0]',
+    ])
+    return source
+
+#---------------------------------------------------------------------------#
+# Exported Symbols
+#---------------------------------------------------------------------------#
+__all__ = ( 'Codec', 'AsciiPacker', 'StringPacker', 'EnumPacker', 'ArrayPacker', 'BitGroup', 'compile_codec',
+    'get_field_format', 'get_field_helper', 'get_field_groups', 'get_sparse_fields',
+    'get_bitmap_codes',
+    'get_field_offsets', 'data_types' )
@@ -0,0 +1,205 @@
+'''
+Message Dispatch Index
+----------------------
+
+When a stream multiplexes many message types, every frame has to be
+matched to its message type before it can be decoded.  Every message
+type is added to the dispatch index by the message metaclass as soon
+as it is created, keyed by its wire discriminators:
+
+- the ``encoded_name`` of the message (defaults to the class name)
+- the ``type_id`` Meta option, if one was supplied
+
+An explicit ``type_id`` or ``encoded_name`` must name a single message
+type, so registering a different message type under one that is
+already taken raises a :class:`ConfigurationException`.  The class
+names used when no ``encoded_name`` is given are not unique though (like
+the app cache, two applications may both declare a ``Heartbeat``), so
+they are only an error when they are looked up while more than one
+message type has them; the lookup can be narrowed down by app label.
+Declaring the same message again (a reloaded module, or one imported
+under two paths) replaces it.
+
+Both lookups are a single dictionary access, and the compiled codec of
+the message (which is cached on its options) can be fetched directly::
+
+    message = registry.get_message('NewOrder')
+    codec   = registry.get_codec(5)
+
+For binary streams where the discriminator is a field at a fixed offset
+of the record header, a :class:`HeaderDispatcher` reads that field
+straight out of the buffer and decodes the matching message::
+
+    dispatcher = HeaderDispatcher('!H', offset=0)
+    message = dispatcher.decode(buffer, offset)
+'''
+import os
+import sys
+import struct
+from rosetta.core.exceptions import ConfigurationException
+
+#---------------------------------------------------------------------------#
+# Logger
+#---------------------------------------------------------------------------#
+import logging
+_logger = logging.getLogger('rosetta.core.dispatch')
+
+#---------------------------------------------------------------------------#
+# Registry
+#---------------------------------------------------------------------------#
+def _get_source(message):
+    ''' Helper to find the source file of a message type
+    :param message: The message type to find the source of
+    :return: The source file without its extension (or None)
+    '''
+    path = getattr(sys.modules.get(message.__module__), '__file__', None)
+    return path and os.path.splitext(os.path.abspath(path))[0]
+
+def is_same_message(first, second):
+    ''' Check if two message types are the same declaration
+    :param first: The first message type
+    :param second: The second message type
+    :return: True if they are the same message, False otherwise
+
+    Like the app cache, the source file is compared as well, as the same
+    message may be imported via different paths.
+    '''
+    if first is second:
+        return True
+    if first.__name__ != second.__name__:
+        return False
+    if first.__module__ == second.__module__:
+        return True
+    source = _get_source(first)
+    return source is not None and source == _get_source(second)
+
+class MessageRegistry(object):
+    ''' The index of message types by their wire discriminators
+
+    :param messages: A map of explicit discriminator to message type
+    :param implicit: A map of class name to the message types that are
+                     encoded by it (as they have no encoded_name)
+    '''
+
+    def __init__(self):
+        ''' Initialize a new instance
+        '''
+        self.messages = {}
+        self.implicit = {}
+
+    def register(self, message):
+        ''' Add a message type to the index
+        :param message: The message type to add
+
+        Raises a ConfigurationException (and adds nothing) if another
+        message type already has one of the explicit discriminators.
+        '''
+        options = message._meta
+        keys = [key for key in (options.encoded_name, options.type_id) if key is not None]
+        if options.implicit_name:
+            keys.remove(options.encoded_name)
+        for key in keys:
+            current = self.messages.get(key)
+            if current is not None and not is_same_message(current, message):
+                raise ConfigurationException('%s.%s and %s.%s both use the discriminator %r'
+                    % (current.__module__, current.__name__, message.__module__,
+                    message.__name__, key))
+        for key in keys:
+            self.messages[key] = message
+        if options.implicit_name:
+            name = options.encoded_name
+            self.implicit[name] = [entry for entry in self.implicit.get(name, ())
+                if not is_same_message(entry, message)] + [message]
+
+    def get_message(self, key, app_label=None):
+        ''' Retrieve a message type by its discriminator
+        :param key: The encoded name or type id of the message
+        :param app_label: The app label to narrow down a class name with
+        :return: The message type or None if it does not exist
+
+        Raises a ConfigurationException if the key is the class name of
+        more than one message type (in the app label).
+        '''
+        message = self.messages.get(key)
+        if message is not None:
+            return message
+        entries = self.implicit.get(key)
+        if not entries:
+            return None
+        if app_label is not None:
+            entries = [entry for entry in entries if entry._meta.app_label == app_label]
+            if not entries: return None
+        if len(entries) > 1:
+            raise ConfigurationException('%r is the name of %s, give them an encoded_name'
+                % (key, ', '.join(['%s.%s' % (entry.__module__, entry.__name__)
+                for entry in entries])))
+        return entries[0]
+
+    def get_codec(self, key):
+        ''' Retrieve the compiled codec of a message type
+        :param key: The encoded name or type id of the message
+        :return: The compiled codec or None if it does not exist
+        '''
+        message = self.get_message(key)
+        if message is None: return None
+        return message._meta.get_codec()
+
+    def __contains__(self, key):
+        return key in self.messages or key in self.implicit
+
+registry = MessageRegistry()
+
+#---------------------------------------------------------------------------#
+# Header Dispatcher
+#---------------------------------------------------------------------------#
+class HeaderDispatcher(object):
+    ''' Decodes binary records based on a type id in their header
+
+    :param header: The struct used to read the type id
+    :param offset: The offset of the type id in the record
+    :param registry: The registry to look the type ids up in
+    '''
+
+    def __init__(self, format='!H', offset=0, registry=registry):
+        ''' Initialize a new instance
+        :param format: The struct format of the type id field
+        :param offset: The offset of the type id in the record
+        :param registry: The registry to look the type ids up in
+        '''
+        self.header   = struct.Struct(format)
+        self.offset   = offset
+        self.registry = registry
+
+    def get_type_id(self, buffer, offset=0):
+        ''' Read the type id of a record
+        :param buffer: The buffer holding the record
+        :param offset: The offset of the record in the buffer
+        :return: The type id of the record
+        '''
+        return self.header.unpack_from(buffer, offset + self.offset)[0]
+
+    def get_codec(self, buffer, offset=0):
+        ''' Retrieve the codec of a record
+        :param buffer: The buffer holding the record
+        :param offset: The offset of the record in the buffer
+        :return: The compiled codec of the record type
+        '''
+        key = self.header.unpack_from(buffer, offset + self.offset)[0]
+        codec = self.registry.get_codec(key)
+        if codec is None:
+            raise KeyError('no message registered for type id %r' % key)
+        return codec
+
+    def decode(self, buffer, offset=0, length=None):
+        ''' Decode a record to its matching message
+        :param buffer: The buffer holding the record
+        :param offset: The offset of the record in the buffer
+        :param length: Unused, allows use as a framer decoder
+        :return: The decoded message
+        '''
+        return self.get_codec(buffer, offset).unpack_from(buffer, offset)
+
+#---------------------------------------------------------------------------#
+# Exported Symbols
+#---------------------------------------------------------------------------#
+__all__ = ( 'MessageRegistry', 'HeaderDispatcher', 'registry', 'is_same_message' )
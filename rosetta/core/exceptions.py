@@ -36,3 +36,17 @@ class FieldDoesNotExist(RosettaException):
     does not exist on the current message
     '''
     pass
+
+class DecodeException(RosettaException):
+    '''
+    Raised when an encoded message cannot be decoded
+    with the information the decoder has
+    '''
+    pass
+
+class EncodeException(RosettaException):
+    '''
+    Raised when a message value cannot be represented
+    in the encoded form of its field
+    '''
+    pass
@@ -58,13 +58,53 @@ Repeat
 
 By setting the repeat field to true, the value can be set to a list
 of values instead of a single value and will be treated as multiple
-fields of the same type.
+fields of the same type.  The ``count`` option sets the number of
+values the field holds in the fixed width binary layout::
+
+    class Ladder(Message):
+        prices = FloatField(size=8, repeated=True, count=100)
+        sizes  = IntField(size=4,   repeated=True, count=100)
+
+Repeated numeric fields (integar, float, bool) are stored in an
+``array.array`` of the matching machine type rather than a list, which
+keeps a ladder of hundreds of levels to a single compact buffer and lets
+the binary formats copy it in and out in one call.  Every other type is
+stored in a plain list.
+
+Enumerations
+--------------------------
+
+An :class:`EnumField` holds one of the values of an
+:class:`rosetta.utils.enum.Enum`.  The message value is the integer
+value, which the binary formats encode in the smallest integer width
+holding every value of the enumeration (unless a size is given) and
+the text formats write as the name of the value::
+
+    Side = Enum('Buy', 'Sell', 'SellShort')
+
+    class Order(Message):
+        side = EnumField(enum=Side)
+
+Bits
+--------------------------
+
+By setting ``bits`` on a bool, enum or integar field, the binary formats
+store the field in that many bits instead of its full size.  Runs of
+consecutive bit fields are packed into one shared unsigned integer (see
+:mod:`rosetta.core.codec`), so a message with thirty flags spends four
+bytes on them instead of thirty::
+
+    class Report(Message):
+        is_open  = BoolField(bits=1)
+        is_short = BoolField(bits=1)
+        tif      = EnumField(enum=TimeInForce, bits=3)
 
 .. todo::
 
-   Possible fields we need to add are choice, enumeration, bit-field.
+   Possible fields we need to add are choice.
 '''
-from rosetta.core.exceptions import FieldDoesNotExist
+import array
+from rosetta.core.exceptions import FieldDoesNotExist, ConfigurationException
 
 #---------------------------------------------------------------------------# 
 # Logger
@@ -79,6 +119,35 @@ class NOT_PROVIDED:
     ''' Class used to flag invalid values '''
     pass
 
+def _find_typecode(candidates, size):
+    ''' Helper to find the array typecode of a given item size
+    :param candidates: The typecodes to try in order
+    :param size: The item size in bytes to match
+    :return: The first matching typecode or None
+    '''
+    for code in candidates:
+        try:
+            if array.array(code).itemsize == size:
+                return code
+        except ValueError: pass # typecode not supported here
+    return None
+
+#--------------------------------------------------------------------------------#
+# Array Typecodes
+#--------------------------------------------------------------------------------#
+# field type -> { size : array typecode } for the repeated numeric fields
+#--------------------------------------------------------------------------------#
+array_types = {
+    'integar' : {
+        1 : 'b',
+        2 : _find_typecode(('h', 'i'), 2),
+        4 : _find_typecode(('i', 'l'), 4),
+        8 : _find_typecode(('q', 'l'), 8),
+    },
+    'float'   : { 4:'f', 8:'d' },
+    'bool'    : { 1:'B' },
+}
+
 #--------------------------------------------------------------------------------#
 # Base Field
 #--------------------------------------------------------------------------------#
@@ -94,6 +163,9 @@ class Field(object):
     :param default: The default value of the field
     :param const: True if this value cannot be changed
     :param optional: True if this field is optional
+    :param repeated: True if this field holds a list of values
+    :param count: The number of values a repeated field encodes
+    :param bits: The number of bits the field is packed in (0 for its size)
     '''
     _order_counter = 0
 
@@ -106,6 +178,8 @@ class Field(object):
         self.const        = kwargs.get('const', False)
         self.optional     = kwargs.get('optional', False)
         self.repeated     = kwargs.get('repeated', False)
+        self.count        = kwargs.get('count', 0)
+        self.bits         = kwargs.get('bits', 0)
         self.name         = kwargs.get('name', '')
         self.verbose_name = kwargs.get('verbose_name', self.name)
         self.encoded_name = kwargs.get('encoded_name', self.name)
@@ -147,13 +221,55 @@ class Field(object):
     def get_default(self):
         ''' Gets the default value for this field
         :return: The default value if it exists, or None
+
+        Repeated fields always get a new (empty unless the default
+        is a sequence) container of their own.
         '''
+        if self.repeated:
+            values = self.default
+            if not isinstance(values, (list, tuple, array.array)):
+                values = ()
+            return self.new_repeated(values)
         if self.has_default():
             if callable(self.default):
                 return self.default()
             return self.default
         return None
 
+    def get_typecode(self):
+        ''' Gets the array typecode used to store repeated values
+        :return: The typecode or None if the values are stored in a list
+        '''
+        codes = array_types.get(self.get_type_name())
+        return codes and codes.get(self.size)
+
+    def new_repeated(self, values=()):
+        ''' Create the container used to store repeated values
+        :param values: The initial values (or raw machine bytes)
+        :return: An array of the values, or a list if they are not numeric
+        '''
+        code = self.get_typecode()
+        if code is None:
+            return list(values)
+        if isinstance(values, str):
+            result = array.array(code)
+            result.fromstring(values)
+            return result
+        return array.array(code, values)
+
+    def to_repeated(self, values):
+        ''' Convert values to the container used to store repeated values
+        :param values: The values to convert
+        :return: The values if they are already stored in the right
+                 container, otherwise a new container of the values
+        '''
+        code = self.get_typecode()
+        if code is None:
+            if isinstance(values, list): return values
+        elif isinstance(values, array.array) and values.typecode == code:
+            return values
+        return self.new_repeated(values)
+
     def set_attributes_from_name(self, name):
         ''' Sets the various names from the field name
         :param name: The message level field name
@@ -246,6 +362,32 @@ class IntField(Field):
         '''
         return 'integar'
 
+class EnumField(Field):
+    ''' Packet Field representing a value of an enumeration
+    '''
+    def __init__(self, *args, **kwargs):
+        ''' Initialize a new instance of the Field
+        '''
+        self.enum = kwargs.pop('enum', None)
+        if self.enum is None:
+            raise ConfigurationException('an EnumField requires an enum')
+        kwargs['type'] = int
+        kwargs.setdefault('size', self.enum.size)
+        kwargs.setdefault('default', self.enum.get_default())
+        Field.__init__(self, *args, **kwargs)
+
+    def get_type_name(self):
+        ''' Return a readable type name
+        :return: The type name
+        '''
+        return 'enum'
+
+    def get_typecode(self):
+        ''' Gets the array typecode used to store repeated values
+        :return: The typecode or None if the values are stored in a list
+        '''
+        return array_types['integar'].get(self.size)
+
 class BoolField(Field):
     ''' Packet Field representing a boolean
     '''
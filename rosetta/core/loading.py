@@ -1,26 +1,52 @@
-"Utilities for loading models and the modules that contain them."
-
-from django.conf import settings
-from django.core.exceptions import ImproperlyConfigured
-from django.utils.datastructures import SortedDict
-
+'''
+Message Loading
+---------------
+
+Utilities for loading messages and the modules that contain them.
+
+This started as the django application cache, but it no longer needs
+django (or its settings) to work.  The applications are configured
+directly on the cache::
+
+    from rosetta.core import loading
+    loading.configure(['exchange.orders', 'exchange.quotes'])
+
+and nothing is imported until it is needed.  Looking up a single
+message only imports the message module of the application it lives
+in; the other applications are left alone until they are asked for.
+Message types register themselves with the cache when they are
+created (see :mod:`rosetta.core.message`), so messages that are
+already imported are found without touching the configuration at all.
+'''
 import sys
 import os
 import threading
+from rosetta.core.exceptions import ConfigurationException
+
+#---------------------------------------------------------------------------#
+# Logger
+#---------------------------------------------------------------------------#
+import logging
+_logger = logging.getLogger('rosetta.core.loading')
 
 class AppCache(object):
-    """
-    A cache that stores installed applications and their models. Used to
-    provide reverse-relations and for app introspection (e.g. admin).
-    """
+    '''
+    A cache that stores installed applications and their messages.
+    '''
     # Use the Borg pattern to share state between all instances. Details at
     # http://aspn.activestate.com/ASPN/Cookbook/Python/Recipe/66531.
     __shared_state = dict(
-        # Keys of app_store are the model modules for each application.
-        app_store = SortedDict(),
+        # The fully qualified names of the configured applications.
+        installed_apps = [],
+
+        # The name of the module holding the messages of an application.
+        module_name = 'messages',
+
+        # Keys of app_store are the message modules for each application.
+        app_store = {},
 
-        # Mapping of app_labels to a dictionary of model names to model code.
-        app_models = SortedDict(),
+        # Mapping of app_labels to a dictionary of message names to messages.
+        app_models = {},
 
         # Mapping of app_labels to errors raised when trying to import the app.
         app_errors = {},
@@ -28,8 +54,6 @@ class AppCache(object):
         # -- Everything below here is only used when populating the cache --
         loaded = False,
         handled = {},
-        postponed = [],
-        nesting_level = 0,
         write_lock = threading.RLock(),
     )
 
@@ -40,139 +64,167 @@ class AppCache(object):
         '''
         self.__dict__ = self.__shared_state
 
+    def configure(self, installed_apps, module_name='messages'):
+        ''' Set the applications the cache can load messages from
+        :param installed_apps: The fully qualified application names
+        :param module_name: The name of the message module of an application
+
+        Nothing is imported here; the applications are loaded as their
+        messages are requested.
+        '''
+        self.write_lock.acquire()
+        try:
+            self.installed_apps = list(installed_apps)
+            self.module_name = module_name
+            self.loaded = False
+        finally:
+            self.write_lock.release()
+
     def _populate(self):
-        """
+        '''
         Fill in all the cache information. This method is threadsafe, in the
         sense that every caller will see the same state upon return, and if the
         cache is already initialised, it does no work.
-        """
+        '''
         if self.loaded:
             return
         self.write_lock.acquire()
         try:
             if self.loaded:
                 return
-            for app_name in settings.INSTALLED_APPS:
+            for app_name in self.installed_apps:
                 if app_name in self.handled:
                     continue
-                self.load_app(app_name, True)
-            if not self.nesting_level:
-                for app_name in self.postponed:
-                    self.load_app(app_name)
-                self.loaded = True
+                self.load_app(app_name)
+            self.loaded = True
         finally:
             self.write_lock.release()
 
-    def load_app(self, app_name, can_postpone=False):
-        """
+    def load_app(self, app_name):
+        '''
         Loads the app with the provided fully qualified name, and returns the
-        model module.
-        """
+        message module (or None if the app has no messages).
+        '''
         self.handled[app_name] = None
-        self.nesting_level += 1
-        mod = __import__(app_name, {}, {}, ['models'])
-        self.nesting_level -= 1
-        if not hasattr(mod, 'models'):
-            if can_postpone:
-                # Either the app has no models, or the package is still being
-                # imported by Python and the model module isn't available yet.
-                # We will check again once all the recursion has finished (in
-                # populate).
-                self.postponed.append(app_name)
+        try:
+            mod = __import__(app_name, {}, {}, [self.module_name])
+        except ImportError, ex:
+            self.app_errors[app_name] = ex
+            _logger.warning('unable to load %s: %s' % (app_name, ex))
+            return None
+        messages = getattr(mod, self.module_name, None)
+        if messages is None:
             return None
-        if mod.models not in self.app_store:
-            self.app_store[mod.models] = len(self.app_store)
-        return mod.models
+        if messages not in self.app_store:
+            self.app_store[messages] = len(self.app_store)
+        return messages
 
     def app_cache_ready(self):
-        """
-        Returns true if the model cache is fully populated.
+        '''
+        Returns true if the message cache is fully populated.
 
         Useful for code that wants to cache the results of get_models() for
         themselves once it is safe to do so.
-        """
+        '''
         return self.loaded
 
     def get_apps(self):
-        "Returns a list of all installed modules that contain models."
+        ''' Returns a list of all installed modules that contain messages. '''
         self._populate()
 
         # Ensure the returned list is always in the same order (with new apps
-        # added at the end). This avoids unstable ordering on the admin app
-        # list page, for example.
+        # added at the end).
         apps = [(v, k) for k, v in self.app_store.items()]
         apps.sort()
         return [elt[1] for elt in apps]
 
+    def _find_app(self, app_label):
+        ''' Returns the fully qualified name of an application label
+        :param app_label: The label of the application to find
+        :return: The application name or None if it is not configured
+        '''
+        for app_name in self.installed_apps:
+            if app_label == app_name.split('.')[-1]:
+                return app_name
+        return None
+
     def get_app(self, app_label, emptyOK=False):
-        """
-        Returns the module containing the models for the given app_label. If
-        the app has no models in it and 'emptyOK' is True, returns None.
-        """
-        self._populate()
+        '''
+        Returns the module containing the messages for the given app_label. If
+        the app has no messages in it and 'emptyOK' is True, returns None.
+        '''
         self.write_lock.acquire()
         try:
-            for app_name in settings.INSTALLED_APPS:
-                if app_label == app_name.split('.')[-1]:
-                    mod = self.load_app(app_name, False)
-                    if mod is None:
-                        if emptyOK:
-                            return None
-                    else:
-                        return mod
-            raise ImproperlyConfigured, "App with label %s could not be found" % app_label
+            app_name = self._find_app(app_label)
+            if app_name is not None:
+                mod = self.load_app(app_name)
+                if mod is not None or emptyOK:
+                    return mod
+            raise ConfigurationException('App with label %s could not be found' % app_label)
         finally:
             self.write_lock.release()
 
     def get_app_errors(self):
-        "Returns the map of known problems with the INSTALLED_APPS."
+        ''' Returns the map of known problems with the installed apps. '''
         self._populate()
         return self.app_errors
 
     def get_models(self, app_mod=None):
-        """
-        Given a module containing models, returns a list of the models.
-        Otherwise returns a list of all installed models.
-        """
-        self._populate()
+        '''
+        Given a module containing messages, returns a list of the messages.
+        Otherwise returns a list of all installed messages.
+        '''
         if app_mod:
-            return self.app_models.get(app_mod.__name__.split('.')[-2], SortedDict()).values()
-        else:
-            model_list = []
-            for app_entry in self.app_models.itervalues():
-                model_list.extend(app_entry.values())
-            return model_list
+            return self.app_models.get(app_mod.__name__.split('.')[-2], {}).values()
+        self._populate()
+        model_list = []
+        for app_entry in self.app_models.itervalues():
+            model_list.extend(app_entry.values())
+        return model_list
 
     def get_model(self, app_label, model_name, seed_cache=True):
-        """
-        Returns the model matching the given app_label and case-insensitive
+        '''
+        Returns the message matching the given app_label and case-insensitive
         model_name.
 
-        Returns None if no model is found.
-        """
-        if seed_cache:
-            self._populate()
-        return self.app_models.get(app_label, SortedDict()).get(model_name.lower())
+        If the message has not been registered yet and seed_cache is True,
+        only the application it belongs to is imported to find it.
+
+        Returns None if no message is found.
+        '''
+        model_name = model_name.lower()
+        model = self.app_models.get(app_label, {}).get(model_name)
+        if model is None and seed_cache:
+            app_name = self._find_app(app_label)
+            if app_name is not None and app_name not in self.handled:
+                self.write_lock.acquire()
+                try:
+                    self.load_app(app_name)
+                finally:
+                    self.write_lock.release()
+                model = self.app_models.get(app_label, {}).get(model_name)
+        return model
 
     def register_models(self, app_label, *models):
-        """
-        Register a set of models as belonging to an app.
-        """
+        '''
+        Register a set of messages as belonging to an app.
+        '''
         for model in models:
-            # Store as 'name: model' pair in a dictionary
+            # Store as 'name: message' pair in a dictionary
             # in the app_models dictionary
             model_name = model._meta.object_name.lower()
-            model_dict = self.app_models.setdefault(app_label, SortedDict())
+            model_dict = self.app_models.setdefault(app_label, {})
             if model_name in model_dict:
-                # The same model may be imported via different paths (e.g.
-                # appname.models and project.appname.models). We use the source
-                # filename as a means to detect identity.
-                fname1 = os.path.abspath(sys.modules[model.__module__].__file__)
-                fname2 = os.path.abspath(sys.modules[model_dict[model_name].__module__].__file__)
+                # The same message may be imported via different paths (e.g.
+                # appname.messages and project.appname.messages). We use the
+                # source filename as a means to detect identity.
+                fname1 = getattr(sys.modules[model.__module__], '__file__', None)
+                fname2 = getattr(sys.modules[model_dict[model_name].__module__], '__file__', None)
                 # Since the filename extension could be .py the first time and
                 # .pyc or .pyo the second time, ignore the extension when
                 # comparing.
-                if os.path.splitext(fname1)[0] == os.path.splitext(fname2)[0]:
+                if fname1 and fname2 and (os.path.splitext(os.path.abspath(fname1))[0]
+                    == os.path.splitext(os.path.abspath(fname2))[0]):
                     continue
             model_dict[model_name] = model
 
@@ -180,6 +232,7 @@ cache = AppCache()
 
 # These methods were always module level, so are kept that way for backwards
 # compatibility.
+configure = cache.configure
 get_apps = cache.get_apps
 get_app = cache.get_app
 get_app_errors = cache.get_app_errors
@@ -189,11 +242,10 @@ register_models = cache.register_models
 load_app = cache.load_app
 app_cache_ready = cache.app_cache_ready
 
-#---------------------------------------------------------------------------# 
+#---------------------------------------------------------------------------#
 # Exported Symbols
-#---------------------------------------------------------------------------# 
+#---------------------------------------------------------------------------#
 __all__ = (
-    'get_apps', 'get_app', 'get_models', 'get_model', 'register_models',
-    'load_app', 'app_cache_ready'
+    'configure', 'get_apps', 'get_app', 'get_models', 'get_model',
+    'register_models', 'load_app', 'app_cache_ready'
 )
-
@@ -19,7 +19,17 @@ try:
 except NameError:
     from sets import Set as set # Python 2.3 fallback.
 
+try: # try to import faster pickle first
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
 from rosetta.core.options import Options
+from rosetta.core.fields import Field
+from rosetta.core.dispatch import registry
+from rosetta.core.loading import register_models
+from rosetta.core.pool import reset_message
+from rosetta.core.exceptions import ConfigurationException
 
 #---------------------------------------------------------------------------# 
 # Logger
@@ -47,12 +57,16 @@ class MessageBase(type):
         if not parents:
             return super_new(cls, name, bases, attrs)
 
-        # create the class.
+        # create the class, using slotted storage for the fields if requested
         module = attrs.pop('__module__')
-        new_class = super_new(cls, name, bases, {'__module__': module})
+        attr_meta = attrs.pop('Meta', None)
+        class_attrs = {'__module__': module}
+        if getattr(attr_meta, 'use_slots', False):
+            class_attrs['__slots__'] = tuple([obj_name for obj_name, obj
+                in attrs.items() if isinstance(obj, Field)])
+        new_class = super_new(cls, name, bases, class_attrs)
 
         # extract current Meta information
-        attr_meta = attrs.pop('Meta', None)
         if not attr_meta:
             meta = getattr(new_class, 'Meta', None)
         else: meta = attr_meta
@@ -67,6 +81,13 @@ class MessageBase(type):
         for obj_name, obj in attrs.items():
             new_class.add_to_class(obj_name, obj)
 
+        # build the initializer from the field templates (unless supplied)
+        if '__init__' not in attrs:
+            new_class.__init__ = compile_init(new_class._meta)
+
+        # index the class by its wire discriminators and application
+        registry.register(new_class)
+        register_models(new_class._meta.app_label, new_class)
         return new_class
 
     def add_to_class(cls, name, value):
@@ -80,29 +101,212 @@ class MessageBase(type):
         '''
         if hasattr(value, 'contribute_to_class'):
             value.contribute_to_class(cls, name)
+            # a field added after the class was built needs a new initializer
+            if getattr(cls.__dict__.get('__init__'), 'generated', False):
+                cls.__init__ = compile_init(cls._meta)
         else: setattr(cls, name, value)
 
+#---------------------------------------------------------------------------#
+# Initializer
+#---------------------------------------------------------------------------#
+def _invalid_keywords(options, kwargs):
+    ''' Helper to raise for keyword arguments that are not fields
+    :param options: The options of the message being created
+    :param kwargs: The supplied keyword arguments
+    '''
+    names = sorted([name for name in kwargs if name not in options.get_layout().by_name])
+    raise TypeError("'%s' is an invalid keyword argument for %s"
+        % (names[0], options.object_name))
+
+def compile_init(options):
+    ''' Builds the initializer of a message type
+    :param options: The options of the message to build the initializer of
+    :return: The generated __init__ function
+
+    The initializer copies the precomputed field defaults of the layout in
+    one go (assigning them one by one for slotted messages), then fills in
+    the fields supplied positionally (in field order) or by keyword.
+    Values supplied for repeated fields are converted to the container
+    the field stores them in (see Field.to_repeated).
+    '''
+    layout = options.get_layout()
+    namespace = {
+        '_defaults' : layout.defaults,
+        '_names'    : layout.field_names,
+        '_fields'   : frozenset(layout.field_names),
+        '_count'    : len(layout.field_names),
+        '_zip'      : zip,
+        '_setattr'  : setattr,
+        '_invalid'  : _invalid_keywords,
+        '_options'  : options,
+    }
+    source = ['def __init__(self, *args, **kwargs):']
+    if options.use_slots:
+        for index, name in enumerate(sorted(layout.defaults)):
+            namespace['_d%d' % index] = layout.defaults[name]
+            source.append('    self.%s = _d%d' % (name, index))
+    else: source.append('    self.__dict__.update(_defaults)')
+    for index, (name, factory) in enumerate(layout.factories):
+        namespace['_f%d' % index] = factory
+        source.append('    self.%s = _f%d()' % (name, index))
+    source.extend([
+        '    if args:',
+        '        if len(args) > _count:',
+        "            raise TypeError('%s takes at most %%d arguments (%%d given)'"
+            " %% (_count, len(args)))" % options.object_name,
+        '        for name, value in _zip(_names, args):',
+        '            _setattr(self, name, value)',
+        '    if kwargs:',
+        '        if not _fields.issuperset(kwargs):',
+        '            _invalid(_options, kwargs)',
+    ])
+    if options.use_slots:
+        source.extend([
+            '        for name, value in kwargs.iteritems():',
+            '            _setattr(self, name, value)',
+        ])
+    else: source.append('        self.__dict__.update(kwargs)')
+    if layout.containers:
+        source.append('    if args or kwargs:')
+    for index, name in enumerate(layout.containers):
+        namespace['_r%d' % index] = layout.by_name[name].to_repeated
+        source.append('        self.%s = _r%d(self.%s)' % (name, index, name))
+    code = compile('\n'.join(source) + '\n', '<init %s>' % options.object_name, 'exec')
+    exec code in namespace
+    namespace['__init__'].generated = True
+    namespace['__init__'].__doc__ = Message.__init__.__doc__
+    return namespace['__init__']
+
+#---------------------------------------------------------------------------#
+# Pickle Support
+#---------------------------------------------------------------------------#
+def _restore_message(key, values):
+    ''' Rebuild a pickled message
+    :param key: The registered type id or encoded name of the message
+                (or the message type itself)
+    :param values: The field values of the message in field order
+    :return: The restored message
+    '''
+    handle = key if isinstance(key, MessageBase) else registry.get_message(key)
+    if handle is None:
+        raise pickle.UnpicklingError('no message is registered for %r' % (key,))
+    message = object.__new__(handle)
+    names = handle._meta.get_layout().field_names
+    if hasattr(message, '__dict__'):
+        message.__dict__.update(zip(names, values))
+    else:
+        for name, value in zip(names, values):
+            setattr(message, name, value)
+    return message
+
 class Message(object):
     ''' ...documentation...
+
+    If the ``use_slots`` Meta option is set, the message type is built
+    with a ``__slots__`` entry for each of its fields so that instances
+    do not carry a ``__dict__``.
     '''
     __metaclass__ = MessageBase
+    __slots__ = ()
 
     def __init__(self, *args, **kwargs):
         ''' Initialize a new instance
 
-        Django loops through the args and kwargs and izips
-        the arguments with the fields (for a copy constructor)
-        It then assigns the leftover kwargs to properties.
+        Like django, the positional arguments are zipped with the
+        fields in declaration order and the keyword arguments are
+        assigned to the fields of the same name; every other field
+        starts out with its default value.
+
+        Every message type gets a generated version of this (see
+        compile_init) that copies the precomputed defaults in one go.
+        '''
+        reset_message(self)
+        layout = self._meta.get_layout()
+        if len(args) > len(layout.field_names):
+            raise TypeError('too many arguments for %s' % self._meta.object_name)
+        for name, value in zip(layout.field_names, args) + kwargs.items():
+            if name not in layout.by_name:
+                _invalid_keywords(self._meta, kwargs)
+            if name in layout.containers:
+                value = layout.by_name[name].to_repeated(value)
+            setattr(self, name, value)
+
+    def clone(self):
+        ''' Create a copy of this message
+        :return: The copied message
+
+        The values are copied as they are (no field logic is run),
+        except that repeated fields get a copy of their container.
+        '''
+        return self.replace()
+
+    def replace(self, **changes):
+        ''' Create a copy of this message with some fields changed
+        :param changes: The new values of the fields to change
+        :return: The copied message
+        '''
+        options = self._meta
+        layout = options.get_layout()
+        message = object.__new__(self.__class__)
+        if options.use_slots:
+            for name in layout.field_names:
+                setattr(message, name, getattr(self, name))
+        else: message.__dict__.update(self.__dict__)
+        for name in layout.containers:
+            setattr(message, name, getattr(self, name)[:])
+        if changes:
+            if not layout.by_name.viewkeys() >= changes.viewkeys():
+                _invalid_keywords(options, changes)
+            for name, value in changes.iteritems():
+                if name in layout.containers:
+                    value = layout.by_name[name].to_repeated(value)
+                setattr(message, name, value)
+        return message
+
+    def reset(self):
+        ''' Restore the default value of every field
+        :return: This message
+        '''
+        return reset_message(self)
+
+    @classmethod
+    def acquire(cls):
+        ''' Retrieve a message from the pool of this message type
+        :return: A message with the default field values
+        '''
+        return cls._meta.get_pool().acquire()
+
+    def release(self):
+        ''' Hand this message back to the pool of its message type
+        '''
+        self._meta.get_pool().release(self)
+
+    def __reduce_ex__(self, protocol):
+        ''' Reduce the message to its type and field values for pickle
+        :param protocol: The pickle protocol in use
+        :return: The pickle reduction of the message
+
+        Instead of the class path and instance dictionary, a message is
+        pickled as its registered type id (or encoded name) and a tuple
+        of its field values.  If that key does not lead back to this
+        message type alone (say it was never registered, or its class name
+        is shared), the type itself is pickled instead.
         '''
-        field_iter = iter(self._meta.fields)
-        for field in field_iter:
-            setattr(self, field.name, field.value)
+        options = self._meta
+        key = options.type_id if options.type_id is not None else options.encoded_name
+        try:
+            if registry.get_message(key) is not self.__class__:
+                key = self.__class__
+        except ConfigurationException: # a class name shared by many messages
+            key = self.__class__
+        values = options.get_layout().values(self)
+        return (_restore_message, (key, values))
 
     def _message_size(self):
         ''' Return the total size of the message
         :return: The total message size in bytes
         '''
-        return sum([i.size for i in self._meta.fields])
+        return self._meta.get_layout().size
 
     def _serialize(self, method):
         ''' Serialize this message object into a message string
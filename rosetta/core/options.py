@@ -8,8 +8,13 @@ for a message.
 We should probobly set the groundwork now for doing inheritable
 messages, but we need to get the base stuff right first.
 '''
+import struct
 from bisect import bisect
-from rosetta.core.exceptions import FieldDoesNotExist
+from operator import attrgetter
+from rosetta.core.exceptions import FieldDoesNotExist, ConfigurationException
+from rosetta.core.codec import compile_codec, get_field_offsets
+from rosetta.core.view import compile_view
+from rosetta.core.pool import MessagePool
 
 #---------------------------------------------------------------------------# 
 # Logger
@@ -21,7 +26,8 @@ _logger = logging.getLogger('rosetta.core.options')
 # Allowed Meta Values 
 #--------------------------------------------------------------------------------#
 DEFAULT_NAMES = (
-    'verbose_name', 'encoded_name', 'total_size'
+    'verbose_name', 'encoded_name', 'total_size', 'byte_order',
+    'use_slots', 'type_id', 'app_label',
 )
 
 class Options(object):
@@ -32,6 +38,12 @@ class Options(object):
         '''
         self.local_fields = []
         self.meta = meta
+        self.byte_order = '!'
+        self.use_slots = False
+        self.encoded_name = None
+        self.implicit_name = False
+        self.type_id = None
+        self.app_label = None
 
     def contribute_to_class(self, cls, name):
         ''' ...hello...
@@ -39,6 +51,7 @@ class Options(object):
         :param name: The attribute to add
         '''
         cls._meta = self
+        self.message = cls
         self.object_name = cls.__name__
         self.module_name = self.object_name.lower()
 
@@ -51,6 +64,16 @@ class Options(object):
                 elif hasattr(self.meta, attr_name): # I don't know why this is done
                     setattr(self, attr_name, getattr(self.meta, attr_name))
 
+        # the class name is used on the wire unless told otherwise
+        if not self.encoded_name:
+            self.encoded_name = self.object_name
+            self.implicit_name = True
+
+        # like django, the app label defaults to the containing package
+        if not self.app_label:
+            parts = cls.__module__.split('.')
+            self.app_label = parts[-2] if len(parts) > 1 else parts[0]
+
     def add_field(self, field):
         ''' Appends a field to the field collection
         We use the order column to insert the fields in the correct
@@ -60,8 +83,9 @@ class Options(object):
         '''
         self.local_fields.insert(bisect(self.local_fields, field), field)
         # invalidate the cache
-        if hasattr(self, '_name_map'):
-            del self._name_map
+        for cache in ('_layout', '_codec', '_view'):
+            if hasattr(self, cache):
+                delattr(self, cache)
 
     def _fields(self):
         ''' Returns the list of fields
@@ -72,47 +96,218 @@ class Options(object):
 
     fields = property(_fields)
 
+    def get_layout(self):
+        ''' Returns the layout descriptor of the message
+        :return: The message layout
+
+        Uses a cache internally, so after the first access, this is very fast.
+        '''
+        try:
+            return self._layout
+        except AttributeError:
+            self._layout = Layout(self)
+            return self._layout
+
+    layout = property(get_layout)
+
+    def _info(self):
+        ''' Returns the information record supplied to the formats
+        :return: The prebuilt (read only) information record
+        '''
+        return self.get_layout().info
+
+    info = property(_info)
+
     def get_field(self, name):
         ''' Returns the requested field
         :param name: The field name to retrieve
         :return: The requested field or Exception if field does not exist
         '''
-        for field in self.fields:
-            if field.name == name:
-                return field
-        raise FieldDoesNotExist('no field named %s' % name)
+        try:
+            return self.get_layout().by_name[name]
+        except KeyError:
+            raise FieldDoesNotExist('no field named %s' % name)
 
     def get_field_by_name(self, name):
         ''' Returns a field by its print name.
         :param name: The field to retrieve
         :return: The requested field
 
+        Uses a cache internally, so after the first access, this is very fast.
+        '''
+        return self.get_field(name)
+
+    def get_field_by_encoded_name(self, name):
+        ''' Returns a field by its encoded name.
+        :param name: The encoded field name to retrieve
+        :return: The requested field
+
         Uses a cache internally, so after the first access, this is very fast.
         '''
         try:
-            try:
-                return self._name_map[name]
-            except AttributeError:
-                cache = self.init_name_map()
-                return cache[name]
+            return self.get_layout().by_encoded_name[name]
         except KeyError:
-            raise FieldDoesNotExist('has no field named %s' % (name))
+            raise FieldDoesNotExist('has no field encoded as %s' % (name))
 
     def get_all_field_names(self):
         ''' Return a list of all the field print names
         :return: List of all the field names
         '''
+        return list(self.get_layout().names)
+
+    def get_codec(self):
+        ''' Returns the compiled binary codec for the message
+        :return: The compiled codec
+
+        The codec is compiled on first use and cached, so after the
+        first access, this is very fast.
+        '''
         try:
-            cache = self._name_map
+            return self._codec
         except AttributeError:
-            cache = self.init_name_map()
-        names = cache
-        names.sort()
-        return names
+            self._codec = compile_codec(self)
+            return self._codec
+
+    def get_pool(self):
+        ''' Returns the pool of reusable instances of the message
+        :return: The message pool
 
-    def init_name_map(self):
-        ''' Initalizes the field print name lookup
-        :return: The built name cache
+        The pool is created on first use and lives as long as the
+        message type.
         '''
-        self._name_map = [f.name for f in self._fields()]
-        return self._name_map
+        try:
+            return self._pool
+        except AttributeError:
+            self._pool = MessagePool(self.message)
+            return self._pool
+
+    def get_view_class(self):
+        ''' Returns the lazy view class for the message
+        :return: The generated view class
+
+        The view class is generated on first use and cached, so after
+        the first access, this is very fast.
+        '''
+        try:
+            return self._view
+        except AttributeError:
+            self._view = compile_view(self)
+            return self._view
+
+#--------------------------------------------------------------------------------#
+# Layout Descriptor
+#--------------------------------------------------------------------------------#
+def _build_getter(names):
+    ''' Build a function returning a tuple of the named attributes
+    :param names: The attribute names to retrieve
+    :return: getter(instance) -> tuple of values
+    '''
+    if not names:
+        return lambda instance: ()
+    if len(names) == 1:
+        getter = attrgetter(names[0])
+        return lambda instance: (getter(instance),)
+    return attrgetter(*names)
+
+def _build_factory(field):
+    ''' Build a function returning a new initial value of a field
+    :param field: The repeated (or callable default) field
+    :return: factory() -> the new initial value
+
+    A repeated field copies a prebuilt default container, which is much
+    cheaper than building one through the field every time.
+    '''
+    if not field.repeated:
+        return field.get_default
+    template = field.get_default()
+    if isinstance(template, list):
+        return lambda: list(template)
+    return template.__copy__
+
+class FrozenDict(dict):
+    ''' A dictionary that cannot be changed once it is built
+
+    Lookups are those of a plain dictionary; use ``dict(frozen)`` to
+    get a copy that can be changed.
+    '''
+
+    def _exception(self, *args, **kwargs):
+        ''' Helper to block writing to the dictionary
+        '''
+        raise AttributeError('Cannot Modify Layout')
+
+    __setitem__ = __delitem__ = _exception
+    clear = pop = popitem = setdefault = update = _exception
+    __reduce__ = lambda s: (s.__class__, (dict(s),))
+
+class Layout(object):
+    ''' The frozen layout descriptor of a message
+
+    This is built once per message type (the first time it is requested)
+    and is shared by every encoder and decoder of that type, so every
+    map it holds is a read only FrozenDict:
+
+    :param fields: The ordered tuple of fields
+    :param field_names: The ordered tuple of field names
+    :param names: The sorted tuple of field names
+    :param by_name: A map of field name to field
+    :param by_encoded_name: A map of field encoded name to field
+    :param index: A map of field name to its position in the fields
+    :param offsets: A map of field name to its byte offset in the record
+    :param size: The total size of the encoded message in bytes
+    :param info: The prebuilt information record supplied to the formats
+    :param values: values(message) -> tuple of the field values in order
+    :param defaults: A map of field name to the initial value shared by every message
+    :param factories: The (field name, get_default) of the fields that need
+                      a new initial value per message (repeated or callable)
+    :param containers: The names of the fields holding a container of values
+    '''
+    __slots__ = ('fields', 'field_names', 'names', 'by_name', 'by_encoded_name',
+        'index', 'offsets', 'size', 'info', 'values', 'defaults', 'factories',
+        'containers')
+
+    def __init__(self, options):
+        ''' Initialize a new instance
+        :param options: The message options to describe
+        '''
+        fields, offsets, offset = tuple(options.fields), {}, 0
+        try:
+            for field, code, _, _, offset in get_field_offsets(options):
+                offsets[field.name] = offset
+            if fields:
+                offset += struct.calcsize(options.byte_order + code)
+        except ConfigurationException:
+            offsets, offset = {}, 0 # not a binary layout, use the field sizes
+            for field in fields:
+                offsets[field.name] = offset
+                offset += field.size
+        size = getattr(options, 'total_size', None) or offset
+
+        build = lambda name, value: object.__setattr__(self, name, value)
+        build('fields', fields)
+        build('field_names', tuple([f.name for f in fields]))
+        build('names', tuple(sorted([f.name for f in fields])))
+        build('by_name', FrozenDict([(f.name, f) for f in fields]))
+        build('by_encoded_name', FrozenDict([(f.encoded_name, f) for f in fields]))
+        build('index', FrozenDict([(f.name, i) for i, f in enumerate(fields)]))
+        build('offsets', FrozenDict(offsets))
+        build('size', size)
+        build('info', FrozenDict({
+            'size'        : size,
+            'name'        : getattr(options, 'encoded_name', None),
+            'field_count' : len(fields),
+        }))
+        build('values', _build_getter(self.field_names))
+        build('defaults', FrozenDict([(f.name, f.value) for f in fields
+            if not (f.repeated or callable(f.value))]))
+        build('factories', tuple([(f.name, _build_factory(f)) for f in fields
+            if f.repeated or callable(f.value)]))
+        build('containers', tuple([f.name for f in fields if f.repeated]))
+
+    def _exception(self):
+        ''' Helper to block writing to the layout
+        '''
+        raise AttributeError('Cannot Modify Layout')
+
+    __setattr__ = lambda s, k, v: s._exception()
+    __delattr__ = lambda s, k: s._exception()
@@ -0,0 +1,152 @@
+'''
+Message Pools
+-------------
+
+A decode loop that creates a new message for every record churns
+through millions of short lived objects, which costs allocations and
+(worse) garbage collector pauses.  Instead, the messages of a type can
+be taken from and handed back to a free list::
+
+    pool = ExampleMessage._meta.get_pool()
+    message = codec.unpack_from(buffer, offset, pool.acquire())
+    handle(message)
+    pool.release(message)
+
+or through the shortcuts on the message itself::
+
+    message = ExampleMessage.acquire()
+    message.release()
+
+A released message is reset to the default values of its fields from
+the precomputed template of the message layout (a single dictionary
+update for messages that are not slotted), so an acquired message always
+looks like a newly created one.  A decode loop that assigns every field
+of the messages it acquires can skip the reset with
+``pool.release(message, reset=False)``.  The pool only keeps up to ``limit``
+free messages; anything released past that is left to the garbage
+collector.
+
+Releasing a message that is already in the pool, or a message of
+another type, raises a :class:`ConfigurationException` rather than
+handing the same message out twice (or the wrong type at all).
+'''
+from rosetta.core.exceptions import ConfigurationException
+
+#---------------------------------------------------------------------------#
+# Logger
+#---------------------------------------------------------------------------#
+import logging
+_logger = logging.getLogger('rosetta.core.pool')
+
+#---------------------------------------------------------------------------#
+# Helpers
+#---------------------------------------------------------------------------#
+def reset_message(message):
+    ''' Restore the default value of every field of a message
+    :param message: The message to reset
+    :return: The reset message
+    '''
+    options = message._meta
+    layout = options.get_layout()
+    if options.use_slots:
+        for name, value in layout.defaults.iteritems():
+            setattr(message, name, value)
+    else: message.__dict__.update(layout.defaults)
+    for name, factory in layout.factories:
+        setattr(message, name, factory())
+    return message
+
+def get_default(layout, name):
+    ''' Retrieve the value reset_message gives a single field
+    :param layout: The layout of the message type
+    :param name: The name of the field
+    :return: The shared default value (or a new initial value for the
+             fields that get one per message)
+    '''
+    if name in layout.defaults:
+        return layout.defaults[name]
+    return dict(layout.factories)[name]()
+
+#---------------------------------------------------------------------------#
+# Pool
+#---------------------------------------------------------------------------#
+class MessagePool(object):
+    ''' A free list of reusable instances of a single message type
+
+    :param message: The message type of the pooled instances
+    :param limit: The largest number of free instances to keep
+    :param free: The list of free instances
+    :param pooled: The ids of the free instances
+    '''
+
+    def __init__(self, message, size=0, limit=1024):
+        ''' Initialize a new instance
+        :param message: The message type of the pooled instances
+        :param size: The number of instances to create up front
+        :param limit: The largest number of free instances to keep
+        '''
+        self.message = message
+        self.limit = limit
+        self.free = [self.create() for _ in xrange(size)]
+        self.pooled = set([id(message) for message in self.free])
+
+    def create(self):
+        ''' Create a new instance from the default template
+        :return: The new message
+        '''
+        return reset_message(object.__new__(self.message))
+
+    def acquire(self):
+        ''' Retrieve a message with the default field values
+        :return: A free message (or a new one if there are none)
+        '''
+        try:
+            message = self.free.pop()
+        except IndexError:
+            return self.create()
+        self.pooled.discard(id(message))
+        return message
+
+    def release(self, message, reset=True):
+        ''' Hand a message back to the pool
+        :param message: The message that is no longer used
+        :param reset: False to skip restoring the defaults
+
+        The message must not be used by the caller after it has
+        been released.  The reset can be skipped when every acquired
+        message is decoded into (which assigns every field anyway).
+        '''
+        if message.__class__ is not self.message:
+            raise ConfigurationException('cannot release a %s to the pool of %s'
+                % (message.__class__.__name__, self.message.__name__))
+        key = id(message)
+        if key in self.pooled:
+            raise ConfigurationException('%s was released twice'
+                % self.message.__name__)
+        free = self.free
+        if len(free) < self.limit:
+            if reset: reset_message(message)
+            free.append(message)
+            self.pooled.add(key)
+
+    def release_many(self, messages, reset=True):
+        ''' Hand many messages back to the pool
+        :param messages: The messages that are no longer used
+        :param reset: False to skip restoring the defaults
+        '''
+        for message in messages:
+            self.release(message, reset)
+
+    def clear(self):
+        ''' Drop every free message
+        '''
+        del self.free[:]
+        self.pooled.clear()
+
+    def __len__(self):
+        return len(self.free)
+
+#---------------------------------------------------------------------------#
+# Exported Symbols
+#---------------------------------------------------------------------------#
+__all__ = ( 'MessagePool', 'reset_message', 'get_default' )
@@ -0,0 +1,109 @@
+'''
+Lazy Message Views
+------------------
+
+When routing or filtering a stream of binary records, we usually only
+need one or two fields (the type, the symbol, the account) before the
+original bytes are forwarded.  Decoding the full message for that is a
+waste, so instead a view can be wrapped around the receive buffer::
+
+    view = ExampleMessage._meta.get_view_class()(buffer, offset)
+    if view.symbol == 'IBM':
+        forward(view.raw())
+
+A view decodes a field only when that attribute is read, using the
+record offset of the field in the compiled codec layout.  Nothing is
+copied out of the buffer until then, and the full message can still
+be materialized with ``to_message``.
+
+The view class is generated per message type and holds a read only
+property for each field.
+'''
+import struct
+from rosetta.core.codec import get_field_offsets, get_field_helper
+
+#---------------------------------------------------------------------------#
+# Logger
+#---------------------------------------------------------------------------#
+import logging
+_logger = logging.getLogger('rosetta.core.view')
+
+#---------------------------------------------------------------------------#
+# View
+#---------------------------------------------------------------------------#
+class MessageView(object):
+    ''' Base class of the generated message views
+
+    :param buffer: The buffer holding the encoded record
+    :param offset: The offset of the record in the buffer
+    '''
+    __slots__ = ('_buffer', '_offset')
+    _codec = None
+
+    def __init__(self, buffer, offset=0):
+        ''' Initialize a new instance
+        :param buffer: The buffer (memoryview, bytearray, string) to wrap
+        :param offset: The offset of the record in the buffer
+        '''
+        self._buffer = buffer
+        self._offset = offset
+
+    def rebind(self, buffer, offset=0):
+        ''' Point this view at another record
+        :param buffer: The buffer holding the new record
+        :param offset: The offset of the new record in the buffer
+        :return: This view
+        '''
+        self._buffer = buffer
+        self._offset = offset
+        return self
+
+    def raw(self):
+        ''' Retrieve the encoded record this view wraps
+        :return: A memoryview of the record (no copy is made)
+        '''
+        buffer = self._buffer
+        if not isinstance(buffer, memoryview):
+            buffer = memoryview(buffer)
+        return buffer[self._offset:self._offset + self._codec.size]
+
+    def to_message(self, message=None):
+        ''' Decode the full message from the record
+        :param message: An optional message instance to decode into
+        :return: The decoded message
+        '''
+        return self._codec.unpack_from(self._buffer, self._offset, message)
+
+def compile_view(options):
+    ''' Builds the view class for the supplied message options
+    :param options: The options of the message to build a view for
+    :return: The generated view class
+    '''
+    namespace, source, getters = {}, [], {}
+    for index, (field, code, _, decode, offset) in enumerate(get_field_offsets(options)):
+        if decode is None: continue # padding has nothing to read
+        getter = '_get_%s' % field.name
+        reader = '_r%d' % index
+        namespace[reader] = struct.Struct(options.byte_order + code).unpack_from
+        value  = '%s(self._buffer, self._offset + %d)[0]' % (reader, offset)
+        helper = get_field_helper(field, options.byte_order)
+        if helper is not None:
+            namespace['_h%d' % index] = helper
+            decode = decode.replace('%h', '_h%d' % index)
+        source.extend([
+            'def %s(self):' % getter,
+            '    return %s' % decode.replace('%s', value),
+        ])
+        getters[field.name] = getter
+
+    code = compile('\n'.join(source) + '\n', '<view %s>' % options.object_name, 'exec')
+    exec code in namespace
+    attrs = dict([(name, property(namespace[getter])) for name, getter in getters.items()])
+    attrs.update({ '__slots__':(), '_codec':options.get_codec(), '_meta':options,
+        '__module__':options.message.__module__ })
+    return type('%sView' % options.object_name, (MessageView,), attrs)
+
+#---------------------------------------------------------------------------#
+# Exported Symbols
+#---------------------------------------------------------------------------#
+__all__ = ( 'MessageView', 'compile_view' )
@@ -1,6 +1,144 @@
 '''
+Message Formats
+---------------
+
+Each format lives in its own module and usually depends on a third
+party library (simplejson, lxml, yaml).  Importing all of them up
+front means paying for libraries that most processes never use, so
+the formats are kept in a registry instead and a format module is only
+imported the first time it is requested::
+
+    from rosetta import format
+    serializer = format.get_format('json')
+    text = serializer.serialize(message)
+
+The formats that can be used in the current environment can be listed
+without importing any of them (or their libraries)::
+
+    format.available_formats()
+
+New formats can be added with :func:`register_format`.
+
+Every serialize and deserialize of the formats can be timed and counted
+by handing a :class:`rosetta.format.base.FormatStats` to
+:func:`set_stats`; from then on :func:`get_format` returns the
+serializers wrapped so that they record to it.
+
 .. todo::
-   
+
    cover the major cases and maybe a few more.
    Leave rest in contrib
 '''
+import pkgutil
+import threading
+from rosetta.core.exceptions import ConfigurationException
+from rosetta.format.base import InstrumentedSerializer
+
+#---------------------------------------------------------------------------#
+# Logger
+#---------------------------------------------------------------------------#
+import logging
+_logger = logging.getLogger('rosetta.format')
+
+#---------------------------------------------------------------------------#
+# Format Registry
+#---------------------------------------------------------------------------#
+# name -> (module path, serializer name, modules the format requires)
+#---------------------------------------------------------------------------#
+_formats = {
+    'binary' : ('rosetta.format.binary', 'BinarySerializer', ()),
+    'json'   : ('rosetta.format.json',   'JsonSerializer',   ()),
+    'pickle' : ('rosetta.format.pickle', 'PickleSerializer', ()),
+    'soap'   : ('rosetta.format.soap',   'SoapSerializer',   ('yaml',)),
+    'xml'    : ('rosetta.format.xml',    'XmlSerializer',    ()),
+    'yaml'   : ('rosetta.format.yaml',   'YamlSerializer',   ('yaml',)),
+}
+_loaded = {}
+_lock = threading.Lock()
+_stats = None
+
+def register_format(name, module, serializer, requires=()):
+    ''' Add a format to the registry
+    :param name: The name to register the format as
+    :param module: The fully qualified module holding the format
+    :param serializer: The name of the serializer in the module
+    :param requires: The top level modules the format depends on
+    '''
+    _formats[name] = (module, serializer, tuple(requires))
+    _loaded.pop(name, None)
+
+def set_stats(stats):
+    ''' Record every serialize and deserialize of the formats
+    :param stats: The FormatStats to record to (or None to stop)
+
+    Only the serializers retrieved with get_format after this call
+    record to the stats.
+    '''
+    global _stats
+    _stats = stats
+
+def get_format(name):
+    ''' Retrieve a format serializer, importing it if needed
+    :param name: The name of the format to retrieve
+    :return: The format serializer (instrumented if stats are set)
+    '''
+    try:
+        serializer = _loaded[name]
+    except KeyError:
+        serializer = _load_format(name)
+    if _stats is None:
+        return serializer
+    return InstrumentedSerializer(name, serializer, _stats)
+
+def _load_format(name):
+    ''' Helper to import a format serializer
+    :param name: The name of the format to import
+    :return: The format serializer
+    '''
+    try:
+        module, serializer, _ = _formats[name]
+    except KeyError:
+        raise ConfigurationException('unknown format %s' % name)
+    _lock.acquire()
+    try:
+        if name not in _loaded:
+            handle = __import__(module, {}, {}, [serializer])
+            _loaded[name] = getattr(handle, serializer)
+            _logger.debug('loaded format %s from %s' % (name, module))
+        return _loaded[name]
+    finally:
+        _lock.release()
+
+def is_available(name):
+    ''' Check if a format can be used without importing it
+    :param name: The name of the format to check
+    :return: True if the format and its requirements can be found
+    '''
+    if name in _loaded:
+        return True
+    if name not in _formats:
+        return False
+    for requirement in _formats[name][2]:
+        if pkgutil.find_loader(requirement) is None:
+            return False
+    return True
+
+def available_formats():
+    ''' Returns the names of the formats usable in this environment
+    :return: The sorted list of format names
+    '''
+    return sorted([name for name in _formats if is_available(name)])
+
+def registered_formats():
+    ''' Returns the names of every registered format
+    :return: The sorted list of format names
+    '''
+    return sorted(_formats.keys())
+
+#---------------------------------------------------------------------------#
+# Exported Symbols
+#---------------------------------------------------------------------------#
+__all__ = (
+    'register_format', 'get_format', 'set_stats', 'is_available',
+    'available_formats', 'registered_formats',
+)
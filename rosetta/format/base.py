@@ -16,7 +16,381 @@ and a deserialize static methods that operate on a message and
 a serialized message respectively.  Note, the deserialize _must_
 be able to reconstuct the given message from the serialize dump!
 '''
-from rosetta.core.exceptions import NotImplementedException
+from timeit import default_timer as timer
+from rosetta.core.exceptions import NotImplementedException, EncodeException
+from rosetta.core.exceptions import DecodeException
+from rosetta.core.pool import reset_message, get_default
+
+#---------------------------------------------------------------------------#
+# Instrumentation
+#---------------------------------------------------------------------------#
+class FormatStats(object):
+    '''
+    Collects per phase timings, message counts and byte counts of the
+    formats, keyed by (format, message encoded name).
+
+    Instrumentation is opt-in; once the stats are handed to the format
+    registry, every serializer it returns records each call under the
+    phase of its path:
+
+    * ``encode`` and ``decode`` - serialize and deserialize
+    * ``pack`` and ``unpack`` - the zero copy pack_into and unpack_from
+    * ``encode_many`` - serialize_many and pack_many_into
+    * ``decode_many`` - deserialize_many and iterparse
+
+    For example::
+
+        stats = FormatStats()
+        format.set_stats(stats)
+        format.get_format('json').serialize(message)
+        print stats.snapshot()
+
+    When disabled, the registry hands out the serializers themselves, so
+    there is no cost at all.
+    '''
+
+    def __init__(self):
+        ''' Initializes a new instance
+        '''
+        self.entries = {}
+
+    def record(self, format, message, size, phases, count=1):
+        ''' Record one or more encodes or decodes
+        :param format: The name of the format
+        :param message: The encoded name of the message
+        :param size: The size of the encoded messages in bytes
+        :param phases: A sequence of (phase name, seconds)
+        :param count: The number of messages recorded
+        '''
+        key = (format, message)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = { 'count':0, 'bytes':0, 'phases':{} }
+        entry['count'] += count
+        entry['bytes'] += size
+        timings = entry['phases']
+        for phase, elapsed in phases:
+            timings[phase] = timings.get(phase, 0.0) + elapsed
+
+    def snapshot(self):
+        ''' Return a copy of the collected statistics
+        :return: A map of (format, message) to its statistics
+        '''
+        result = {}
+        for key, entry in self.entries.items():
+            result[key] = { 'count':entry['count'], 'bytes':entry['bytes'],
+                'phases':dict(entry['phases']) }
+        return result
+
+    def reset(self):
+        ''' Clear all of the collected statistics
+        '''
+        self.entries = {}
+
+def _get_size(data):
+    ''' Helper to find the size of encoded data
+    :param data: The encoded data
+    :return: The size in bytes (or 0 if it has none, like a stream)
+    '''
+    try:
+        return len(data)
+    except TypeError:
+        return 0
+
+def _get_name(message):
+    ''' Helper to find the name a message is recorded under
+    :param message: The message (or other decoded value) to name
+    :return: The encoded name of a message, otherwise its type name
+    '''
+    meta = getattr(message, '_meta', None)
+    return getattr(meta, 'encoded_name', None) or type(message).__name__
+
+class InstrumentedSerializer(object):
+    '''
+    Wraps a registered serializer so that every encode and decode path
+    (single, zero copy and bulk) is recorded to a FormatStats.  Everything
+    else is handed straight to the wrapped serializer.
+
+    The bulk encodes are timed as a whole and shared out evenly between
+    the messages of the call.  The streamed decodes are timed one message
+    at a time as they are consumed; as the size of each streamed record is
+    not known, they add no bytes.
+
+    :param name: The registered name of the format
+    :param serializer: The wrapped serializer
+    :param stats: The FormatStats to record to
+    '''
+
+    def __init__(self, name, serializer, stats):
+        ''' Initializes a new instance
+        :param name: The registered name of the format
+        :param serializer: The serializer to wrap
+        :param stats: The FormatStats to record to
+        '''
+        self.name = name
+        self.serializer = serializer
+        self.stats = stats
+
+    def _record(self, message, size, phase, elapsed):
+        ''' Record a single call for a message
+        :param message: The message that was encoded or decoded
+        :param size: The size of the encoded message in bytes
+        :param phase: The name of the phase
+        :param elapsed: The seconds the call took
+        '''
+        self.stats.record(self.name, _get_name(message), size,
+            ((phase, elapsed),))
+
+    def _record_many(self, messages, size, phase, elapsed):
+        ''' Share a bulk call out between its messages
+        :param messages: The list of messages of the call
+        :param size: The size of all the encoded messages in bytes
+        :param phase: The name of the phase
+        :param elapsed: The seconds the whole call took
+        '''
+        if not messages: return
+        groups = {}
+        for message in messages:
+            name = _get_name(message)
+            groups[name] = groups.get(name, 0) + 1
+        total = float(len(messages))
+        for name, count in groups.items():
+            share = count / total
+            self.stats.record(self.name, name, int(size * share),
+                ((phase, elapsed * share),), count)
+
+    def _record_stream(self, phase, stream):
+        ''' Time each message of a stream as it is consumed
+        :param phase: The name of the phase
+        :param stream: The iterable of decoded messages
+        :return: A generator of the decoded messages
+        '''
+        stream = iter(stream)
+        while True:
+            start = timer()
+            try:
+                message = next(stream)
+            except StopIteration:
+                return
+            self._record(message, 0, phase, timer() - start)
+            yield message
+
+    def serialize(self, input, *args, **kwargs):
+        ''' Serialize a message and record it
+        :param input: The message to serialize
+        :return: The serialized message
+        '''
+        start = timer()
+        result = self.serializer.serialize(input, *args, **kwargs)
+        self._record(input, _get_size(result), 'encode', timer() - start)
+        return result
+
+    def deserialize(self, input, *args, **kwargs):
+        ''' Deserialize a message and record it
+        :param input: The serialized message
+        :return: The decoded message
+        '''
+        start = timer()
+        result = self.serializer.deserialize(input, *args, **kwargs)
+        self._record(result, _get_size(input), 'decode', timer() - start)
+        return result
+
+    def pack_into(self, input, buffer, offset=0, *args, **kwargs):
+        ''' Pack a message into a buffer and record it
+        :param input: The message to serialize
+        :param buffer: The buffer to write to
+        :param offset: The offset in the buffer to write at
+        :return: The offset directly after the written record
+        '''
+        start = timer()
+        result = self.serializer.pack_into(input, buffer, offset, *args, **kwargs)
+        self._record(input, result - offset, 'pack', timer() - start)
+        return result
+
+    def unpack_from(self, handle, buffer, *args, **kwargs):
+        ''' Unpack a message from a buffer and record it
+        :param handle: The message type to decode to
+        :param buffer: The buffer to read from
+        :return: The decoded message
+        '''
+        start = timer()
+        result = self.serializer.unpack_from(handle, buffer, *args, **kwargs)
+        self._record(result, 0, 'unpack', timer() - start)
+        return result
+
+    def serialize_many(self, input, *args, **kwargs):
+        ''' Serialize many messages and record them
+        :param input: The iterable of messages to serialize
+        :return: The result of the wrapped serializer
+        '''
+        messages = list(input)
+        start = timer()
+        result = self.serializer.serialize_many(messages, *args, **kwargs)
+        self._record_many(messages, _get_size(result), 'encode_many',
+            timer() - start)
+        return result
+
+    def pack_many_into(self, input, buffer, offset=0, *args, **kwargs):
+        ''' Pack many messages into a buffer and record them
+        :param input: The iterable of messages to serialize
+        :param buffer: The buffer to write to
+        :param offset: The offset in the buffer to start writing at
+        :return: The offset directly after the last written record
+        '''
+        messages = list(input)
+        start = timer()
+        result = self.serializer.pack_many_into(messages, buffer, offset,
+            *args, **kwargs)
+        self._record_many(messages, result - offset, 'encode_many',
+            timer() - start)
+        return result
+
+    def deserialize_many(self, *args, **kwargs):
+        ''' Deserialize many messages, recording each as it is read
+        :return: A generator of the decoded messages
+        '''
+        return self._record_stream('decode_many',
+            self.serializer.deserialize_many(*args, **kwargs))
+
+    def iterparse(self, *args, **kwargs):
+        ''' Stream the messages out of a document, recording each
+        :return: A generator of the decoded messages
+        '''
+        return self._record_stream('decode_many',
+            self.serializer.iterparse(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self.serializer, name)
+
+#---------------------------------------------------------------------------#
+# Converter Tables
+#---------------------------------------------------------------------------#
+def enum_converters(field):
+    ''' Build the converters of an enum field
+    :param field: The enum field to convert
+    :return: The (encode, decode) pair of the field
+
+    A value is written as its name.  Either its name or its value (as
+    a number or as the text of the number) is read back.  A value that
+    is not in the enumeration raises an EncodeException on encode and a
+    DecodeException on decode.
+    '''
+    names, values = field.enum.values, dict(field.enum.names)
+    values.update([(v, v) for v in names])
+    values.update([(str(v), v) for v in names])
+
+    def encode(value):
+        try:
+            return names[value]
+        except (KeyError, TypeError):
+            raise EncodeException('%r is not a value of the enum of field %s'
+                % (value, field.name))
+
+    def decode(value):
+        try:
+            return values[value]
+        except (KeyError, TypeError):
+            raise DecodeException('%r is not a value of the enum of field %s'
+                % (value, field.name))
+    return (encode, decode)
+
+class ConverterTable(object):
+    '''
+    The converters of every field of a single message type, for a text
+    format that writes one value per field.
+
+    :param message: The message type of the table
+    :param layout: The message layout the table was built from
+    :param name: The key of the message (see ConverterTables)
+    :param encoders: A list of (key, field name, encode, optional, default)
+                     in field order, where optional fields are skipped when
+                     they hold their default value
+    :param decoders: A map of field encoded name to (field name, decode)
+    '''
+    __slots__ = ('message', 'layout', 'name', 'encoders', 'decoders')
+
+    def __init__(self, message, layout, name):
+        ''' Initialize a new (empty) instance
+        :param message: The message type of the table
+        :param layout: The message layout the table is built from
+        :param name: The key of the message
+        '''
+        self.message, self.layout, self.name = message, layout, name
+        self.encoders, self.decoders = [], {}
+
+    def create(self):
+        ''' Create a message holding the default value of every field
+        :return: The new message (see rosetta.core.pool.reset_message)
+        '''
+        return reset_message(object.__new__(self.message))
+
+class ConverterTables(object):
+    '''
+    Builds (once per message type) and caches the converter tables of a
+    text format.  The format only supplies how it converts values::
+
+        tables = ConverterTables(data_types, default_type, repeated_type)
+        table  = tables.get_table(ExampleMessage)
+
+    :param data_types: A map of field type name to the (encode, decode)
+                       pair of a single value
+    :param default_type: The (encode, decode) pair of the other types
+    :param repeated: repeated(field, (encode, decode)) -> the (encode,
+                     decode) pair of a repeated field
+    :param key: key(encoded name) -> the key the format writes for a
+                message or field (the encoded name by default)
+    '''
+
+    def __init__(self, data_types, default_type, repeated, key=None):
+        ''' Initialize a new instance
+        :param data_types: The converters of each field type
+        :param default_type: The converters of the other field types
+        :param repeated: Builds the converters of a repeated field
+        :param key: Builds the key of a message or field
+        '''
+        self.data_types = data_types
+        self.default_type = default_type
+        self.repeated = repeated
+        self.key = key or (lambda name: name)
+        self.tables = {}
+
+    def get_converters(self, field):
+        ''' Retrieve the converters of a single field
+        :param field: The field to retrieve the converters of
+        :return: The (encode, decode) pair of the field
+        '''
+        converters = self.data_types.get(field.get_type_name(), self.default_type)
+        if field.get_type_name() == 'enum':
+            converters = enum_converters(field)
+        if field.repeated:
+            converters = self.repeated(field, converters)
+        return converters
+
+    def get_table(self, message):
+        ''' Retrieve the converter table of a message type
+        :param message: The message type to retrieve the table for
+        :return: The ConverterTable of the message
+        '''
+        layout = message._meta.get_layout()
+        table = self.tables.get(message)
+        if table is None or table.layout is not layout:
+            table = self.tables[message] = self.build(message, layout)
+        return table
+
+    def build(self, message, layout):
+        ''' Build the converter table of a message type
+        :param message: The message type to build the table for
+        :param layout: The layout of the message type
+        :return: The built ConverterTable
+        '''
+        table = ConverterTable(message, layout, self.key(message._meta.encoded_name))
+        for field in layout.fields:
+            encode, decode = self.get_converters(field)
+            table.encoders.append((self.key(field.encoded_name), field.name, encode,
+                field.optional, get_default(layout, field.name)))
+            table.decoders[field.encoded_name] = (field.name, decode)
+        return table
+
 
 class Encoder(object):
     '''
@@ -36,11 +410,16 @@ class Encoder(object):
         This is a bit risky and really not all that great of design
         '''
         description = self._create_information(message)
-        message  = ''
-        message += self.build_header(description)
-        message += self.bulid_fields(message.fields)
-        message += self.build_trailer(description)
-        return message
+        return ''.join((self.build_header(description),
+            self.build_body(self._get_values(message)),
+            self.build_footer(description)))
+
+    def _get_values(self, message):
+        ''' Retrieve the field values of a message
+        :param message: The message to retrieve the values of
+        :return: A list of (field, value) in field order
+        '''
+        return [(field, getattr(message, field.name)) for field in message._meta.fields]
 
     def _create_information(self, message):
         ''' A simple factory to supply the format builder what it needs
@@ -48,13 +427,9 @@ class Encoder(object):
         underlying message instance, so instead, we send them the pertinant
         information.
 
-        ToDo, implement this in the message and cache?
+        This is prebuilt once per message type by its layout descriptor.
         '''
-        result = {}
-        result['size'] = message._message_size()
-        result['name'] = message._meta.encoded_name
-        result['field_count'] = len(message._meta.fields)
-        return result
+        return message._meta.get_layout().info
 
     def build_header(self, message):
         ''' Build the message header
@@ -65,6 +440,8 @@ class Encoder(object):
 
     def build_body(self, fields):
         ''' Build the message stream from the fields
+        :param fields: A list of (field, value) in field order
+        :return: The fully built message body
         '''
         raise NotImplementedException()
 
@@ -92,7 +469,7 @@ class Decoder(object):
         '''
         description = self._create_information(message)
         decode = self.decode_packet(description, packet)
-        fields = message._meta.get_all_field_names()
+        fields = message._meta.get_layout().by_name
         for key,value in decode.iteritems():
             if key in fields:
                 setattr(message, key, value)
@@ -111,13 +488,9 @@ class Decoder(object):
         underlying message instance, so instead, we send them the pertinant
         information.
 
-        ToDo, implement this in the message and cache?
+        This is prebuilt once per message type by its layout descriptor.
         '''
-        result = {}
-        result['size'] = message._message_size()
-        result['name'] = message._meta.encoded_name
-        result['field_count'] = len(message._meta.fields)
-        return result
+        return message._meta.get_layout().info
 
     #def create(module, type):
     #    ''' Dynamically import a type
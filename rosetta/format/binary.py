@@ -0,0 +1,198 @@
+'''
+Fixed Width Binary Serializer
+-----------------------------
+
+The field sizes (and the ``total_size`` Meta option) of a message
+describe a fixed width record.  This serializer encodes a message
+straight into that record using the compiled codec of the message
+type (see :mod:`rosetta.core.codec`).
+
+Along with the usual serialize/deserialize pair, the records can be
+packed directly into a caller supplied ``bytearray`` or ``memoryview``
+and unpacked from any buffer at a given offset.  This means that a
+stream of records can be written to and read from a single buffer
+without slicing it or building intermediate strings::
+
+    buffer = bytearray(size * len(messages))
+    offset = 0
+    for message in messages:
+        offset = BinarySerializer.pack_into(message, buffer, offset)
+
+The many-record methods work on one contiguous buffer of consecutive
+records (what ``serialize_many`` returns, or what a file or socket
+hands back).  A list of separately received packets (say, framed with
+:mod:`rosetta.protocol.framer`) is decoded with ``decode_many``; either
+way the codec of the message type is only looked up once::
+
+    buffer = BinarySerializer.serialize_many(messages)
+    for message in BinarySerializer.deserialize_many(buffer, ExampleMessage):
+        handle(message)
+
+    for message in BinarySerializer.decode_many(ExampleMessage, packets):
+        handle(message)
+
+Messages with optional fields are encoded as sparse records (the fixed
+fields, a presence bitmap, and the optional fields that are set) whose
+size varies, so the many-record methods walk them one at a time.
+'''
+
+class BinarySerializer:
+    '''
+    This class allows one to convert to and from
+    a message in an object representation and a
+    fixed width binary record.
+    '''
+
+    @staticmethod
+    def serialize(input):
+        ''' Convert a message to a binary record
+        :param input: The message to serialize
+        :return: The input serialized to a binary record
+        '''
+        return input._meta.get_codec().pack(input)
+
+    @staticmethod
+    def deserialize(input, handle):
+        ''' Convert a binary record back to a message
+        :param input: The serialized binary record
+        :param handle: The message type to decode to
+        :return: The initialized message
+        '''
+        return handle._meta.get_codec().unpack_from(input)
+
+    @staticmethod
+    def pack_into(input, buffer, offset=0):
+        ''' Encode a message directly into a writable buffer
+        :param input: The message to serialize
+        :param buffer: The bytearray or memoryview to write to
+        :param offset: The offset in the buffer to write at
+        :return: The offset directly after the written record
+        '''
+        return input._meta.get_codec().pack_into(buffer, offset, input)
+
+    @staticmethod
+    def unpack_from(handle, buffer, offset=0, message=None):
+        ''' Decode a message directly from a buffer
+        :param handle: The message type to decode to
+        :param buffer: The buffer to read from
+        :param offset: The offset in the buffer to read at
+        :param message: An optional message instance to decode into
+        :return: The decoded message
+        '''
+        return handle._meta.get_codec().unpack_from(buffer, offset, message)
+
+    @staticmethod
+    def serialize_many(input):
+        ''' Convert many messages to a single buffer of binary records
+        :param input: The iterable of messages to serialize
+        :return: A bytearray holding every record in order
+
+        The size of every fixed width record is known up front, so the
+        output is allocated once and every record is packed straight into it.
+        '''
+        messages = list(input)
+        codecs = [message._meta.get_codec() for message in messages]
+        if not all([codec.fixed for codec in codecs]):
+            return bytearray(''.join([codec.pack(message)
+                for message, codec in zip(messages, codecs)]))
+        buffer = bytearray(sum([codec.size for codec in codecs]))
+        BinarySerializer.pack_many_into(messages, buffer, 0, codecs)
+        return buffer
+
+    @staticmethod
+    def pack_many_into(input, buffer, offset=0, codecs=None):
+        ''' Encode many messages directly into a writable buffer
+        :param input: The iterable of messages to serialize
+        :param buffer: The bytearray or memoryview to write to
+        :param offset: The offset in the buffer to start writing at
+        :param codecs: The codecs of the messages (if already known)
+        :return: The offset directly after the last written record
+        '''
+        if codecs is None:
+            for message in input:
+                offset = message._meta.get_codec().pack_into(buffer, offset, message)
+            return offset
+        for message, codec in zip(input, codecs):
+            offset = codec.pack_into(buffer, offset, message)
+        return offset
+
+    @staticmethod
+    def deserialize_many(input, handle, offset=0, count=None, targets=None):
+        ''' Convert a buffer of binary records back to messages
+        :param input: The contiguous buffer of consecutive records (not a
+                      list of packets)
+        :param handle: The message type of the records
+        :param offset: The offset of the first record in the buffer
+        :param count: The number of records to decode (default all)
+        :param targets: An optional list of message instances to decode into
+        :return: A generator of the decoded messages
+        '''
+        codec = handle._meta.get_codec()
+        if not codec.fixed:
+            for message in BinarySerializer._deserialize_sparse(input, codec,
+                offset, count, targets):
+                yield message
+            return
+        unpack_from, size = codec.unpack_from, codec.size
+        if count is None:
+            count = (len(input) - offset) // size
+        if targets is None:
+            for index in xrange(count):
+                yield unpack_from(input, offset + index * size)
+        else:
+            for index in xrange(count):
+                yield unpack_from(input, offset + index * size, targets[index])
+
+    @staticmethod
+    def decode_many(message_cls, packets, targets=None):
+        ''' Convert many separate binary packets back to messages
+        :param message_cls: The message type of the packets
+        :param packets: The iterable of packets, one record each
+        :param targets: An optional list of message instances to decode into
+        :return: A generator of the decoded messages
+        '''
+        unpack_from = message_cls._meta.get_codec().unpack_from
+        if targets is None:
+            for packet in packets:
+                yield unpack_from(packet, 0)
+        else:
+            for packet, target in zip(packets, targets):
+                yield unpack_from(packet, 0, target)
+
+    @staticmethod
+    def _deserialize_sparse(input, codec, offset, count, targets):
+        ''' Helper to walk a buffer of sparse records
+        :param input: The buffer of consecutive records
+        :param codec: The codec of the records
+        :param offset: The offset of the first record in the buffer
+        :param count: The number of records to decode (default all)
+        :param targets: An optional list of message instances to decode into
+        :return: A generator of the decoded messages
+        '''
+        unpack_next, index, end = codec.unpack_next, 0, len(input)
+        while (offset < end) if count is None else (index < count):
+            target = targets[index] if targets is not None else None
+            message, offset = unpack_next(input, offset, target)
+            index += 1
+            yield message
+
+    @staticmethod
+    def deserialize_batch(input, handle, offset=0, count=-1):
+        ''' Convert a buffer of binary records to a columnar batch
+        :param input: The buffer of consecutive records
+        :param handle: The message type of the records
+        :param offset: The offset of the first record in the buffer
+        :param count: The number of records to decode (-1 for all)
+        :return: The decoded MessageBatch (requires numpy)
+        '''
+        from rosetta.core.batch import MessageBatch
+        return MessageBatch.from_buffer(handle, input, count, offset)
+
+    @staticmethod
+    def record_size(handle):
+        ''' Retrieve the size of an encoded record
+        :param handle: The message type to inspect
+        :return: The size in bytes of a single record (or the smallest
+                 possible size of a sparse record)
+        '''
+        return handle._meta.get_codec().size
@@ -0,0 +1,284 @@
+'''
+Delta Encoding
+--------------
+
+Consecutive messages about the same instrument usually differ in only
+a few fields.  A delta encoder remembers the last message it sent for
+every value of a key field (the symbol, say) and only writes the fields
+that changed since then::
+
+    encoder = DeltaEncoder(Quote, key='symbol')
+    decoder = DeltaDecoder(Quote, key='symbol')
+
+    data    = encoder.encode(quote)
+    message = decoder.decode(data)
+
+Every record holds the key field, a change mask (one bit per remaining
+field in declaration order, see :func:`rosetta.core.codec.get_bitmap_codes`)
+and then the binary value of each changed field.  The first message of
+every key has every bit set, so it can be decoded on its own.  The
+decoder keeps the last values of every key as well and fills the
+unchanged fields from them.
+
+Both sides compile the encode and decode functions once per message
+type, straight from the ordered fields of the message, so encoding a
+message is one comparison per field and decoding one mask test per
+field.  If the decoder misses records (a new subscriber, a gap in the
+feed) both sides can be reset so the next record of a key is complete
+again.  The encoder only remembers a message once its record has been
+built, so a message that fails to encode (a value that does not fit its
+field, or a key longer than the key field) leaves the state untouched.
+
+The state is per encoder and decoder instance, so unlike the other
+formats this one is not a registered serializer.
+'''
+import struct
+from rosetta.core.codec import get_field_format, get_field_helper, get_bitmap_codes
+from rosetta.core.exceptions import ConfigurationException, DecodeException
+
+#---------------------------------------------------------------------------#
+# Logger
+#---------------------------------------------------------------------------#
+import logging
+_logger = logging.getLogger('rosetta.format.delta')
+
+#---------------------------------------------------------------------------#
+# Compiled Functions
+#---------------------------------------------------------------------------#
+_tables = {}
+
+class _Missing(object):
+    ''' The previous values of a key that has not been seen yet, which
+    differ from every value '''
+    __getitem__ = lambda s, i: s
+    __ne__      = lambda s, o: True
+_missing = _Missing()
+
+def _get_format(field):
+    ''' Retrieve the binary format of a single field
+    :param field: The field to retrieve the format for
+    :return: (struct code, encode expression, decode expression)
+
+    Bit fields are written whole in the smallest unsigned integer
+    holding their bits.
+    '''
+    if field.bits:
+        code = get_bitmap_codes(field.bits)[0]
+        if field.get_type_name() == 'bool':
+            return (code, '%s', '(%s == 1)')
+        return (code, '%s', '%s')
+    return get_field_format(field)
+
+def _get_table(message, key):
+    ''' Retrieve the compiled delta functions of a message type
+    :param message: The message type to retrieve the functions for
+    :param key: The name of the key field
+    :return: (encode(message, state), decode(buffer, offset, state))
+    '''
+    layout = message._meta.get_layout()
+    entry = _tables.get((message, key))
+    if entry is None or entry[0] is not layout:
+        entry = _tables[(message, key)] = (layout, _compile(message._meta, layout, key))
+    return entry[1]
+
+def _compile(options, layout, key):
+    ''' Compile the delta functions of a message type
+    :param options: The options of the message type
+    :param layout: The layout of the message type
+    :param key: The name of the key field
+    :return: (encode(message, state), decode(buffer, offset, state))
+
+    The decode function returns (message, end offset), or (None, key)
+    if the record is not complete and the key has no previous values.
+    '''
+    if key not in layout.by_name:
+        raise ConfigurationException('%s has no key field %s' % (options.object_name, key))
+    order = options.byte_order
+    fields = [f for f in layout.fields if f.name != key and f.get_type_name() != 'padding']
+    masks = ['_m%d' % index for index, _ in enumerate(get_bitmap_codes(len(fields)))]
+    namespace = { '_new':object.__new__, '_message':options.message, '_missing':_missing }
+
+    code, encode, decode = _get_format(layout.by_name[key])
+    helper = get_field_helper(layout.by_name[key], order)
+    if helper is not None:
+        namespace['_hk'] = helper
+        encode, decode = encode.replace('%h', '_hk'), decode.replace('%h', '_hk')
+    head = struct.Struct(order + code + ''.join(get_bitmap_codes(len(fields))))
+    namespace.update({ '_head':head.pack, '_read':head.unpack_from, '_size':head.size })
+
+    # the remembered values of a key; repeated values are copied as the
+    # message may be changed in place before it is sent again
+    values = ['message.%s%s' % (f.name, f.repeated and '[:]' or '') for f in fields]
+    packs, unpacks = [], []
+    for index, field in enumerate(layout.fields):
+        if field.get_type_name() == 'padding':
+            namespace['_c%d' % index] = field.value
+            unpacks.append('    message.%s = _c%d' % (field.name, index))
+    for index, field in enumerate(fields):
+        code, fencode, fdecode = _get_format(field)
+        helper = get_field_helper(field, order)
+        if helper is not None:
+            namespace['_h%d' % index] = helper
+            fencode = fencode.replace('%h', '_h%d' % index)
+            fdecode = fdecode.replace('%h', '_h%d' % index)
+        record = struct.Struct(order + code)
+        namespace['_s%d' % index] = record.pack
+        namespace['_r%d' % index] = record.unpack_from
+        mask, bit = masks[index // 64], 1 << (index % 64)
+        value = 'values[%d]' % index
+        packs.extend([
+            '    if %s != previous[%d]:' % (value, index),
+            '        %s |= %d' % (mask, bit),
+            '        parts.append(_s%d(%s))' % (index, fencode.replace('%s', value)),
+        ])
+        unpacks.extend([
+            '    if %s & %d:' % (mask, bit),
+            '        message.%s = %s' % (field.name, fdecode.replace('%s',
+                '_r%d(buffer, position)[0]' % index)),
+            '        position += %d' % record.size,
+            '    else:',
+            '        message.%s = previous[%d]%s' % (field.name, index,
+                field.repeated and '[:]' or ''),
+        ])
+    full = ' or '.join(['%s != %d' % (mask, (1 << min(64, len(fields) - 64 * index)) - 1)
+        for index, mask in enumerate(masks)]) or 'False'
+
+    source = [
+        'def encode(message, state):',
+        '    name = message.%s' % key,
+        '    values = (%s)' % ''.join([v + ', ' for v in values]),
+        '    previous = state.get(name, _missing)',
+        '    parts = []',
+    ] + ['    %s = 0' % mask for mask in masks] + packs + [
+        "    data = _head(%s) + ''.join(parts)" % ', '.join(
+            [encode.replace('%s', 'name')] + masks),
+        '    state[name] = values', # only once the record has been built
+        '    return data',
+        'def decode(buffer, offset, state):',
+        '    (name, %s) = _read(buffer, offset)' % ''.join([m + ', ' for m in masks]),
+        '    name = %s' % decode.replace('%s', 'name'),
+        '    previous = state.get(name)',
+        '    if previous is None:',
+        '        if %s: return None, name' % full,
+        '        previous = _missing',
+        '    message = _new(_message)',
+        '    message.%s = name' % key,
+        '    position = offset + _size',
+    ] + unpacks + [
+        '    state[name] = (%s)' % ''.join([v + ', ' for v in values]),
+        '    return message, position',
+    ]
+    code = compile('\n'.join(source) + '\n', '<delta %s>' % options.object_name, 'exec')
+    exec code in namespace
+    return namespace['encode'], namespace['decode']
+
+#---------------------------------------------------------------------------#
+# Encoder
+#---------------------------------------------------------------------------#
+class DeltaEncoder(object):
+    '''
+    Encodes the messages of a single type as the fields that changed
+    since the last message with the same key.
+
+    :param message: The message type to encode
+    :param key: The name of the field the state is kept by
+    '''
+
+    def __init__(self, message, key='symbol'):
+        ''' Initialize a new instance
+        :param message: The message type to encode
+        :param key: The name of the field the state is kept by
+        '''
+        self.message = message
+        self.key = key
+        self.state = {}
+        self._encode = _get_table(message, key)[0]
+
+    def encode(self, message):
+        ''' Encode the changes of a message
+        :param message: The message to encode
+        :return: The encoded record
+        '''
+        return self._encode(message, self.state)
+
+    def encode_many(self, messages):
+        ''' Encode the changes of many messages into one stream
+        :param messages: The iterable of messages to encode
+        :return: The encoded records
+        '''
+        encode, state = self._encode, self.state
+        return ''.join([encode(message, state) for message in messages])
+
+    def reset(self, key=None):
+        ''' Forget the state so the next records are complete
+        :param key: The key value to forget (or None for every key)
+        '''
+        if key is None:
+            self.state.clear()
+        else: self.state.pop(key, None)
+
+#---------------------------------------------------------------------------#
+# Decoder
+#---------------------------------------------------------------------------#
+class DeltaDecoder(object):
+    '''
+    Rebuilds the full messages of a single type from the records of a
+    :class:`DeltaEncoder`.
+
+    :param message: The message type to decode
+    :param key: The name of the field the state is kept by
+    '''
+
+    def __init__(self, message, key='symbol'):
+        ''' Initialize a new instance
+        :param message: The message type to decode
+        :param key: The name of the field the state is kept by
+        '''
+        self.message = message
+        self.key = key
+        self.state = {}
+        self._decode = _get_table(message, key)[1]
+
+    def decode_next(self, buffer, offset=0):
+        ''' Decode the record at an offset of a buffer
+        :param buffer: The buffer holding the record
+        :param offset: The offset of the record in the buffer
+        :return: (the full message, the offset after the record)
+        '''
+        message, position = self._decode(buffer, offset, self.state)
+        if message is None:
+            raise DecodeException('no previous message for %s, the encoder must be reset'
+                % repr(position))
+        return message, position
+
+    def decode(self, buffer, offset=0):
+        ''' Decode a single record
+        :param buffer: The buffer holding the record
+        :param offset: The offset of the record in the buffer
+        :return: The full message
+        '''
+        return self.decode_next(buffer, offset)[0]
+
+    def decode_many(self, buffer, offset=0):
+        ''' Decode every record of a stream
+        :param buffer: The buffer of consecutive records
+        :param offset: The offset of the first record
+        :return: A generator of the full messages
+        '''
+        end = len(buffer)
+        while offset < end:
+            message, offset = self.decode_next(buffer, offset)
+            yield message
+
+    def reset(self, key=None):
+        ''' Forget the state of one or every key
+        :param key: The key value to forget (or None for every key)
+        '''
+        if key is None:
+            self.state.clear()
+        else: self.state.pop(key, None)
+
+#---------------------------------------------------------------------------#
+# Exported Symbols
+#---------------------------------------------------------------------------#
+__all__ = ( 'DeltaEncoder', 'DeltaDecoder' )
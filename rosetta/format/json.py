@@ -1,51 +1,227 @@
 '''
-Message Serializers
--------------------
-
-Instead of having every message derive from a protocol that
-decides how to encode/decode it, we instead are pulling the
-relevant code outside of the class.
-
-Since we can introspect each message and we know what our
-messages look like, we an serialize from the outside just as
-easily from the inside.  This allows us to supply a pluggable
-serializer.
-
-In order to create a new serializer, simply supply serialize
-and a deserialize static methods that operate on a message and
-a serialized message respectively.  Note, the deserialize _must_
-be able to reconstuct the given message from the serialize dump!
+JSON Serializer
+---------------
+
+Messages are encoded as a json object holding the encoded name of the
+message and its field values keyed by their encoded names, in the
+order the fields were declared::
+
+    {"name":"ExampleMessage","data":{"name":"galen","age":24}}
+
+Rather than dumping the instance dictionary, the serializer compiles a
+codec per message type the first time it is used:
+
+- the json fragments for the message name and every key are built
+  once, so encoding only converts the values and joins the fragments
+- every field gets a converter chosen by its type (int, float, bool,
+  string) so the values are written and restored with the right type
+- fields missing from a document keep the defaults every decoded
+  message starts from (see :func:`rosetta.core.pool.reset_message`)
+- repeated fields are written as json arrays and restored into the
+  container of the field (an ``array`` for numeric values)
+- enum fields are written as the name of their value, with the json
+  fragment of every name built once; a value that is not in the enum
+  raises an :class:`EncodeException` (and a name or value that is not
+  in it a :class:`DecodeException` on decode)
+- optional fields are only written when their value differs from their
+  default
+- ``inf`` and ``nan`` have no json representation, so a float field
+  holding one raises an :class:`EncodeException`
+
+The message type is resolved on decode with the dispatch registry, by
+the encoded name in the document.
+
+The fastest json library available is used (ujson, then simplejson,
+then the standard library json module); another one can be plugged in
+with :func:`set_backend`.
 '''
-import simplejson
+from __future__ import absolute_import
+from rosetta.core.dispatch import registry
+from rosetta.core.exceptions import ConfigurationException, EncodeException
+from rosetta.core.exceptions import DecodeException
+from rosetta.core.pool import reset_message, get_default
+
+#---------------------------------------------------------------------------#
+# Backend
+#---------------------------------------------------------------------------#
+try:
+    import ujson as backend
+except ImportError:
+    try:
+        import simplejson as backend
+    except ImportError:
+        import json as backend
+
+def set_backend(module):
+    ''' Change the json library used to dump and load documents
+    :param module: A module supplying dumps and loads
+    '''
+    global backend
+    backend = module
+    _codecs.clear()
+
+#---------------------------------------------------------------------------#
+# Field Converters
+#---------------------------------------------------------------------------#
+# Each entry supplies the expression used to write the value of a field
+# as json text and the expression used to convert the loaded json value
+# back to the field type (both in place of their %s marker).
+#---------------------------------------------------------------------------#
+def _text(value):
+    ''' Convert a loaded json string back to a byte string '''
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return value
+
+def _key(value):
+    ''' Convert a name to the unicode key json documents are loaded with '''
+    if isinstance(value, str):
+        return value.decode('utf-8')
+    return value
+
+def _float(value):
+    ''' Convert a float to json text, refusing the values json lacks '''
+    value = float(value)
+    if value - value != 0.0: # only true for inf and nan
+        raise EncodeException('%r is not a valid json number' % value)
+    return repr(value)
 
+def _invalid_enum(name, value):
+    ''' Refuse to encode a value that is not in the enum of its field '''
+    raise EncodeException('%r is not a value of the enum of field %s' % (value, name))
+
+def _undecodable_enum(name, value):
+    ''' Refuse to decode a value that is not in the enum of its field '''
+    raise DecodeException('%r is not a value of the enum of field %s' % (value, name))
+
+data_types = {
+    'string'    : ('_dumps(%s)', '_text(%s)'),
+    'character' : ('_dumps(%s)', '_text(%s)'),
+    'padding'   : ('_dumps(%s)', '_text(%s)'),
+    'integar'   : ("'%d' % %s", 'int(%s)'),
+    'float'     : ('_float(%s)', 'float(%s)'),
+    'bool'      : ("(%s and 'true' or 'false')", 'bool(%s)'),
+}
+_default_type = ('_dumps(%s)', '%s')
+
+#---------------------------------------------------------------------------#
+# Codec
+#---------------------------------------------------------------------------#
+_codecs = {}
+
+def _get_codec(message):
+    ''' Retrieve the compiled json codec of a message type
+    :param message: The message type to retrieve the codec for
+    :return: (encode(message), decode(data, message))
+    '''
+    layout = message._meta.get_layout()
+    entry = _codecs.get(message)
+    if entry is None or entry[0] is not layout:
+        entry = _codecs[message] = (layout, _compile(message._meta, layout))
+    return entry[1]
+
+def _compile(options, layout):
+    ''' Compile the json codec of a message type
+    :param options: The options of the message type
+    :param layout: The layout of the message type
+    :return: (encode(message), decode(data, message))
+
+    The decode function only assigns the fields present in the data, so
+    it must be handed a message holding the defaults of every field.
+    '''
+    namespace = { '_dumps':backend.dumps, '_text':_text, '_float':_float,
+        '_invalid':_invalid_enum, '_undecodable':_undecodable_enum }
+    parts, assigns = [], []
+    prefix = '{"name":%s,"data":{' % backend.dumps(options.encoded_name)
+    sparse = [field for field in layout.fields if field.optional]
+    namespace['_prefix'] = prefix
+    for index, field in enumerate(layout.fields):
+        encode, decode = data_types.get(field.get_type_name(), _default_type)
+        if field.get_type_name() == 'enum':
+            namespace['_e%d' % index] = dict([(v, backend.dumps(k))
+                for k, v in field.enum.names.iteritems()])
+            namespace['_E%d' % index] = dict(field.enum.names.items()
+                + [(v, v) for v in field.enum.values]
+                + [(str(v), v) for v in field.enum.values])
+            namespace['_N%d' % index] = field.name
+            # the json fragments are never empty, so a missing value is falsy
+            encode = '(_e%d.get(%%s) or _invalid(_N%d, %%s))' % (index, index)
+            decode = '(_E%d[%%s] if %%s in _E%d else _undecodable(_N%d, %%s))' % (
+                index, index, index)
+        if field.repeated:
+            namespace['_n%d' % index] = field.new_repeated
+            if field.get_type_name() == 'enum':
+                encode = "'[' + ','.join([%s for _i in %%s]) + ']'" % encode.replace('%s', '_i')
+                decode = '_n%d([%s for _i in %%s])' % (index, decode.replace('%s', '_i'))
+            elif field.get_type_name() == 'float':
+                encode = "'[' + ','.join([_float(_i) for _i in %s]) + ']'"
+                decode = '_n%d(%%s)' % index
+            else: encode, decode = '_dumps(list(%s))', '_n%d(%%s)' % index
+        key = backend.dumps(field.encoded_name) + ':'
+        namespace['_g%d' % index] = _key(field.encoded_name)
+        access = 'message.%s' % field.name
+        namespace['_k%d' % index] = ((index or sparse) and ',' or prefix) + key
+        if field.optional:
+            if field.repeated:
+                present = 'len(%s)' % access
+            else:
+                namespace['_d%d' % index] = get_default(layout, field.name)
+                present = '%s != _d%d' % (access, index)
+            parts.append("(_k%d + %s if %s else '')" % (index,
+                encode.replace('%s', access), present))
+        else:
+            parts.append('_k%d' % index)
+            parts.append(encode.replace('%s', access))
+        value = '_v%d' % index
+        assigns.extend([
+            '    %s = get(_g%d)' % (value, index),
+            '    if %s is not None:' % value,
+            '        message.%s = %s' % (field.name, decode.replace('%s', value)),
+        ])
+    if not layout.fields:
+        namespace['_empty'] = prefix
+        parts.append('_empty')
+
+    if sparse: # the body starts with a separator when any field is optional
+        encode = "    return ''.join((_prefix, ''.join((%s,))[1:], '}}'))" % ', '.join(parts)
+    else: encode = "    return ''.join((%s, '}}'))" % ', '.join(parts)
+    source = [
+        'def encode(message):',
+        encode,
+        'def decode(data, message):',
+        '    get = data.get',
+    ] + assigns + ['    return message']
+    code = compile('\n'.join(source) + '\n', '<json %s>' % options.object_name, 'exec')
+    exec code in namespace
+    return namespace['encode'], namespace['decode']
+
+#---------------------------------------------------------------------------#
+# Serializer
+#---------------------------------------------------------------------------#
 class JsonSerializer:
     '''
     This class contains utilities that allow one to
-    quickly serialize and deserialize an object to
+    quickly serialize and deserialize a message to
     and from json.
     '''
-    
+
     @staticmethod
     def serialize(input):
-        ''' Convert a type to json text
-        :param input: The type do serialize
+        ''' Convert a message to json text
+        :param input: The message to serialize
         :return: The input serialized to json
         '''
-        handle = input.__class__
-        data   = input.__dict__
-        name   = '%s//%s' % (handle.__module__, handle.__name__)
-        result = {'name':name, 'data':data}
-        return simplejson.dumps(result)
+        return _get_codec(input.__class__)[0](input)
 
     @staticmethod
     def deserialize(input):
-        ''' Convert serialized json back to a type
+        ''' Convert serialized json back to a message
         :param input: The serialized json string
-        :return: The initialized type
+        :return: The initialized message
         '''
-        result = simplejson.loads(input)
-        module, type = result['name'].split('//')
-        handle = _create(module, type)
-        handle.__dict__ = result['data']
-        return handle
-
+        result = backend.loads(input)
+        handle = registry.get_message(_text(result['name']))
+        if handle is None:
+            raise ConfigurationException('unknown message %s' % result['name'])
+        message = reset_message(object.__new__(handle))
+        return _get_codec(handle)[1](result['data'], message)
@@ -16,9 +16,10 @@ and a deserialize static methods that operate on a message and
 a serialized message respectively.  Note, the deserialize _must_
 be able to reconstuct the given message from the serialize dump!
 '''
+from __future__ import absolute_import
 try: # try to import faster pickle first
     import cPickle as pickle
-except:
+except ImportError:
     import pickle
 
 class PickleSerializer:
@@ -26,17 +27,20 @@ class PickleSerializer:
     This class allows one to convert to and from
     a message in an object representation and a
     pickle string.
+
+    Messages pickle themselves as their registered type and a tuple of
+    their field values (see Message.__reduce_ex__), and the highest
+    pickle protocol available is always used.  Errors are raised to the
+    caller rather than hidden.
     '''
-    
+
     @staticmethod
     def serialize(input):
         ''' Convert a type to pickle text
         :param input: The type do serialize
         :return: The input serialized to pickle
         '''
-        try:
-            return pickle.dumps(input)
-        except pickle.PickleError: return None
+        return pickle.dumps(input, pickle.HIGHEST_PROTOCOL)
 
     @staticmethod
     def deserialize(input):
@@ -44,7 +48,4 @@ class PickleSerializer:
         :param input: The serialized pickle string
         :return: The initialized type
         '''
-        try:
-            return pickle.loads(input)
-        except pickle.PickleError: return None
-
+        return pickle.loads(input)
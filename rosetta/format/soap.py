@@ -15,37 +15,19 @@ In order to create a new serializer, simply supply serialize
 and a deserialize static methods that operate on a message and
 a serialized message respectively.  Note, the deserialize _must_
 be able to reconstuct the given message from the serialize dump!
+
+.. todo::
+
+   This has only ever been a copy of the yaml serializer; until a
+   real soap envelope is written it simply uses the yaml format.
 '''
-import yaml
+from __future__ import absolute_import
+from rosetta.format.yaml import YamlSerializer
 
-class SoapSerializer:
+class SoapSerializer(YamlSerializer):
     '''
     This class allows one to convert to and from
     a message in an object representation and a
     yaml string.
     '''
-    
-    @staticmethod
-    def serialize(input):
-        ''' Convert a type to yaml text
-        :param input: The type do serialize
-        :return: The input serialized to yaml
-        '''
-        handle = input.__class__
-        data   = input.__dict__
-        name   = '%s//%s' % (handle.__module__, handle.__name__)
-        result = {'name':name, 'data':data}
-        return yaml.dump(result)
-
-    @staticmethod
-    def deserialize(input):
-        ''' Convert serialized yaml back to a type
-        :param input: The serialized yaml string
-        :return: The initialized type
-        '''
-        result = yaml.load(input)
-        module, type = result['name'].split('//')
-        handle = _create(module, type)
-        handle.__dict__ = result['data']
-        return handle
-
+    pass
@@ -1,59 +1,230 @@
 '''
-Message Serializers
--------------------
-
-Instead of having every message derive from a protocol that
-decides how to encode/decode it, we instead are pulling the
-relevant code outside of the class.
-
-Since we can introspect each message and we know what our
-messages look like, we an serialize from the outside just as
-easily from the inside.  This allows us to supply a pluggable
-serializer.
-
-In order to create a new serializer, simply supply serialize
-and a deserialize static methods that operate on a message and
-a serialized message respectively.  Note, the deserialize _must_
-be able to reconstuct the given message from the serialize dump!
+XML Serializer
+--------------
+
+Messages are encoded as an element named by the encoded name of the
+message holding a child element per field, named by the encoded name
+of the field, in the order the fields were declared::
+
+    <ExampleMessage><name>galen</name><age>24</age></ExampleMessage>
+
+Every field type has an entry in a converter table that writes its
+value as text and reads it back, so no type information needs to be
+stored in the document (and nothing is ever evaluated).  The values of
+a repeated field are written as a single space separated list, and
+optional fields holding their default value are left out.
+
+Large collections of messages are written incrementally with an
+:class:`XmlWriter` and read back with :meth:`XmlSerializer.iterparse`,
+which parses the document as a stream and clears every message element
+once it has been decoded, so memory use stays flat no matter how large
+the document is::
+
+    writer = XmlWriter(handle)
+    for message in messages:
+        writer.write(message)
+    writer.close()
+
+    for message in XmlSerializer.iterparse(open(path)):
+        handle(message)
+
+lxml is used when it is installed, otherwise the standard library
+cElementTree is used.
 '''
-from lxml import etree
+from __future__ import absolute_import
+from xml.sax.saxutils import escape
+from rosetta.core.dispatch import registry
+from rosetta.core.exceptions import ConfigurationException
+from rosetta.format.base import ConverterTables
+
+try:
+    from lxml import etree
+except ImportError:
+    try:
+        import xml.etree.cElementTree as etree
+    except ImportError:
+        import xml.etree.ElementTree as etree
+
+#---------------------------------------------------------------------------#
+# Field Converters
+#---------------------------------------------------------------------------#
+# field type -> (value to text, text to value)
+#---------------------------------------------------------------------------#
+_true_values = frozenset(['true', 'True', '1'])
+
+def _to_text(value):
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+    return escape(str(value))
+
+def _from_text(text):
+    if isinstance(text, unicode):
+        return text.encode('utf-8')
+    return text
+
+data_types = {
+    'string'    : (_to_text, _from_text),
+    'character' : (_to_text, _from_text),
+    'padding'   : (_to_text, _from_text),
+    'integar'   : (lambda v: '%d' % v, int),
+    'float'     : (lambda v: repr(float(v)), float),
+    'bool'      : (lambda v: v and 'true' or 'false', lambda t: t in _true_values),
+}
+_default_type = (_to_text, _from_text)
+
+def _repeated_type(field, converters):
+    ''' Helper to build the converters of a repeated field
+    :param field: The repeated field to convert
+    :param converters: The (encode, decode) pair of a single value
+    :return: The (encode, decode) pair of the whole field
+    '''
+    encode, decode = converters
+    create = field.new_repeated
+    return (lambda v: ' '.join([encode(i) for i in v]),
+            lambda t: create([decode(i) for i in t.split()]))
+
+#---------------------------------------------------------------------------#
+# Converter Tables
+#---------------------------------------------------------------------------#
+# Every message and field key is the (open tag, close tag) pair of its
+# encoded name.
+#---------------------------------------------------------------------------#
+_tables = ConverterTables(data_types, _default_type, _repeated_type,
+    lambda name: ('<%s>' % name, '</%s>' % name))
+
+def _encode(message, append):
+    ''' Write a message as xml
+    :param message: The message to encode
+    :param append: The callable to hand each piece of text to
+    '''
+    table = _tables.get_table(message.__class__)
+    append(table.name[0])
+    for (opening, closing), name, encode, optional, default in table.encoders:
+        value = getattr(message, name)
+        if optional and value == default: continue
+        append(opening)
+        append(encode(value))
+        append(closing)
+    append(table.name[1])
+
+def _decode(element):
+    ''' Convert a message element back to a message
+    :param element: The parsed message element
+    :return: The decoded message
+
+    The message starts out with the precomputed defaults, so only the
+    child elements present in the document are converted.
+    '''
+    handle = registry.get_message(element.tag)
+    if handle is None:
+        raise ConfigurationException('unknown message %s' % element.tag)
+    table = _tables.get_table(handle)
+    message, decoders = table.create(), table.decoders
+    for child in element:
+        entry = decoders.get(child.tag)
+        if entry is not None:
+            setattr(message, entry[0], entry[1](child.text or ''))
+    return message
 
+#---------------------------------------------------------------------------#
+# Writer
+#---------------------------------------------------------------------------#
+class XmlWriter(object):
+    '''
+    Incrementally writes a document holding many messages to a
+    file like object.
+    '''
+
+    def __init__(self, stream, root='messages'):
+        ''' Initialize a new instance
+        :param stream: The file like object to write to
+        :param root: The name of the document root element
+        '''
+        self.stream = stream
+        self.root = root
+        self._pending = []
+        stream.write("<?xml version='1.0' encoding='UTF-8'?>\n<%s>" % root)
+
+    def write(self, message, buffered=512):
+        ''' Write a single message to the document
+        :param message: The message to write
+        :param buffered: The number of pieces to buffer before flushing
+        '''
+        _encode(message, self._pending.append)
+        if len(self._pending) >= buffered:
+            self.flush()
+
+    def flush(self):
+        ''' Write any buffered text to the stream
+        '''
+        self.stream.write(''.join(self._pending))
+        del self._pending[:]
+
+    def close(self):
+        ''' Finish the document
+        '''
+        self.flush()
+        self.stream.write('</%s>\n' % self.root)
+
+#---------------------------------------------------------------------------#
+# Serializer
+#---------------------------------------------------------------------------#
 class XmlSerializer:
     '''
     This class allows one to convert to and from
     a message in an object representation and a
     xml string.
     '''
-    
+
     @staticmethod
     def serialize(input):
-        ''' Convert a type to XML text
-        :param input: The type do serialize
+        ''' Convert a message to XML text
+        :param input: The message to serialize
         :return: The input serialized to xml
         '''
-        data = input.__dict__
-        name = input.__class__.__name__
-        mod  = input.__class__.__module__
-
-        root = etree.Element(name, module=mod)
-        for value in data.iteritems():
-            node = etree.SubElement(root, value[0],
-                type=type(value[1]).__name__)
-            node.text = "%s" % value[1]
-        return etree.tostring(root, xml_declaration=True)
+        result = []
+        _encode(input, result.append)
+        return ''.join(result)
 
     @staticmethod
     def deserialize(input):
-        ''' Convert serialized XML back to a type
+        ''' Convert serialized XML back to a message
         :param input: The serialized XML string
-        :return: The initialized type
+        :return: The initialized message
         '''
-        root   = etree.fromstring(input)
-        handle = _create(root.attrib['module'], root.tag)
-        result = {}
-        for child in root.iterchildren():
-            result[child.tag] = eval('%s("%s")' %
-                (child.attrib['type'], child.text))
-        handle.__dict__ = result
-        return handle
+        return _decode(etree.fromstring(input))
 
+    @staticmethod
+    def serialize_many(input, stream):
+        ''' Write many messages to a file like object as one document
+        :param input: The iterable of messages to serialize
+        :param stream: The file like object to write to
+        '''
+        writer = XmlWriter(stream)
+        for message in input:
+            writer.write(message)
+        writer.close()
+
+    @staticmethod
+    def iterparse(source):
+        ''' Stream the messages out of a document
+        :param source: A file name or file like object to read from
+        :return: A generator of the decoded messages
+
+        The messages may be the root of the document or the children
+        of the root.  Each message element is cleared (and detached from
+        the document) once it has been decoded.
+        '''
+        depth, root, level = 0, None, 1
+        for event, element in etree.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = element
+                    if element.tag in registry: level = 0
+                depth += 1
+                continue
+            depth -= 1
+            if depth != level: continue
+            yield _decode(element)
+            element.clear()
+            if level: root.remove(element)
@@ -1,51 +1,150 @@
 '''
-Message Serializers
--------------------
-
-Instead of having every message derive from a protocol that
-decides how to encode/decode it, we instead are pulling the
-relevant code outside of the class.
-
-Since we can introspect each message and we know what our
-messages look like, we an serialize from the outside just as
-easily from the inside.  This allows us to supply a pluggable
-serializer.
-
-In order to create a new serializer, simply supply serialize
-and a deserialize static methods that operate on a message and
-a serialized message respectively.  Note, the deserialize _must_
-be able to reconstuct the given message from the serialize dump!
+YAML Serializer
+---------------
+
+Messages are encoded as a yaml mapping holding the encoded name of the
+message and its field values keyed by their encoded names::
+
+    data: {age: 24, name: galen}
+    name: ExampleMessage
+
+The values are converted with a converter table chosen by the field
+types (rather than dumping the instance dictionary), so only plain
+scalars are ever written and the safe loader can be used to read them
+back.  Optional fields holding their default value are left out of the
+document, and are filled back in from the precomputed defaults.
+
+The libyaml backed ``CSafeLoader`` and ``CSafeDumper`` are used when
+PyYAML was built with them, otherwise the pure python safe loader and
+dumper are used.
+
+Many messages can be written to (and streamed back from) a single
+multi-document yaml stream::
+
+    YamlSerializer.serialize_many(messages, handle)
+    for message in YamlSerializer.deserialize_many(open(path)):
+        handle(message)
 '''
+from __future__ import absolute_import
 import yaml
+from rosetta.core.dispatch import registry
+from rosetta.core.exceptions import ConfigurationException
+from rosetta.format.base import ConverterTables
+
+try:
+    from yaml import CSafeLoader as Loader, CSafeDumper as Dumper
+except ImportError:
+    from yaml import SafeLoader as Loader, SafeDumper as Dumper
+
+#---------------------------------------------------------------------------#
+# Field Converters
+#---------------------------------------------------------------------------#
+# field type -> (value to yaml scalar, yaml scalar to value)
+#---------------------------------------------------------------------------#
+def _text(value):
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return str(value)
+
+data_types = {
+    'string'    : (_text, _text),
+    'character' : (_text, _text),
+    'padding'   : (_text, _text),
+    'integar'   : (int, int),
+    'float'     : (float, float),
+    'bool'      : (bool, bool),
+}
+_default_type = (lambda v: v, lambda v: v)
+
+def _repeated_type(field, converters):
+    ''' Helper to build the converters of a repeated field
+    :param field: The repeated field to convert
+    :param converters: The (encode, decode) pair of a single value
+    :return: The (encode, decode) pair of the whole field
+    '''
+    encode, decode = converters
+    create = field.new_repeated
+    return (lambda v: [encode(i) for i in v],
+            lambda v: create([decode(i) for i in v]))
+
+#---------------------------------------------------------------------------#
+# Converter Tables
+#---------------------------------------------------------------------------#
+_tables = ConverterTables(data_types, _default_type, _repeated_type)
 
+def _to_document(message):
+    ''' Convert a message to its yaml document
+    :param message: The message to convert
+    :return: The document mapping
+    '''
+    data, table = {}, _tables.get_table(message.__class__)
+    for key, name, encode, optional, default in table.encoders:
+        value = getattr(message, name)
+        if not optional or value != default:
+            data[key] = encode(value)
+    return { 'name':table.name, 'data':data }
+
+def _from_document(document):
+    ''' Convert a yaml document back to a message
+    :param document: The loaded document mapping
+    :return: The decoded message
+
+    The message starts out with the precomputed defaults, so only the
+    values present in the document are converted.
+    '''
+    handle = registry.get_message(document['name'])
+    if handle is None:
+        raise ConfigurationException('unknown message %s' % document['name'])
+    table = _tables.get_table(handle)
+    message, decoders = table.create(), table.decoders
+    for key, value in (document['data'] or {}).iteritems():
+        entry = decoders.get(key)
+        if entry is not None and value is not None:
+            setattr(message, entry[0], entry[1](value))
+    return message
+
+#---------------------------------------------------------------------------#
+# Serializer
+#---------------------------------------------------------------------------#
 class YamlSerializer:
     '''
     This class allows one to convert to and from
     a message in an object representation and a
     yaml string.
     '''
-    
+
     @staticmethod
     def serialize(input):
-        ''' Convert a type to yaml text
-        :param input: The type do serialize
+        ''' Convert a message to yaml text
+        :param input: The message to serialize
         :return: The input serialized to yaml
         '''
-        handle = input.__class__
-        data   = input.__dict__
-        name   = '%s//%s' % (handle.__module__, handle.__name__)
-        result = {'name':name, 'data':data}
-        return yaml.dump(result)
+        return yaml.dump(_to_document(input), Dumper=Dumper)
 
     @staticmethod
     def deserialize(input):
-        ''' Convert serialized yaml back to a type
+        ''' Convert serialized yaml back to a message
         :param input: The serialized yaml string
-        :return: The initialized type
+        :return: The initialized message
         '''
-        result = yaml.load(input)
-        module, type = result['name'].split('//')
-        handle = _create(module, type)
-        handle.__dict__ = result['data']
-        return handle
+        return _from_document(yaml.load(input, Loader=Loader))
 
+    @staticmethod
+    def serialize_many(input, stream=None):
+        ''' Convert many messages to a multi-document yaml stream
+        :param input: The iterable of messages to serialize
+        :param stream: The file like object to write to (or None)
+        :return: The yaml text if no stream was supplied
+        '''
+        documents = (_to_document(message) for message in input)
+        return yaml.dump_all(documents, stream, Dumper=Dumper)
+
+    @staticmethod
+    def deserialize_many(input):
+        ''' Stream the messages out of a multi-document yaml stream
+        :param input: The yaml text or file like object to read
+        :return: A generator of the decoded messages
+        '''
+        for document in yaml.load_all(input, Loader=Loader):
+            if document is not None:
+                yield _from_document(document)
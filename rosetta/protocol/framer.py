@@ -0,0 +1,265 @@
+'''
+Incremental Stream Framers
+--------------------------
+
+A stream transport (tcp, serial) hands us arbitrary chunks of data
+that rarely line up with the message boundaries.  A framer accepts
+those chunks as they arrive, keeps any partial frame around until the
+rest of it shows up, and yields every complete frame decoded::
+
+    framer = FixedSizeFramer(ExampleMessage)
+    while True:
+        for message in framer.feed(socket.recv(4096)):
+            handle(message)
+
+The following framing styles are supported:
+
+- :class:`FixedSizeFramer` every frame is a fixed width record
+- :class:`LengthPrefixFramer` every frame is preceded by its length
+- :class:`DelimiterFramer` every frame is terminated by a delimiter
+
+The data is collected in a single reusable :class:`FrameBuffer`, so
+appending a chunk never concatenates strings.  Frames are decoded
+straight out of that buffer; note that views (``views=True``) point
+into the buffer as well and are only valid until the next call to
+``feed``.
+
+A length prefix that cannot be right (smaller than the prefix itself,
+or larger than the ``max_size`` of the framer) raises a
+:class:`DecodeException` instead of being framed; the stream cannot be
+resynchronized after that, so the connection should be dropped.
+'''
+import struct
+from rosetta.core.exceptions import NotImplementedException, ConfigurationException
+from rosetta.core.exceptions import DecodeException
+
+#---------------------------------------------------------------------------#
+# Logger
+#---------------------------------------------------------------------------#
+import logging
+_logger = logging.getLogger('rosetta.protocol.framer')
+
+#---------------------------------------------------------------------------#
+# Buffer
+#---------------------------------------------------------------------------#
+class FrameBuffer(object):
+    ''' A reusable receive buffer
+
+    Data is appended at the write position and consumed from the read
+    position.  Instead of wrapping around (which would split frames),
+    the unread data is moved back to the front of the buffer when the
+    end is reached, and the buffer only grows if a single frame does
+    not fit in it.
+
+    :param data: The underlying bytearray
+    :param view: A memoryview of the underlying bytearray
+    :param start: The read position
+    :param end: The write position
+    '''
+
+    def __init__(self, size=65536):
+        ''' Initialize a new instance
+        :param size: The initial size of the buffer
+        '''
+        self.data  = bytearray(size)
+        self.view  = memoryview(self.data)
+        self.start = 0
+        self.end   = 0
+
+    def write(self, chunk):
+        ''' Append a chunk of data to the buffer
+        :param chunk: The data to append
+        '''
+        length = len(chunk)
+        if self.end + length > len(self.data):
+            self._reserve(length)
+        self.data[self.end:self.end + length] = chunk
+        self.end += length
+
+    def consume(self, length):
+        ''' Mark the supplied amount of data as read
+        :param length: The amount of data that was read
+        '''
+        self.start += length
+        if self.start == self.end:
+            self.start = self.end = 0
+
+    def _reserve(self, length):
+        ''' Make room for the supplied amount of data
+        :param length: The amount of data that will be written
+        '''
+        pending = self.end - self.start
+        if pending + length > len(self.data):
+            size = len(self.data)
+            while size < pending + length: size *= 2
+            data = bytearray(size)
+            data[0:pending] = self.view[self.start:self.end]
+            self.data, self.view = data, memoryview(data)
+        elif pending:
+            self.data[0:pending] = self.view[self.start:self.end]
+        self.start, self.end = 0, pending
+
+    def __len__(self):
+        return self.end - self.start
+
+#---------------------------------------------------------------------------#
+# Decoders
+#---------------------------------------------------------------------------#
+def message_decoder(message, views=False):
+    ''' Build a frame decoder for a message type
+    :param message: The message type of the frames
+    :param views: True to return lazy views instead of messages
+    :return: decode(buffer, offset, length) -> message
+    '''
+    if views:
+        view = message._meta.get_view_class()
+        return lambda buffer, offset, length: view(buffer, offset)
+    unpack_from = message._meta.get_codec().unpack_from
+    return lambda buffer, offset, length: unpack_from(buffer, offset)
+
+def raw_decoder(buffer, offset, length):
+    ''' A frame decoder that returns a copy of the frame data
+    :param buffer: The buffer holding the frame
+    :param offset: The offset of the frame
+    :param length: The length of the frame
+    :return: The frame data
+    '''
+    return buffer[offset:offset + length].tobytes()
+
+#---------------------------------------------------------------------------#
+# Framers
+#---------------------------------------------------------------------------#
+class Framer(object):
+    ''' Base class for an incremental framer
+
+    Implementations supply ``next_frame`` which locates the next
+    complete frame in the buffer.
+    '''
+
+    def __init__(self, decode=raw_decoder, size=65536):
+        ''' Initialize a new instance
+        :param decode: decode(buffer, offset, length) for each frame
+        :param size: The initial size of the receive buffer
+        '''
+        self.decode = decode
+        self.buffer = FrameBuffer(size)
+
+    def feed(self, chunk):
+        ''' Append a chunk of data and decode every complete frame
+        :param chunk: The received data
+        :return: A generator of the decoded frames
+        '''
+        self.buffer.write(chunk)
+        return self.frames()
+
+    def frames(self):
+        ''' Decode every complete frame currently in the buffer
+        :return: A generator of the decoded frames
+        '''
+        buffer, decode = self.buffer, self.decode
+        while True:
+            frame = self.next_frame(buffer.view, buffer.start, buffer.end)
+            if frame is None: break
+            offset, length, consumed = frame
+            buffer.consume(consumed)
+            yield decode(buffer.view, offset, length)
+
+    def next_frame(self, view, start, end):
+        ''' Locate the next complete frame
+        :param view: The memoryview of the receive buffer
+        :param start: The offset of the unread data
+        :param end: The offset of the end of the unread data
+        :return: (frame offset, frame length, consumed) or None
+        '''
+        raise NotImplementedException()
+
+class FixedSizeFramer(Framer):
+    ''' Framer for a stream of fixed width message records
+    '''
+
+    def __init__(self, message, views=False, size=65536):
+        ''' Initialize a new instance
+        :param message: The message type of every frame
+        :param views: True to return lazy views instead of messages
+        :param size: The initial size of the receive buffer
+        '''
+        codec = message._meta.get_codec()
+        if not codec.fixed:
+            raise ConfigurationException('%s has no fixed record size'
+                % message._meta.object_name)
+        if not codec.size:
+            raise ConfigurationException('%s has an empty record'
+                % message._meta.object_name)
+        Framer.__init__(self, message_decoder(message, views), size)
+        self.frame_size = codec.size
+
+    def next_frame(self, view, start, end):
+        if end - start < self.frame_size:
+            return None
+        return (start, self.frame_size, self.frame_size)
+
+class LengthPrefixFramer(Framer):
+    ''' Framer for frames preceded by their length
+    '''
+
+    def __init__(self, decode=raw_decoder, prefix='!H', inclusive=False, size=65536,
+        max_size=None):
+        ''' Initialize a new instance
+        :param decode: decode(buffer, offset, length) for each frame
+        :param prefix: The struct format of the length prefix
+        :param inclusive: True if the length includes the prefix itself
+        :param size: The initial size of the receive buffer
+        :param max_size: The largest frame (without its prefix) to accept
+        '''
+        Framer.__init__(self, decode, size)
+        self.prefix = struct.Struct(prefix)
+        self.inclusive = inclusive
+        self.max_size = max_size
+
+    def next_frame(self, view, start, end):
+        header = self.prefix.size
+        if end - start < header:
+            return None
+        length = self.prefix.unpack_from(view, start)[0]
+        if self.inclusive: length -= header
+        if length < 0:
+            raise DecodeException('frame length %d is smaller than its prefix'
+                % (length + header))
+        if self.max_size is not None and length > self.max_size:
+            raise DecodeException('frame length %d is larger than %d'
+                % (length, self.max_size))
+        if end - start < header + length:
+            return None
+        return (start + header, length, header + length)
+
+class DelimiterFramer(Framer):
+    ''' Framer for frames terminated by a delimiter
+    '''
+
+    def __init__(self, decode=raw_decoder, delimiter='\n', size=65536):
+        ''' Initialize a new instance
+        :param decode: decode(buffer, offset, length) for each frame
+        :param delimiter: The frame terminator
+        :param size: The initial size of the receive buffer
+        '''
+        Framer.__init__(self, decode, size)
+        self.delimiter = delimiter
+        self.scanned = 0 # unread data known to hold no delimiter
+
+    def next_frame(self, view, start, end):
+        # do not rescan the data we already know holds no delimiter
+        offset = start + max(0, self.scanned - len(self.delimiter) + 1)
+        index = self.buffer.data.find(self.delimiter, offset, end)
+        if index == -1:
+            self.scanned = end - start
+            return None
+        self.scanned = 0
+        return (start, index - start, index - start + len(self.delimiter))
+
+#---------------------------------------------------------------------------#
+# Exported Symbols
+#---------------------------------------------------------------------------#
+__all__ = (
+    'FrameBuffer', 'Framer', 'FixedSizeFramer', 'LengthPrefixFramer',
+    'DelimiterFramer', 'message_decoder', 'raw_decoder',
+)
@@ -1,8 +1,46 @@
 '''
+Enumerated Types
+----------------
+
+An enumeration maps a set of names to integer values::
+
+    Side = Enum('Buy', 'Sell', SellShort=5)
+    Side.Buy        # 0
+    Side['Sell']    # 1
+    Side[5]         # 'SellShort'
+
+The forward (name to value) and reverse (value to name) tables are
+built once when the enumeration is created, so a lookup in either
+direction is a single dictionary access.  The smallest integer width
+that holds every value is also computed up front so that fields of the
+enumeration can be encoded compactly.
 '''
 
+#---------------------------------------------------------------------------#
+# Helpers
+#---------------------------------------------------------------------------#
+_widths = ((1, 1 << 7), (2, 1 << 15), (4, 1 << 31), (8, 1 << 63))
+
+def _get_width(values):
+    ''' Helper to find the smallest signed integer width of some values
+    :param values: The values that need to fit
+    :return: The width in bytes (1, 2, 4, or 8)
+    '''
+    low, high = min(values or [0]), max(values or [0])
+    for width, limit in _widths:
+        if -limit <= low and high < limit:
+            return width
+    raise ValueError('enumeration values do not fit in 64 bits')
+
+#---------------------------------------------------------------------------#
+# Enum
+#---------------------------------------------------------------------------#
 class Enum(object):
     ''' Enumerated type for python
+
+    :param names: The forward table of name to value
+    :param values: The reverse table of value to name
+    :param size: The smallest integer width holding every value
     '''
     __readonly = False
 
@@ -17,6 +55,9 @@ class Enum(object):
         for key in args:
             self._add_enum(key)
 
+        self.names  = dict(self._fields)
+        self.values = dict([(v, k) for k, v in self._fields.iteritems()])
+        self.size   = _get_width(self.values.keys())
         self.__readonly = True
 
     def _add_enum(self, value, index=-1):
@@ -24,7 +65,7 @@ class Enum(object):
         if count == -1:
             count = self.__count
             self.__count += 1
-        self._fields[value] = count 
+        self._fields[value] = count
         setattr(self, value, count)
 
     def _exception(self):
@@ -34,16 +75,23 @@ class Enum(object):
         raise AttributeError('Cannot Modify Enumeration')
 
     def _lookup(self, index):
-        if isinstance(index, str):
-            return self._fields[index]
-        else:
-            for k,v in self._fields.iteritems():
-                if index == v: return k
-        raise KeyError
-
-    #-----------------------------------------------------------------------# 
+        ''' Lookup the value of a name or the name of a value
+        :param index: The name or value to lookup
+        :return: The matching value or name
+        '''
+        if isinstance(index, basestring):
+            return self.names[index]
+        return self.values[index]
+
+    def get_default(self):
+        ''' Retrieve the default value of the enumeration
+        :return: The smallest value (or None if there are none)
+        '''
+        return min(self.values) if self.values else None
+
+    #-----------------------------------------------------------------------#
     # The Candy
-    #-----------------------------------------------------------------------# 
+    #-----------------------------------------------------------------------#
     def __setattr__(self, key, value):
         ''' Helper to block writing to the fields
         '''
@@ -51,11 +99,16 @@ class Enum(object):
             self._exception()
         super(Enum, self).__setattr__(key, value)
 
-    __delattr__ = lambda s, i: s._exception()
-    __delitem__ = lambda s, i: s._exception()
-    __setitem__ = lambda s, k, v: s._exception()
-    __getitem__ = lambda s, k: s._lookup(k)
-    __call__    = lambda s, k: s._lookup(k)
-    __len__     = lambda s: len(s._fields)
-    __iter__    = lambda s: iter(s._fields)
+    __delattr__  = lambda s, i: s._exception()
+    __delitem__  = lambda s, i: s._exception()
+    __setitem__  = lambda s, k, v: s._exception()
+    __getitem__  = lambda s, k: s._lookup(k)
+    __call__     = lambda s, k: s._lookup(k)
+    __contains__ = lambda s, k: k in s.names or k in s.values
+    __len__      = lambda s: len(s._fields)
+    __iter__     = lambda s: iter(s._fields)
 
+#---------------------------------------------------------------------------#
+# Exported Symbols
+#---------------------------------------------------------------------------#
+__all__ = ( 'Enum', )
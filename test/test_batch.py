@@ -0,0 +1,111 @@
+import unittest
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.core.exceptions import ConfigurationException
+
+try:
+    import numpy
+    from rosetta.core.batch import MessageBatch
+except ImportError:
+    numpy = None
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+class BatchQuote(Message):
+    symbol   = StringField(size=8)
+    filler   = PaddingField(size=2)
+    active   = BoolField()
+    count    = IntField(size=4)
+    account  = IntField(size=6)
+    price    = FloatField(size=8)
+    levels   = IntField(size=4, repeated=True, count=3)
+
+class BatchLittle(Message):
+    sequence = IntField(size=4)
+    price    = FloatField(size=8)
+    levels   = FloatField(size=8, repeated=True, count=2)
+
+    class Meta:
+        byte_order = '<'
+
+def _quotes(count):
+    return [BatchQuote(symbol='Q%d' % i, active=i % 2 == 0, count=i, account=100 + i,
+        price=i + 0.5, levels=[i, i + 1, i + 2]) for i in range(count)]
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class MessageBatchTest(unittest.TestCase):
+    '''
+    This is the unittest for the columnar message batches
+    '''
+
+    def setUp(self):
+        if numpy is None: self.skipTest('numpy is not installed')
+        self.codec = BatchQuote._meta.get_codec()
+
+    def _assertQuote(self, result, expected):
+        for name in ('symbol', 'active', 'count', 'account', 'price'):
+            self.assertEqual(getattr(result, name), getattr(expected, name))
+        self.assertEqual(list(result.levels), list(expected.levels))
+
+    def testFromBuffer(self):
+        ''' Test decoding a buffer of records in one call '''
+        quotes = _quotes(4)
+        data = ''.join([self.codec.pack(q) for q in quotes])
+        batch = MessageBatch.from_buffer(BatchQuote, 'xx' + data, offset=2)
+        self.assertEqual(len(batch), 4)
+        self.assertEqual(batch.column('count').tolist(), [0, 1, 2, 3])
+        self.assertEqual(batch.column('symbol').tolist(), ['Q0', 'Q1', 'Q2', 'Q3'])
+        self.assertEqual(batch.column('account').tolist(), [100, 101, 102, 103])
+        self.assertEqual(batch.column('levels')[2].tolist(), [2, 3, 4])
+        self.assertEqual(len(MessageBatch.from_buffer(BatchQuote, data, count=2)), 2)
+        self.assertEqual(batch.encode(), data)
+
+    def testFromMessages(self):
+        ''' Test that a batch of messages round trips '''
+        quotes = _quotes(3)
+        batch = MessageBatch.from_messages(BatchQuote, quotes)
+        self.assertEqual(batch.encode(), ''.join([self.codec.pack(q) for q in quotes]))
+        for result, expected in zip(batch, quotes):
+            self._assertQuote(result, expected)
+        self._assertQuote(batch[-1], quotes[2])
+        self.assertEqual(len(batch.to_messages()), 3)
+        self.assertRaises(IndexError, batch.__getitem__, 3)
+
+    def testSetItem(self):
+        ''' Test storing a message into a record '''
+        batch = MessageBatch(BatchQuote, 2)
+        quote = _quotes(2)[1]
+        batch[-1] = quote
+        self._assertQuote(batch[1], quote)
+        self.assertEqual(batch.column('price').tolist(), [0.0, 1.5])
+        self.assertRaises(IndexError, batch.__setitem__, 2, quote)
+
+    def testByteOrder(self):
+        ''' Test the records of a little endian message '''
+        codec = BatchLittle._meta.get_codec()
+        messages = [BatchLittle(sequence=i, price=i * 2.0, levels=[i, -i]) for i in range(3)]
+        batch = MessageBatch.from_buffer(BatchLittle, ''.join([codec.pack(m) for m in messages]))
+        self.assertEqual(batch.column('sequence').tolist(), [0, 1, 2])
+        self.assertEqual(batch.column('levels')[1].tolist(), [1.0, -1.0])
+        self.assertEqual([m.price for m in batch], [0.0, 2.0, 4.0])
+
+    def testStridedRecords(self):
+        ''' Test wrapping records that are not contiguous '''
+        batch = MessageBatch.from_messages(BatchQuote, _quotes(4))
+        strided = MessageBatch(BatchQuote, records=batch.records[::2])
+        self.assertEqual([m.count for m in strided], [0, 2])
+        self.assertEqual(strided[1].symbol, 'Q2')
+
+    def testInvalidRecords(self):
+        ''' Test the records and messages a batch cannot hold '''
+        records = MessageBatch(BatchLittle, 2).records
+        self.assertRaises(ConfigurationException, MessageBatch, BatchQuote, records=records)
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
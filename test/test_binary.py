@@ -0,0 +1,80 @@
+import unittest
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.format.binary import BinarySerializer
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+class BinaryTick(Message):
+    symbol   = StringField(size=8)
+    sequence = IntField(size=4)
+
+class BinaryLevel(Message):
+    price    = FloatField(size=8)
+
+def _ticks(count):
+    return [BinaryTick(symbol='T%d' % i, sequence=i) for i in range(count)]
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class BinarySerializerTest(unittest.TestCase):
+    '''
+    This is the unittest for the fixed width binary serializer
+    '''
+
+    def testRoundTrip(self):
+        ''' Test a single record round trip '''
+        data = BinarySerializer.serialize(BinaryTick(symbol='IBM', sequence=5))
+        self.assertEqual(len(data), BinarySerializer.record_size(BinaryTick))
+        result = BinarySerializer.deserialize(data, BinaryTick)
+        self.assertEqual((result.symbol, result.sequence), ('IBM', 5))
+
+    def testSerializeMany(self):
+        ''' Test encoding many records into one buffer '''
+        messages = _ticks(3) + [BinaryLevel(price=1.5)]
+        buffer = BinarySerializer.serialize_many(messages)
+        self.assertTrue(isinstance(buffer, bytearray))
+        self.assertEqual(str(buffer), ''.join([BinarySerializer.serialize(m)
+            for m in messages]))
+
+    def testPackManyInto(self):
+        ''' Test encoding many records into a supplied buffer '''
+        size = BinarySerializer.record_size(BinaryTick)
+        buffer = bytearray(2 + 3 * size)
+        self.assertEqual(BinarySerializer.pack_many_into(_ticks(3), buffer, 2), 2 + 3 * size)
+        self.assertEqual(BinarySerializer.unpack_from(BinaryTick, buffer, 2 + size).sequence, 1)
+
+    def testDeserializeMany(self):
+        ''' Test decoding every record of a buffer '''
+        buffer = BinarySerializer.serialize_many(_ticks(4))
+        result = list(BinarySerializer.deserialize_many(buffer, BinaryTick))
+        self.assertEqual([m.sequence for m in result], range(4))
+        size = BinarySerializer.record_size(BinaryTick)
+        result = list(BinarySerializer.deserialize_many(buffer, BinaryTick, size, 2))
+        self.assertEqual([m.symbol for m in result], ['T1', 'T2'])
+
+    def testDeserializeIntoTargets(self):
+        ''' Test decoding a buffer into existing messages '''
+        buffer = BinarySerializer.serialize_many(_ticks(2))
+        targets = [BinaryTick(), BinaryTick()]
+        result = list(BinarySerializer.deserialize_many(buffer, BinaryTick, targets=targets))
+        self.assertTrue(result[0] is targets[0] and result[1] is targets[1])
+        self.assertEqual(targets[1].sequence, 1)
+
+    def testDecodeMany(self):
+        ''' Test decoding a list of separate packets '''
+        packets = [BinarySerializer.serialize(m) for m in _ticks(3)]
+        result = BinarySerializer.decode_many(BinaryTick, iter(packets))
+        self.assertEqual([m.sequence for m in result], range(3))
+        targets = [BinaryTick(), BinaryTick()]
+        result = list(BinarySerializer.decode_many(BinaryTick, packets[1:], targets))
+        self.assertTrue(result[0] is targets[0] and result[1] is targets[1])
+        self.assertEqual(targets[1].symbol, 'T2')
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.core.exceptions import ConfigurationException, EncodeException
+from rosetta.utils.enum import Enum
+
+try:
+    import numpy
+    from rosetta.core.batch import MessageBatch
+except ImportError:
+    numpy = None
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+BitsSide = Enum('Buy', 'Sell', 'Short')
+
+class BitsReport(Message):
+    is_open  = BoolField(bits=1)
+    is_short = BoolField(bits=1)
+    side     = EnumField(enum=BitsSide, bits=2)
+    venue    = IntField(bits=3)
+    quantity = IntField(size=4)
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class BitFieldTest(unittest.TestCase):
+    '''
+    This is the unittest for the bit packed fields
+    '''
+
+    def setUp(self):
+        self.codec = BitsReport._meta.get_codec()
+
+    def testRoundTrip(self):
+        ''' Test that the bit fields share a single byte '''
+        report = BitsReport(is_open=True, side=BitsSide.Short, venue=7, quantity=9)
+        data = self.codec.pack(report)
+        self.assertEqual(self.codec.size, 5)
+        self.assertEqual(data[0], chr(1 | 2 << 2 | 7 << 4))
+        result = self.codec.unpack_from(data)
+        self.assertEqual((result.is_open, result.is_short, result.side, result.venue,
+            result.quantity), (True, False, BitsSide.Short, 7, 9))
+
+    def testBooleans(self):
+        ''' Test that booleans are packed by their truth '''
+        result = self.codec.unpack_from(self.codec.pack(BitsReport(is_open=2, is_short=0)))
+        self.assertEqual((result.is_open, result.is_short), (True, False))
+
+    def testOverflow(self):
+        ''' Test that values outside of their bits raise '''
+        for value in (8, -1, 1 << 40):
+            self.assertRaises(EncodeException, self.codec.pack, BitsReport(venue=value))
+        buffer = bytearray(self.codec.size)
+        self.assertRaises(EncodeException, self.codec.pack_into, buffer, 0,
+            BitsReport(side=4))
+
+    def testInvalid(self):
+        ''' Test the fields that cannot be packed as bits '''
+        def compile(index, field):
+            attrs = { '__module__':__name__, 'value':field }
+            type('BitsInvalid%d' % index, (Message,), attrs)._meta.get_codec()
+        for index, field in enumerate((StringField(size=4, bits=2), IntField(bits=0),
+            EnumField(enum=BitsSide, bits=1))):
+            self.assertRaises(ConfigurationException, compile, index, field)
+
+    def testBatchColumns(self):
+        ''' Test the vectorized columns of the bit fields '''
+        if numpy is None: return
+        batch = MessageBatch.from_messages(BitsReport, [BitsReport(is_open=True, venue=3),
+            BitsReport(side=BitsSide.Sell, venue=5)])
+        self.assertEqual(batch.column('is_open').tolist(), [True, False])
+        self.assertEqual(batch.column('side').tolist(), [0, 1])
+        self.assertEqual(batch.column('venue').tolist(), [3, 5])
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import struct
+import unittest
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.core.exceptions import ConfigurationException, EncodeException
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+class CodecQuote(Message):
+    symbol  = StringField(size=8)
+    side    = CharField()
+    filler  = PaddingField(size=2)
+    active  = BoolField()
+    tiny    = IntField(size=1)
+    short   = IntField(size=2)
+    count   = IntField(size=4)
+    volume  = IntField(size=8)
+    price   = FloatField(size=8)
+    ratio   = FloatField(size=4)
+
+class CodecAscii(Message):
+    account = IntField(size=6)
+    price   = FloatField(size=9, precision=3)
+
+    class Meta:
+        byte_order = '<'
+
+class CodecPadded(Message):
+    count   = IntField(size=2)
+
+    class Meta:
+        total_size = 16
+
+class CodecUnsized(Message):
+    name    = StringField()
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class CodecTest(unittest.TestCase):
+    '''
+    This is the unittest for the compiled binary codec
+    '''
+
+    def setUp(self):
+        self.quote = CodecQuote(symbol='IBM', side='B', active=True, tiny=-5,
+            short=300, count=70000, volume=2 ** 40, price=101.25, ratio=0.5)
+
+    def testRoundTrip(self):
+        ''' Test that every field type survives a round trip '''
+        codec = CodecQuote._meta.get_codec()
+        data = codec.pack(self.quote)
+        self.assertEqual(len(data), codec.size)
+        result = codec.unpack_from(data)
+        self.assertTrue(isinstance(result, CodecQuote))
+        for name in CodecQuote._meta.get_all_field_names():
+            self.assertEqual(getattr(result, name), getattr(self.quote, name))
+
+    def testPackIntoOffset(self):
+        ''' Test packing into and unpacking from a buffer offset '''
+        codec = CodecQuote._meta.get_codec()
+        buffer = bytearray(5 + codec.size)
+        self.assertEqual(codec.pack_into(buffer, 5, self.quote), 5 + codec.size)
+        self.assertEqual(str(buffer[5:]), codec.pack(self.quote))
+        target = CodecQuote()
+        result = codec.unpack_from(buffer, 5, target)
+        self.assertTrue(result is target)
+        self.assertEqual(result.volume, 2 ** 40)
+
+    def testPackIntoSmallBuffer(self):
+        ''' Test that a short buffer is refused '''
+        codec = CodecQuote._meta.get_codec()
+        self.assertRaises(struct.error, codec.pack_into,
+            bytearray(codec.size - 1), 0, self.quote)
+
+    def testAsciiRoundTrip(self):
+        ''' Test the zero padded ascii number fields '''
+        codec = CodecAscii._meta.get_codec()
+        data = codec.pack(CodecAscii(account=42, price=1.5))
+        self.assertEqual(data, '00004200001.500')
+        result = codec.unpack_from(data)
+        self.assertEqual((result.account, result.price), (42, 1.5))
+
+    def testAsciiOverflow(self):
+        ''' Test that too many digits raise instead of truncating '''
+        codec = CodecAscii._meta.get_codec()
+        self.assertRaises(EncodeException, codec.pack, CodecAscii(account=1234567))
+        self.assertRaises(EncodeException, codec.pack, CodecAscii(price=123456.0))
+        self.assertRaises(EncodeException, codec.pack_into,
+            bytearray(codec.size), 0, CodecAscii(account=-123456))
+
+    def testStringOverflow(self):
+        ''' Test that overlong strings raise instead of truncating '''
+        codec = CodecQuote._meta.get_codec()
+        result = codec.unpack_from(codec.pack(CodecQuote(symbol='EIGHTCHR', side='S')))
+        self.assertEqual((result.symbol, result.side), ('EIGHTCHR', 'S'))
+        self.assertRaises(EncodeException, codec.pack, CodecQuote(symbol='NINECHARS'))
+        self.assertRaises(EncodeException, codec.pack, CodecQuote(side='BS'))
+        self.assertRaises(EncodeException, codec.pack_into,
+            bytearray(codec.size), 0, CodecQuote(symbol='TOOLONGVALUE'))
+
+    def testStructOverflow(self):
+        ''' Test that out of range binary numbers raise '''
+        codec = CodecQuote._meta.get_codec()
+        self.assertRaises(struct.error, codec.pack, CodecQuote(tiny=128))
+
+    def testTotalSize(self):
+        ''' Test that the total size pads the record '''
+        codec = CodecPadded._meta.get_codec()
+        data = codec.pack(CodecPadded(count=7))
+        self.assertEqual(len(data), 16)
+        self.assertEqual(codec.unpack_from(data).count, 7)
+
+    def testUnsizedField(self):
+        ''' Test that a field without a size has no codec '''
+        self.assertRaises(ConfigurationException, CodecUnsized._meta.get_codec)
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.core.exceptions import ConfigurationException, DecodeException
+from rosetta.core.exceptions import EncodeException
+from rosetta.format.delta import DeltaEncoder, DeltaDecoder
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+class DeltaQuote(Message):
+    symbol   = StringField(size=8)
+    bid      = FloatField(size=8)
+    ask      = FloatField(size=8)
+    volume   = IntField(size=8)
+    levels   = IntField(size=4, repeated=True, count=3)
+    halted   = BoolField(bits=1)
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class DeltaTest(unittest.TestCase):
+    '''
+    This is the unittest for the per key delta encoding
+    '''
+
+    def setUp(self):
+        self.encoder = DeltaEncoder(DeltaQuote)
+        self.decoder = DeltaDecoder(DeltaQuote)
+        self.quote = DeltaQuote(symbol='IBM', bid=1.5, ask=2.5, volume=10,
+            levels=[1, 2, 3], halted=True)
+
+    def _assertQuote(self, result, expected):
+        for name in ('symbol', 'bid', 'ask', 'volume', 'halted'):
+            self.assertEqual(getattr(result, name), getattr(expected, name))
+        self.assertEqual(list(result.levels), list(expected.levels))
+
+    def testRoundTrip(self):
+        ''' Test that the first record of a key is complete '''
+        data = self.encoder.encode(self.quote)
+        self._assertQuote(self.decoder.decode(data), self.quote)
+
+    def testChangesOnly(self):
+        ''' Test that later records only hold the changed fields '''
+        first = self.encoder.encode(self.quote)
+        self.decoder.decode(first)
+        self.quote.bid = 1.75
+        self.quote.levels[0] = 9
+        second = self.encoder.encode(self.quote)
+        self.assertTrue(len(second) < len(first))
+        self._assertQuote(self.decoder.decode(second), self.quote)
+        third = self.encoder.encode(self.quote)
+        self._assertQuote(self.decoder.decode(third), self.quote)
+        self.assertTrue(len(third) < len(second))
+
+    def testManyKeys(self):
+        ''' Test a stream of records of several keys '''
+        quotes = [DeltaQuote(symbol=s, volume=v) for s, v in
+            (('IBM', 1), ('MSFT', 2), ('IBM', 3), ('MSFT', 2))]
+        result = list(self.decoder.decode_many(self.encoder.encode_many(quotes)))
+        self.assertEqual([(m.symbol, m.volume) for m in result],
+            [('IBM', 1), ('MSFT', 2), ('IBM', 3), ('MSFT', 2)])
+
+    def testMissingState(self):
+        ''' Test that a change record without its base raises '''
+        self.encoder.encode(self.quote)
+        self.quote.ask = 3.0
+        data = self.encoder.encode(self.quote)
+        self.assertRaises(DecodeException, self.decoder.decode, data)
+
+    def testFailedEncode(self):
+        ''' Test that a message that fails to encode is not remembered '''
+        quote = DeltaQuote(symbol='IBM', volume=1, levels=[1, 2, 3])
+        self.decoder.decode(self.encoder.encode(quote))
+        quote.volume, quote.levels = 5, [1, 2, 3, 4]
+        self.assertRaises(EncodeException, self.encoder.encode, quote)
+        quote.levels = [2, 3, 4]
+        self._assertQuote(self.decoder.decode(self.encoder.encode(quote)), quote)
+
+    def testLongKey(self):
+        ''' Test that a key longer than the key field raises '''
+        self.assertRaises(EncodeException, self.encoder.encode,
+            DeltaQuote(symbol='IBMLONGKEY'))
+        self.assertEqual(self.encoder.state, {})
+
+    def testReset(self):
+        ''' Test that a reset encoder sends a complete record again '''
+        self.encoder.encode(self.quote)
+        self.encoder.reset('IBM')
+        self._assertQuote(self.decoder.decode(self.encoder.encode(self.quote)), self.quote)
+        self.decoder.reset()
+        self.assertEqual(self.decoder.state, {})
+
+    def testInvalidKey(self):
+        ''' Test that the key must be a field of the message '''
+        self.assertRaises(ConfigurationException, DeltaEncoder, DeltaQuote, 'missing')
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import struct
+import unittest
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.core.dispatch import registry, MessageRegistry, HeaderDispatcher
+from rosetta.core.exceptions import ConfigurationException
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+class DispatchNew(Message):
+    kind     = IntField(size=2, value=31)
+    quantity = IntField(size=4)
+
+    class Meta:
+        type_id = 31
+
+class DispatchCancel(Message):
+    kind     = IntField(size=2, value=32)
+    order_id = IntField(size=8)
+
+    class Meta:
+        type_id = 32
+        encoded_name = 'DispatchKill'
+
+def _declare(module, name='DispatchOrder', **meta):
+    ''' Helper to declare a message type in another module '''
+    return type(name, (Message,), { '__module__':module,
+        'quantity':IntField(size=4), 'Meta':type('Meta', (), meta) })
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class DispatchTest(unittest.TestCase):
+    '''
+    This is the unittest for the message dispatch index
+    '''
+
+    def testLookup(self):
+        ''' Test finding the messages by their discriminators '''
+        self.assertTrue(registry.get_message('DispatchNew') is DispatchNew)
+        self.assertTrue(registry.get_message(31) is DispatchNew)
+        self.assertTrue(registry.get_message('DispatchKill') is DispatchCancel)
+        self.assertTrue(registry.get_message('DispatchCancel') is None)
+        self.assertTrue(registry.get_codec(32) is DispatchCancel._meta.get_codec())
+        self.assertTrue(registry.get_codec(9999) is None)
+        self.assertTrue(32 in registry)
+
+    def testCollision(self):
+        ''' Test that two messages cannot share an explicit discriminator '''
+        first = _declare('dispatch_first', encoded_name='DispatchOrder')
+        self.assertTrue(registry.get_message('DispatchOrder') is first)
+        self.assertRaises(ConfigurationException, _declare, 'dispatch_second',
+            encoded_name='DispatchOrder')
+        self.assertRaises(ConfigurationException, _declare, 'dispatch_third',
+            'DispatchOther', type_id=31)
+        self.assertTrue(registry.get_message('DispatchOrder') is first)
+        self.assertTrue(registry.get_message('DispatchOther') is None)
+
+    def testSameClassName(self):
+        ''' Test that two applications may declare the same class name '''
+        first = _declare('dispatch_feed.messages', 'DispatchBeat')
+        self.assertTrue(registry.get_message('DispatchBeat') is first)
+        second = _declare('dispatch_orders.messages', 'DispatchBeat')
+        self.assertTrue('DispatchBeat' in registry)
+        self.assertRaises(ConfigurationException, registry.get_message, 'DispatchBeat')
+        self.assertTrue(registry.get_message('DispatchBeat', 'dispatch_feed') is first)
+        self.assertTrue(registry.get_message('DispatchBeat', 'dispatch_orders') is second)
+        self.assertTrue(registry.get_message('DispatchBeat', 'dispatch_other') is None)
+
+    def testRedeclare(self):
+        ''' Test that declaring the same message again replaces it '''
+        first = _declare(__name__, 'DispatchReloaded')
+        second = _declare(__name__, 'DispatchReloaded')
+        self.assertTrue(registry.get_message('DispatchReloaded') is second)
+
+    def testSeparateRegistry(self):
+        ''' Test a registry of its own '''
+        index = MessageRegistry()
+        index.register(DispatchNew)
+        self.assertTrue(index.get_message(31) is DispatchNew)
+        self.assertTrue(index.get_message(32) is None)
+
+    def testHeaderDispatcher(self):
+        ''' Test decoding records by the type id in their header '''
+        dispatcher = HeaderDispatcher('!H', offset=0)
+        data = DispatchNew._meta.get_codec().pack(DispatchNew(quantity=5)) \
+             + DispatchCancel._meta.get_codec().pack(DispatchCancel(order_id=77))
+        first = dispatcher.decode(data)
+        second = dispatcher.decode(data, DispatchNew._meta.get_codec().size)
+        self.assertEqual((first.__class__, first.quantity), (DispatchNew, 5))
+        self.assertEqual((second.__class__, second.order_id), (DispatchCancel, 77))
+        self.assertRaises(KeyError, dispatcher.decode, struct.pack('!H', 9999))
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.core.exceptions import ConfigurationException
+from rosetta.core.exceptions import EncodeException, DecodeException
+from rosetta.format.json import JsonSerializer
+from rosetta.format.xml import XmlSerializer
+from rosetta.format.yaml import YamlSerializer
+from rosetta.utils.enum import Enum
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+EnumSide = Enum('Buy', 'Sell', SellShort=5)
+
+class EnumOrder(Message):
+    side     = EnumField(enum=EnumSide)
+    wide     = EnumField(enum=EnumSide, size=4)
+    digits   = EnumField(enum=EnumSide, size=3)
+    sides    = EnumField(enum=EnumSide, repeated=True, count=2)
+    flag     = EnumField(enum=Enum('Off', 'On'), bits=3)
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class EnumTest(unittest.TestCase):
+    '''
+    This is the unittest for the enumerated types
+    '''
+
+    def testTables(self):
+        ''' Test the forward and reverse tables '''
+        self.assertEqual((EnumSide.Buy, EnumSide.Sell, EnumSide.SellShort), (0, 1, 5))
+        self.assertEqual(EnumSide.names, { 'Buy':0, 'Sell':1, 'SellShort':5 })
+        self.assertEqual(EnumSide.values, { 0:'Buy', 1:'Sell', 5:'SellShort' })
+        self.assertEqual((EnumSide['Sell'], EnumSide[5], EnumSide('Buy')), (1, 'SellShort', 0))
+        self.assertRaises(KeyError, EnumSide.__getitem__, 2)
+        self.assertTrue('Buy' in EnumSide and 5 in EnumSide and 2 not in EnumSide)
+        self.assertEqual((len(EnumSide), sorted(EnumSide)), (3, ['Buy', 'Sell', 'SellShort']))
+        self.assertEqual(EnumSide.get_default(), 0)
+        self.assertTrue(Enum().get_default() is None)
+
+    def testSize(self):
+        ''' Test the smallest width holding every value '''
+        self.assertEqual(EnumSide.size, 1)
+        self.assertEqual(Enum(Low=-128, High=127).size, 1)
+        self.assertEqual(Enum(High=128).size, 2)
+        self.assertEqual(Enum(Low=-(1 << 31) - 1).size, 8)
+        self.assertRaises(ValueError, Enum, High=1 << 63)
+
+    def testReadOnly(self):
+        ''' Test that an enumeration cannot be changed '''
+        self.assertRaises(AttributeError, setattr, EnumSide, 'Buy', 3)
+        self.assertRaises(AttributeError, EnumSide.__setitem__, 'Hold', 3)
+        self.assertRaises(AttributeError, delattr, EnumSide, 'Buy')
+
+class EnumFieldTest(unittest.TestCase):
+    '''
+    This is the unittest for the enum fields and their formats
+    '''
+
+    def testField(self):
+        ''' Test the defaults of an enum field '''
+        field = EnumOrder._meta.get_field('side')
+        self.assertEqual((field.size, field.get_default(), field.get_type_name()),
+            (1, 0, 'enum'))
+        self.assertEqual(EnumOrder._meta.get_field('wide').size, 4)
+        self.assertRaises(ConfigurationException, EnumField)
+
+    def testCodec(self):
+        ''' Test the binary codec of the enum fields '''
+        codec = EnumOrder._meta.get_codec()
+        order = EnumOrder(side=5, wide=1, digits=5, sides=[1, 5], flag=1)
+        result = codec.unpack_from(codec.pack(order))
+        self.assertEqual((result.side, result.wide, result.digits, list(result.sides),
+            result.flag), (5, 1, 5, [1, 5], 1))
+        for changes in ({ 'side':2 }, { 'wide':-1 }, { 'digits':7 }, { 'sides':[0, 3] },
+            { 'flag':2 }):
+            self.assertRaises(EncodeException, codec.pack, EnumOrder(**changes))
+
+    def testTextFormats(self):
+        ''' Test that the text formats refuse unknown enum values '''
+        for serializer in (JsonSerializer, XmlSerializer, YamlSerializer):
+            order = EnumOrder(side=5, sides=[1, 0])
+            result = serializer.deserialize(serializer.serialize(order))
+            self.assertEqual((result.side, list(result.sides)), (5, [1, 0]))
+            self.assertRaises(EncodeException, serializer.serialize, EnumOrder(side=7))
+            self.assertRaises(EncodeException, serializer.serialize, EnumOrder(sides=[7]))
+
+    def testDecodeValues(self):
+        ''' Test decoding enum names, values and unknown values '''
+        self.assertEqual(XmlSerializer.deserialize('<EnumOrder><side>5</side></EnumOrder>').side, 5)
+        self.assertEqual(XmlSerializer.deserialize('<EnumOrder><side>Sell</side></EnumOrder>').side, 1)
+        self.assertEqual(YamlSerializer.deserialize('{name: EnumOrder, data: {side: 5}}').side, 5)
+        self.assertEqual(JsonSerializer.deserialize('{"name":"EnumOrder","data":{"side":1}}').side, 1)
+        self.assertRaises(DecodeException, XmlSerializer.deserialize,
+            '<EnumOrder><side>Hold</side></EnumOrder>')
+        self.assertRaises(DecodeException, YamlSerializer.deserialize,
+            '{name: EnumOrder, data: {side: 7}}')
+        self.assertRaises(DecodeException, JsonSerializer.deserialize,
+            '{"name":"EnumOrder","data":{"sides":["Buy","Hold"]}}')
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
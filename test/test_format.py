@@ -0,0 +1,112 @@
+import unittest
+from rosetta import format
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.core.exceptions import ConfigurationException
+from rosetta.format.base import FormatStats
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+class FormatTick(Message):
+    symbol   = StringField(size=8)
+    sequence = IntField(size=4)
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class FormatRegistryTest(unittest.TestCase):
+    '''
+    This is the unittest for the lazy format registry
+    '''
+
+    def testGetFormat(self):
+        ''' Test retrieving the registered formats '''
+        from rosetta.format.binary import BinarySerializer
+        self.assertTrue(format.get_format('binary') is BinarySerializer)
+        self.assertRaises(ConfigurationException, format.get_format, 'missing')
+
+    def testAvailable(self):
+        ''' Test listing the formats without importing them '''
+        format.register_format('test-missing', 'test.missing', 'Missing',
+            ('no_such_module_here',))
+        self.assertFalse(format.is_available('test-missing'))
+        self.assertTrue('test-missing' in format.registered_formats())
+        self.assertFalse('test-missing' in format.available_formats())
+        self.assertTrue('json' in format.available_formats())
+
+class FormatStatsTest(unittest.TestCase):
+    '''
+    This is the unittest for the format instrumentation
+    '''
+
+    def setUp(self):
+        self.stats = FormatStats()
+        format.set_stats(self.stats)
+
+    def tearDown(self):
+        format.set_stats(None)
+
+    def testRecordsFormats(self):
+        ''' Test that the registered serializers record their calls '''
+        message = FormatTick(symbol='IBM', sequence=3)
+        binary, json = format.get_format('binary'), format.get_format('json')
+        data = binary.serialize(message)
+        self.assertEqual(binary.deserialize(data, FormatTick).sequence, 3)
+        text = json.serialize(message)
+        json.deserialize(text)
+        json.deserialize(text)
+
+        result = self.stats.snapshot()
+        self.assertEqual(result[('binary', 'FormatTick')]['count'], 2)
+        self.assertEqual(result[('binary', 'FormatTick')]['bytes'], 2 * len(data))
+        self.assertEqual(result[('json', 'FormatTick')]['count'], 3)
+        self.assertEqual(sorted(result[('json', 'FormatTick')]['phases']),
+            ['decode', 'encode'])
+
+    def testPassThrough(self):
+        ''' Test that the other serializer methods still work '''
+        binary = format.get_format('binary')
+        buffer = bytearray(binary.record_size(FormatTick))
+        binary.pack_into(FormatTick(sequence=8), buffer)
+        self.assertEqual(binary.unpack_from(FormatTick, buffer).sequence, 8)
+
+    def testRecordsBulkPaths(self):
+        ''' Test that the zero copy and bulk paths are recorded '''
+        binary = format.get_format('binary')
+        messages = [FormatTick(sequence=i) for i in range(4)]
+        size = binary.record_size(FormatTick)
+        buffer = bytearray(size)
+        binary.pack_into(messages[0], buffer)
+        binary.unpack_from(FormatTick, buffer)
+        data = binary.serialize_many(messages)
+        binary.pack_many_into(messages, bytearray(len(data)))
+        decoded = binary.deserialize_many(data, FormatTick)
+        self.assertEqual([m.sequence for m in decoded], range(4))
+
+        result = self.stats.snapshot()[('binary', 'FormatTick')]
+        self.assertEqual(result['count'], 2 + 4 + 4 + 4)
+        self.assertEqual(result['bytes'], size + 2 * len(data))
+        self.assertEqual(sorted(result['phases']),
+            ['decode_many', 'encode_many', 'pack', 'unpack'])
+
+    def testRecordsOtherValues(self):
+        ''' Test that values which are not messages are recorded by type '''
+        pickle = format.get_format('pickle')
+        self.assertEqual(pickle.deserialize(pickle.serialize({'a':1})), {'a':1})
+        result = self.stats.snapshot()[('pickle', 'dict')]
+        self.assertEqual(result['count'], 2)
+
+    def testDisabled(self):
+        ''' Test that nothing is wrapped once the stats are removed '''
+        from rosetta.format.json import JsonSerializer
+        format.set_stats(None)
+        self.assertTrue(format.get_format('json') is JsonSerializer)
+        self.stats.reset()
+        self.assertEqual(self.stats.snapshot(), {})
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import struct
+import unittest
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.core.exceptions import ConfigurationException, DecodeException
+from rosetta.protocol.framer import *
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+class FramerTick(Message):
+    symbol   = StringField(size=4)
+    sequence = IntField(size=4)
+
+class FramerSparse(Message):
+    symbol   = StringField(size=4)
+    comment  = StringField(size=8, optional=True)
+
+class FramerEmpty(Message):
+    pass
+
+def _ticks(count):
+    codec = FramerTick._meta.get_codec()
+    return ''.join([codec.pack(FramerTick(symbol='T%d' % i, sequence=i))
+        for i in range(count)])
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class FrameBufferTest(unittest.TestCase):
+    '''
+    This is the unittest for the reusable receive buffer
+    '''
+
+    def testGrowAndCompact(self):
+        ''' Test that the unread data survives growing and compacting '''
+        buffer = FrameBuffer(4)
+        buffer.write('abc')
+        buffer.consume(2)
+        buffer.write('defgh')
+        self.assertEqual(len(buffer), 6)
+        self.assertEqual(buffer.view[buffer.start:buffer.end].tobytes(), 'cdefgh')
+        buffer.consume(6)
+        self.assertEqual((buffer.start, buffer.end), (0, 0))
+
+class FixedSizeFramerTest(unittest.TestCase):
+    '''
+    This is the unittest for the fixed width record framer
+    '''
+
+    def testSplitChunks(self):
+        ''' Test that frames split over chunks are reassembled '''
+        framer, data, result = FixedSizeFramer(FramerTick, size=8), _ticks(5), []
+        for index in range(0, len(data), 3):
+            result.extend(framer.feed(data[index:index + 3]))
+        self.assertEqual([m.sequence for m in result], range(5))
+        self.assertEqual(len(framer.buffer), 0)
+
+    def testViews(self):
+        ''' Test decoding the frames to views '''
+        framer = FixedSizeFramer(FramerTick, views=True)
+        self.assertEqual([v.symbol for v in framer.feed(_ticks(2))], ['T0', 'T1'])
+
+    def testInvalidMessages(self):
+        ''' Test that records without a fixed size are refused '''
+        self.assertRaises(ConfigurationException, FixedSizeFramer, FramerSparse)
+        self.assertRaises(ConfigurationException, FixedSizeFramer, FramerEmpty)
+
+class LengthPrefixFramerTest(unittest.TestCase):
+    '''
+    This is the unittest for the length prefixed framer
+    '''
+
+    def testFrames(self):
+        ''' Test splitting length prefixed frames '''
+        framer = LengthPrefixFramer()
+        data = struct.pack('!H', 3) + 'abc' + struct.pack('!H', 0) + struct.pack('!H', 2)
+        self.assertEqual(list(framer.feed(data)), ['abc', ''])
+        self.assertEqual(list(framer.feed('d')), [])
+        self.assertEqual(list(framer.feed('e')), ['de'])
+
+    def testInclusive(self):
+        ''' Test a length that includes the prefix '''
+        framer = LengthPrefixFramer(prefix='!I', inclusive=True)
+        data = struct.pack('!I', 7) + 'abc' + struct.pack('!I', 4)
+        self.assertEqual(list(framer.feed(data)), ['abc', ''])
+
+    def testMessages(self):
+        ''' Test decoding the frames to messages '''
+        codec = FramerTick._meta.get_codec()
+        framer = LengthPrefixFramer(message_decoder(FramerTick))
+        record = codec.pack(FramerTick(symbol='IBM', sequence=9))
+        result = list(framer.feed(struct.pack('!H', len(record)) + record))
+        self.assertEqual((result[0].symbol, result[0].sequence), ('IBM', 9))
+
+    def testShortInclusiveLength(self):
+        ''' Test that a length smaller than the prefix raises '''
+        framer = LengthPrefixFramer(prefix='!I', inclusive=True)
+        frames = framer.feed(struct.pack('!I', 1) + 'abcd')
+        self.assertRaises(DecodeException, list, frames)
+
+    def testNegativeLength(self):
+        ''' Test that a negative signed length raises '''
+        framer = LengthPrefixFramer(prefix='!h')
+        self.assertRaises(DecodeException, list, framer.feed(struct.pack('!h', -2)))
+
+    def testMaximumSize(self):
+        ''' Test that a frame larger than the maximum raises '''
+        framer = LengthPrefixFramer(prefix='!I', max_size=16)
+        self.assertEqual(list(framer.feed(struct.pack('!I', 16) + 'x' * 16)), ['x' * 16])
+        self.assertRaises(DecodeException, list, framer.feed(struct.pack('!I', 17)))
+
+class DelimiterFramerTest(unittest.TestCase):
+    '''
+    This is the unittest for the delimited framer
+    '''
+
+    def testSplitDelimiter(self):
+        ''' Test a delimiter split over two chunks '''
+        framer = DelimiterFramer(delimiter='\r\n')
+        self.assertEqual(list(framer.feed('first\r\nsec')), ['first'])
+        self.assertEqual(list(framer.feed('ond\r')), [])
+        self.assertEqual(list(framer.feed('\nthird\r\n')), ['second', 'third'])
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+from __future__ import absolute_import
+import json
+import unittest
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.core.exceptions import ConfigurationException, EncodeException
+from rosetta.format import json as backend
+from rosetta.format.json import JsonSerializer
+from rosetta.utils.enum import Enum
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+JsonSide = Enum('Buy', 'Sell')
+
+class JsonOrder(Message):
+    symbol   = StringField(size=8)
+    quantity = IntField(size=4)
+    price    = FloatField(size=8)
+    active   = BoolField()
+    side     = EnumField(enum=JsonSide)
+    levels   = FloatField(size=8, repeated=True, count=4)
+    comment  = StringField(size=16, optional=True)
+
+class JsonNames(Message):
+    accent   = IntField(size=4, encoded_name='caf\xc3\xa9')
+    escaped  = IntField(size=4, encoded_name='a"b\\c')
+
+    class Meta:
+        encoded_name = 'JsonNam\xc3\xa9s'
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class JsonSerializerTest(unittest.TestCase):
+    '''
+    This is the unittest for the schema driven json format
+    '''
+
+    def setUp(self):
+        self.order = JsonOrder(symbol='IBM', quantity=10, price=99.5, active=True,
+            side=JsonSide.Sell, levels=[1.5, 2.5])
+
+    def testRoundTrip(self):
+        ''' Test that every field type survives a round trip '''
+        result = JsonSerializer.deserialize(JsonSerializer.serialize(self.order))
+        self.assertTrue(isinstance(result, JsonOrder))
+        for name in ('symbol', 'quantity', 'price', 'active', 'side', 'comment'):
+            self.assertEqual(getattr(result, name), getattr(self.order, name))
+        self.assertEqual(list(result.levels), [1.5, 2.5])
+        self.assertTrue(isinstance(result.symbol, str))
+
+    def testDocument(self):
+        ''' Test the layout of the json document '''
+        document = json.loads(JsonSerializer.serialize(self.order))
+        self.assertEqual(document['name'], 'JsonOrder')
+        self.assertEqual(document['data']['side'], 'Sell')
+        self.assertEqual(document['data']['levels'], [1.5, 2.5])
+        self.assertFalse('comment' in document['data'])
+        self.order.comment = 'hello'
+        document = json.loads(JsonSerializer.serialize(self.order))
+        self.assertEqual(document['data']['comment'], 'hello')
+
+    def testMissingFields(self):
+        ''' Test that missing fields decode to their defaults '''
+        result = JsonSerializer.deserialize('{"name":"JsonOrder","data":{"quantity":3}}')
+        self.assertEqual((result.quantity, result.symbol, result.side), (3, '', JsonSide.Buy))
+        self.assertEqual(len(result.levels), 0)
+
+    def testEncodedNames(self):
+        ''' Test encoded names that need escaping or are not ascii '''
+        text = JsonSerializer.serialize(JsonNames(accent=1, escaped=2))
+        self.assertEqual(json.loads(text)['data'], { u'caf\xe9':1, u'a"b\\c':2 })
+        result = JsonSerializer.deserialize(text)
+        self.assertTrue(isinstance(result, JsonNames))
+        self.assertEqual((result.accent, result.escaped), (1, 2))
+
+    def testNonFiniteFloats(self):
+        ''' Test that inf and nan are refused on encode '''
+        for value in (float('inf'), float('-inf'), float('nan')):
+            self.order.price = value
+            self.assertRaises(EncodeException, JsonSerializer.serialize, self.order)
+        self.order.price = 1.0
+        self.order.levels = [1.0, float('inf')]
+        self.assertRaises(EncodeException, JsonSerializer.serialize, self.order)
+
+    def testUnknownMessage(self):
+        ''' Test that an unknown message name raises '''
+        self.assertRaises(ConfigurationException, JsonSerializer.deserialize,
+            '{"name":"JsonMissing","data":{}}')
+
+    def testBackend(self):
+        ''' Test plugging in another json library '''
+        previous = backend.backend
+        backend.set_backend(json)
+        try:
+            text = JsonSerializer.serialize(self.order)
+            self.assertEqual(JsonSerializer.deserialize(text).quantity, 10)
+        finally:
+            backend.set_backend(previous)
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
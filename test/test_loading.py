@@ -0,0 +1,106 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from rosetta.core import loading
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.core.exceptions import ConfigurationException
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+class LoadingQuote(Message):
+    price    = IntField(size=4)
+
+    class Meta:
+        app_label = 'loading_quotes'
+
+_LAZY_MESSAGES = '''
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+
+class LoadingLazy(Message):
+    price    = IntField(size=4)
+'''
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class LoadingTest(unittest.TestCase):
+    '''
+    This is the unittest for the message application cache
+    '''
+
+    @classmethod
+    def setUpClass(cls):
+        ''' Write an application that has not been imported yet '''
+        cls.path = tempfile.mkdtemp()
+        package = os.path.join(cls.path, 'loading_lazy')
+        os.mkdir(package)
+        open(os.path.join(package, '__init__.py'), 'w').close()
+        with open(os.path.join(package, 'messages.py'), 'w') as handle:
+            handle.write(_LAZY_MESSAGES)
+        sys.path.insert(0, cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        sys.path.remove(cls.path)
+        shutil.rmtree(cls.path)
+
+    def setUp(self):
+        cache = loading.cache
+        self.state = (cache.installed_apps, cache.module_name, cache.loaded)
+
+    def tearDown(self):
+        cache = loading.cache
+        cache.installed_apps, cache.module_name, cache.loaded = self.state
+        for name in ('loading_lazy', 'loading_missing'):
+            cache.handled.pop(name, None)
+            cache.app_errors.pop(name, None)
+
+    def testGetModel(self):
+        ''' Test that declared messages are registered and found '''
+        self.assertTrue(loading.get_model('loading_quotes', 'LoadingQuote') is LoadingQuote)
+        self.assertTrue(loading.get_model('loading_quotes', 'loadingquote') is LoadingQuote)
+        self.assertTrue(loading.get_model('loading_quotes', 'Missing') is None)
+        self.assertTrue(loading.get_model('loading_nowhere', 'LoadingQuote') is None)
+
+    def testLazyLoading(self):
+        ''' Test that an application is only imported on first access '''
+        loading.configure(['loading_lazy'])
+        self.assertFalse('loading_lazy.messages' in sys.modules)
+        self.assertTrue(loading.get_model('loading_lazy', 'LoadingLazy', False) is None)
+        self.assertFalse('loading_lazy.messages' in sys.modules)
+
+        model = loading.get_model('loading_lazy', 'LoadingLazy')
+        self.assertTrue(model is sys.modules['loading_lazy.messages'].LoadingLazy)
+        self.assertFalse(loading.app_cache_ready())
+        self.assertTrue(loading.get_app('loading_lazy') is sys.modules['loading_lazy.messages'])
+
+    def testUnknownApp(self):
+        ''' Test that unknown and broken applications are reported '''
+        loading.configure(['loading_missing'])
+        self.assertRaises(ConfigurationException, loading.get_app, 'loading_unknown')
+        self.assertRaises(ConfigurationException, loading.get_app, 'loading_missing')
+        self.assertTrue(loading.get_app('loading_missing', emptyOK=True) is None)
+        self.assertTrue('loading_missing' in loading.get_app_errors())
+
+    def testRegisterTwice(self):
+        ''' Test that registering the same message again keeps the first '''
+        loading.register_models('loading_quotes', LoadingQuote)
+        self.assertEqual(loading.cache.app_models['loading_quotes'].values(),
+            [LoadingQuote])
+
+        copy = type('LoadingQuote', (Message,), { '__module__':__name__,
+            'price':IntField(size=4),
+            'Meta':type('Meta', (), { 'app_label':'loading_copies' }) })
+        loading.register_models('loading_quotes', copy)
+        self.assertTrue(loading.get_model('loading_quotes', 'LoadingQuote') is LoadingQuote)
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+class MessageOrder(Message):
+    kind     = IntField(size=2, value=3)
+    symbol   = StringField(size=8)
+    quantity = IntField(size=4)
+    levels   = IntField(size=4, repeated=True, count=4)
+
+class MessageSlots(Message):
+    symbol   = StringField(size=8)
+    quantity = IntField(size=4)
+    levels   = IntField(size=4, repeated=True, count=4)
+
+    class Meta:
+        use_slots = True
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class MessageTest(unittest.TestCase):
+    '''
+    This is the unittest for the generated message initializers
+    '''
+
+    def testDefaults(self):
+        ''' Test that a new message holds the defaults of every field '''
+        for handle in (MessageOrder, MessageSlots):
+            first, second = handle(), handle()
+            self.assertEqual((first.symbol, first.quantity), ('', 0))
+            self.assertFalse(first.levels is second.levels)
+        self.assertEqual(MessageOrder().kind, 3)
+        self.assertTrue(getattr(MessageOrder.__init__, 'generated', False))
+
+    def testArguments(self):
+        ''' Test positional and keyword initialization '''
+        for message in (MessageOrder(3, 'IBM', quantity=10, levels=[1, 2]),
+            MessageSlots('IBM', quantity=10, levels=[1, 2])):
+            self.assertEqual((message.symbol, message.quantity), ('IBM', 10))
+            self.assertEqual(list(message.levels), [1, 2])
+
+    def testInvalidArguments(self):
+        ''' Test that unknown keywords and too many arguments raise '''
+        for handle in (MessageOrder, MessageSlots):
+            self.assertRaises(TypeError, handle, *range(5))
+            self.assertRaises(TypeError, handle, price=1.0)
+        try:
+            MessageOrder(symbol='IBM', zeta=1, alpha=2)
+            self.fail('expected a TypeError')
+        except TypeError, ex:
+            self.assertTrue("'alpha'" in str(ex) and 'MessageOrder' in str(ex))
+
+    def testSlots(self):
+        ''' Test that slotted messages have no instance dictionary '''
+        message = MessageSlots(symbol='IBM')
+        self.assertFalse(hasattr(message, '__dict__'))
+        self.assertRaises(AttributeError, setattr, message, 'price', 1.0)
+
+    def testCloneAndReplace(self):
+        ''' Test copying a message with and without changes '''
+        for handle in (MessageOrder, MessageSlots):
+            original = handle(symbol='IBM', quantity=10, levels=[1])
+            clone = original.clone()
+            self.assertEqual((clone.symbol, clone.quantity, list(clone.levels)),
+                ('IBM', 10, [1]))
+            clone.levels.append(2)
+            self.assertEqual(list(original.levels), [1])
+            changed = original.replace(quantity=20)
+            self.assertEqual((changed.symbol, changed.quantity, original.quantity),
+                ('IBM', 20, 10))
+            self.assertRaises(TypeError, original.replace, price=1.0)
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import struct
+import unittest
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.format.binary import BinarySerializer
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+class OptionalOrder(Message):
+    symbol   = StringField(size=8)
+    quantity = IntField(size=4)
+    comment  = StringField(size=16, optional=True)
+    price    = FloatField(size=8, optional=True)
+    levels   = IntField(size=4, repeated=True, count=2, optional=True)
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class OptionalFieldTest(unittest.TestCase):
+    '''
+    This is the unittest for the presence bitmap of the optional fields
+    '''
+
+    def setUp(self):
+        self.codec = OptionalOrder._meta.get_codec()
+
+    def testAbsentFields(self):
+        ''' Test that fields holding their default are left out '''
+        data = self.codec.pack(OptionalOrder(symbol='IBM', quantity=3))
+        self.assertEqual(len(data), self.codec.size)
+        result = self.codec.unpack_from(data)
+        self.assertEqual((result.symbol, result.quantity, result.comment, result.price),
+            ('IBM', 3, '', 0.0))
+        self.assertEqual(len(result.levels), 0)
+
+    def testPresentFields(self):
+        ''' Test that changed fields are sent after the bitmap '''
+        order = OptionalOrder(symbol='IBM', comment='rush', levels=[4, 5])
+        data = self.codec.pack(order)
+        self.assertEqual(len(data), self.codec.size + 16 + 8)
+        result, end = self.codec.unpack_next(data + 'tail')
+        self.assertEqual((result.comment, result.price, list(result.levels)),
+            ('rush', 0.0, [4, 5]))
+        self.assertEqual(end, len(data))
+
+    def testSeparateContainers(self):
+        ''' Test that absent repeated fields get containers of their own '''
+        data = self.codec.pack(OptionalOrder())
+        first, second = self.codec.unpack_from(data), self.codec.unpack_from(data)
+        first.levels.append(1)
+        self.assertEqual(len(second.levels), 0)
+
+    def testPackInto(self):
+        ''' Test packing into a supplied buffer '''
+        order = OptionalOrder(comment='rush')
+        size = len(self.codec.pack(order))
+        buffer = bytearray(3 + size)
+        self.assertEqual(self.codec.pack_into(buffer, 3, order), 3 + size)
+        self.assertEqual(self.codec.unpack_from(buffer, 3).comment, 'rush')
+
+    def testPackIntoSmallBuffer(self):
+        ''' Test that a short buffer raises instead of growing '''
+        order = OptionalOrder(comment='rush')
+        size = len(self.codec.pack(order))
+        for buffer, offset in ((bytearray(size - 1), 0), (bytearray(size), 1)):
+            self.assertRaises(struct.error, self.codec.pack_into, buffer, offset, order)
+            self.assertEqual(len(buffer), size - 1 + offset)
+
+    def testBinaryFormat(self):
+        ''' Test the optional fields through the binary format '''
+        data = BinarySerializer.serialize(OptionalOrder(price=2.5))
+        self.assertEqual(BinarySerializer.deserialize(data, OptionalOrder).price, 2.5)
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
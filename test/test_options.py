@@ -0,0 +1,83 @@
+import unittest
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.core.exceptions import FieldDoesNotExist
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+class OptionsOrder(Message):
+    symbol   = StringField(size=8, encoded_name='Sym')
+    quantity = IntField(size=4)
+    price    = FloatField(size=8)
+
+    class Meta:
+        encoded_name = 'OptOrder'
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class OptionsTest(unittest.TestCase):
+    '''
+    This is the unittest for the message options and layout descriptor
+    '''
+
+    def setUp(self):
+        self.layout = OptionsOrder._meta.get_layout()
+
+    def testFieldLookup(self):
+        ''' Test the field lookups of the layout '''
+        meta = OptionsOrder._meta
+        self.assertEqual(self.layout.field_names, ('symbol', 'quantity', 'price'))
+        self.assertEqual(meta.get_all_field_names(), ['price', 'quantity', 'symbol'])
+        self.assertTrue(meta.get_field('price') is self.layout.fields[2])
+        self.assertTrue(meta.get_field_by_encoded_name('Sym') is self.layout.fields[0])
+        self.assertEqual(self.layout.index['quantity'], 1)
+        self.assertRaises(FieldDoesNotExist, meta.get_field, 'missing')
+        self.assertRaises(FieldDoesNotExist, meta.get_field_by_encoded_name, 'symbol')
+
+    def testOffsets(self):
+        ''' Test the record offsets and size '''
+        self.assertEqual(dict(self.layout.offsets),
+            { 'symbol':0, 'quantity':8, 'price':12 })
+        self.assertEqual(self.layout.size, 20)
+        self.assertEqual(OptionsOrder()._message_size(), 20)
+
+    def testInformation(self):
+        ''' Test the information record supplied to the formats '''
+        info = OptionsOrder._meta.info
+        self.assertEqual(info, { 'size':20, 'name':'OptOrder', 'field_count':3 })
+        self.assertRaises(AttributeError, info.__setitem__, 'name', 'Other')
+        self.assertRaises(AttributeError, info.update, { 'size':0 })
+        self.assertEqual(OptionsOrder._meta.info['name'], 'OptOrder')
+
+    def testFrozenLayout(self):
+        ''' Test that the shared layout cannot be changed '''
+        layout = self.layout
+        self.assertRaises(AttributeError, setattr, layout, 'size', 0)
+        for mapping in (layout.by_name, layout.by_encoded_name, layout.index,
+            layout.offsets, layout.defaults):
+            self.assertRaises(AttributeError, mapping.__setitem__, 'other', None)
+            self.assertRaises(AttributeError, mapping.__delitem__, 'symbol')
+            self.assertRaises(AttributeError, mapping.pop, 'symbol')
+            self.assertRaises(AttributeError, mapping.clear)
+        copy = dict(layout.offsets)
+        copy['other'] = 1
+        self.assertTrue('other' not in layout.offsets)
+
+    def testCacheInvalidation(self):
+        ''' Test that adding a field rebuilds the layout '''
+        class OptionsGrowing(Message):
+            first = IntField(size=4)
+        before = OptionsGrowing._meta.get_layout()
+        OptionsGrowing.add_to_class('second', IntField(size=2))
+        after = OptionsGrowing._meta.get_layout()
+        self.assertFalse(before is after)
+        self.assertEqual(after.size, 6)
+        self.assertEqual(OptionsGrowing(second=3).second, 3)
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+try: # the messages raise the errors of the faster pickle
+    import cPickle as pickle
+except ImportError:
+    import pickle
+from rosetta.core.fields import *
+from rosetta.core.message import Message, _restore_message
+from rosetta.core.dispatch import registry
+from rosetta.format.pickle import PickleSerializer
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+class PickleOrder(Message):
+    symbol   = StringField(size=8)
+    quantity = IntField(size=4)
+    levels   = FloatField(size=8, repeated=True, count=4)
+
+    class Meta:
+        type_id = 41
+
+class PickleTick(Message):
+    sequence = IntField(size=4)
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class PickleTest(unittest.TestCase):
+    '''
+    This is the unittest for the compact message pickles
+    '''
+
+    def testRoundTrip(self):
+        ''' Test pickling by type id and by encoded name '''
+        order = PickleOrder(symbol='IBM', quantity=7, levels=[1.5])
+        result = PickleSerializer.deserialize(PickleSerializer.serialize(order))
+        self.assertTrue(isinstance(result, PickleOrder))
+        self.assertEqual((result.symbol, result.quantity, list(result.levels)),
+            ('IBM', 7, [1.5]))
+        result = pickle.loads(pickle.dumps(PickleTick(sequence=3), 2))
+        self.assertEqual(result.sequence, 3)
+
+    def testReduce(self):
+        ''' Test that the registered key is pickled rather than the type '''
+        self.assertEqual(PickleOrder(quantity=1).__reduce_ex__(2)[1][0], 41)
+        self.assertEqual(PickleTick().__reduce_ex__(2)[1][0], 'PickleTick')
+
+    def testUnregistered(self):
+        ''' Test that a type missing from the registry pickles itself '''
+        del registry.implicit['PickleTick']
+        try:
+            self.assertTrue(PickleTick().__reduce_ex__(2)[1][0] is PickleTick)
+            result = pickle.loads(pickle.dumps(PickleTick(sequence=9), 2))
+            self.assertEqual(result.sequence, 9)
+        finally:
+            registry.implicit['PickleTick'] = [PickleTick]
+
+    def testUnknownKey(self):
+        ''' Test that an unknown key raises a clear error '''
+        try:
+            _restore_message('PickleMissing', ())
+            self.fail('expected an UnpicklingError')
+        except pickle.UnpicklingError, ex:
+            self.assertTrue("'PickleMissing'" in str(ex))
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
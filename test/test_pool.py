@@ -0,0 +1,125 @@
+import unittest
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.core.exceptions import ConfigurationException
+from rosetta.core.pool import MessagePool, reset_message
+from rosetta.format.json import JsonSerializer
+from rosetta.format.xml import XmlSerializer
+from rosetta.format.yaml import YamlSerializer
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+class PoolTick(Message):
+    kind     = IntField(size=2, value=7)
+    symbol   = StringField(size=8)
+    sequence = IntField(size=4)
+    levels   = IntField(size=4, repeated=True, count=2)
+
+class PoolSparse(Message):
+    kind     = IntField(size=2, value=9, optional=True)
+    symbol   = StringField(size=8)
+    comment  = StringField(size=8, optional=True)
+    levels   = IntField(size=4, repeated=True, count=2, optional=True)
+
+class PoolSlots(Message):
+    symbol   = StringField(size=8)
+    comment  = StringField(size=8, optional=True)
+
+    class Meta:
+        use_slots = True
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class MessagePoolTest(unittest.TestCase):
+    '''
+    This is the unittest for the message pools and the shared defaults
+    '''
+
+    def _assertDefaults(self, message, **values):
+        expected = message.__class__()
+        for field in message._meta.fields:
+            value = values.get(field.name, getattr(expected, field.name))
+            self.assertEqual(getattr(message, field.name), value)
+
+    def testAcquireRelease(self):
+        ''' Test that released messages are reset and reused '''
+        pool = MessagePool(PoolTick, size=1, limit=2)
+        message = pool.acquire()
+        self.assertEqual(len(pool), 0)
+        message.sequence, message.kind = 5, 1
+        message.levels.append(3)
+        pool.release(message)
+        self.assertTrue(pool.acquire() is message)
+        self._assertDefaults(message)
+        pool.release_many([PoolTick(), PoolTick(), PoolTick()])
+        self.assertEqual(len(pool), 2)
+        pool.clear()
+        self.assertEqual(len(pool), 0)
+
+    def testReleaseTwice(self):
+        ''' Test that a message cannot be released twice '''
+        pool = MessagePool(PoolTick)
+        message = pool.acquire()
+        pool.release(message)
+        self.assertRaises(ConfigurationException, pool.release, message)
+        self.assertEqual(len(pool), 1)
+        first, second = pool.acquire(), pool.acquire()
+        self.assertTrue(first is message and second is not message)
+        pool.release(first)
+        pool.clear()
+        pool.release(first)
+        self.assertEqual(len(pool), 1)
+
+    def testReleaseOtherType(self):
+        ''' Test that a message of another type cannot be released '''
+        pool = MessagePool(PoolTick)
+        self.assertRaises(ConfigurationException, pool.release, PoolSlots())
+        self.assertEqual(len(pool), 0)
+        self.assertTrue(isinstance(pool.acquire(), PoolTick))
+
+    def testReleaseWithoutReset(self):
+        ''' Test skipping the reset of a released message '''
+        pool = PoolTick._meta.get_pool()
+        pool.clear()
+        message = PoolTick.acquire()
+        message.sequence = 4
+        pool.release(message, reset=False)
+        self.assertEqual(pool.acquire().sequence, 4)
+
+    def testReset(self):
+        ''' Test that a reset matches a new message '''
+        message = PoolSlots(symbol='IBM', comment='x')
+        self.assertTrue(reset_message(message) is message)
+        self._assertDefaults(message)
+        self._assertDefaults(PoolTick(symbol='IBM', levels=[1]).reset())
+
+    def testFormatDefaults(self):
+        ''' Test that every format decodes missing fields to the same defaults '''
+        for serializer in (JsonSerializer, XmlSerializer, YamlSerializer):
+            message = serializer.deserialize(serializer.serialize(PoolSparse()))
+            self._assertDefaults(message)
+            self.assertFalse(message.levels is PoolSparse().levels)
+        self._assertDefaults(JsonSerializer.deserialize('{"name":"PoolTick","data":{}}'))
+        self._assertDefaults(XmlSerializer.deserialize('<PoolTick/>'))
+        self._assertDefaults(YamlSerializer.deserialize('{name: PoolTick, data: {}}'))
+
+    def testCodecDefaults(self):
+        ''' Test that absent optional fields decode to the same defaults '''
+        codec = PoolSparse._meta.get_codec()
+        data = codec.pack(PoolSparse(symbol='IBM'))
+        self._assertDefaults(codec.unpack_from(data), symbol='IBM')
+        target = PoolSparse(kind=1, comment='old', levels=[1])
+        self.assertTrue(codec.unpack_from(data, 0, target) is target)
+        self._assertDefaults(target, symbol='IBM')
+        codec = PoolSlots._meta.get_codec()
+        target = PoolSlots(comment='old')
+        codec.unpack_from(codec.pack(PoolSlots(symbol='IBM')), 0, target)
+        self._assertDefaults(target, symbol='IBM')
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import array
+import unittest
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.core.exceptions import EncodeException
+from rosetta.format.json import JsonSerializer
+from rosetta.format.yaml import YamlSerializer
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+class RepeatedLadder(Message):
+    prices   = FloatField(size=8, repeated=True, count=4)
+    sizes    = IntField(size=4, repeated=True, count=4)
+    names    = StringField(size=8, repeated=True, count=2)
+
+class RepeatedSlots(Message):
+    sizes    = IntField(size=4, repeated=True, count=4)
+
+    class Meta:
+        use_slots = True
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class RepeatedFieldTest(unittest.TestCase):
+    '''
+    This is the unittest for the array backed repeated fields
+    '''
+
+    def testKeywords(self):
+        ''' Test that keyword lists are stored in their container '''
+        ladder = RepeatedLadder(prices=[1.5, 2.5], sizes=(1, 2), names=('a',))
+        self.assertEqual((ladder.prices.typecode, ladder.prices.tolist()), ('d', [1.5, 2.5]))
+        self.assertTrue(isinstance(ladder.sizes, array.array))
+        self.assertEqual(ladder.names, ['a'])
+        self.assertTrue(isinstance(RepeatedSlots(sizes=[3]).sizes, array.array))
+
+    def testPositional(self):
+        ''' Test that positional lists are stored in their container '''
+        ladder = RepeatedLadder([1.0], [2])
+        self.assertTrue(isinstance(ladder.prices, array.array))
+        self.assertTrue(isinstance(ladder.sizes, array.array))
+        self.assertTrue(isinstance(RepeatedSlots([3]).sizes, array.array))
+
+    def testBaseInitializer(self):
+        ''' Test the conversion of the (not generated) base initializer '''
+        ladder = object.__new__(RepeatedLadder)
+        Message.__init__(ladder, sizes=[1, 2])
+        self.assertTrue(isinstance(ladder.sizes, array.array))
+
+    def testKeepsContainer(self):
+        ''' Test that the right container is stored as it is '''
+        prices, names = array.array('d', [1.0]), ['a']
+        ladder = RepeatedLadder(prices=prices, names=names)
+        self.assertTrue(ladder.prices is prices and ladder.names is names)
+
+    def testReplace(self):
+        ''' Test that replaced lists are stored in their container '''
+        ladder = RepeatedLadder(sizes=[1]).replace(sizes=[4, 5])
+        self.assertEqual((ladder.sizes.typecode, ladder.sizes.tolist()),
+            (array.array('i').typecode, [4, 5]))
+
+    def testPack(self):
+        ''' Test that short ladders are padded and long ladders raise '''
+        codec = RepeatedSlots._meta.get_codec()
+        result = codec.unpack_from(codec.pack(RepeatedSlots(sizes=[1, 2])))
+        self.assertEqual(result.sizes.tolist(), [1, 2, 0, 0])
+        result = codec.unpack_from(codec.pack(RepeatedSlots(sizes=[1, 2, 3, 4])))
+        self.assertEqual(result.sizes.tolist(), [1, 2, 3, 4])
+        ladder = RepeatedSlots(sizes=[1, 2, 3, 4, 5])
+        self.assertRaises(EncodeException, codec.pack, ladder)
+
+    def testDecodedContainers(self):
+        ''' Test that every decoded message gets containers of its own '''
+        for serializer in (JsonSerializer, YamlSerializer):
+            text = serializer.serialize(RepeatedLadder())
+            first, second = serializer.deserialize(text), serializer.deserialize(text)
+            first.sizes.append(1)
+            first.names.append('a')
+            self.assertEqual((len(second.sizes), len(second.names)), (0, 0))
+            self.assertEqual(len(RepeatedLadder().sizes), 0)
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.core.exceptions import ConfigurationException
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+class ViewQuote(Message):
+    symbol  = StringField(size=8)
+    filler  = PaddingField(size=3)
+    account = IntField(size=6)
+    price   = FloatField(size=8)
+    levels  = IntField(size=4, repeated=True, count=3)
+    active  = BoolField(bits=1)
+    flags   = IntField(bits=3)
+
+class ViewSparse(Message):
+    symbol  = StringField(size=8)
+    comment = StringField(size=8, optional=True)
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class ViewTest(unittest.TestCase):
+    '''
+    This is the unittest for the lazy message views
+    '''
+
+    def setUp(self):
+        self.quote = ViewQuote(symbol='IBM', account=42, price=99.5,
+            levels=[1, 2, 3], active=True, flags=5)
+        self.codec = ViewQuote._meta.get_codec()
+        self.data = bytearray(2) + bytearray(self.codec.pack(self.quote))
+        self.view = ViewQuote._meta.get_view_class()(self.data, 2)
+
+    def testFields(self):
+        ''' Test reading the fields straight from the buffer '''
+        view = self.view
+        self.assertEqual(view.symbol, 'IBM')
+        self.assertEqual(view.account, 42)
+        self.assertEqual(view.price, 99.5)
+        self.assertEqual(list(view.levels), [1, 2, 3])
+        self.assertEqual((view.active, view.flags), (True, 5))
+
+    def testReadOnly(self):
+        ''' Test that the view fields cannot be assigned '''
+        self.assertRaises(AttributeError, setattr, self.view, 'symbol', 'MSFT')
+
+    def testRaw(self):
+        ''' Test that the raw record is not copied '''
+        raw = self.view.raw()
+        self.assertTrue(isinstance(raw, memoryview))
+        self.assertEqual(raw.tobytes(), self.codec.pack(self.quote))
+        self.data[2] = ord('X')
+        self.assertEqual(self.view.symbol, 'XBM')
+
+    def testToMessage(self):
+        ''' Test materializing the full message '''
+        message = self.view.to_message()
+        self.assertTrue(isinstance(message, ViewQuote))
+        self.assertEqual(message.account, 42)
+        self.assertEqual(list(message.levels), [1, 2, 3])
+
+    def testRebind(self):
+        ''' Test pointing a view at another record '''
+        other = self.codec.pack(ViewQuote(symbol='MSFT', account=7))
+        self.assertTrue(self.view.rebind(other) is self.view)
+        self.assertEqual((self.view.symbol, self.view.account), ('MSFT', 7))
+
+    def testSparseMessage(self):
+        ''' Test that records without fixed offsets have no view '''
+        self.assertRaises(ConfigurationException, ViewSparse._meta.get_view_class)
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+from StringIO import StringIO
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.core.exceptions import ConfigurationException
+from rosetta.format.xml import XmlSerializer, XmlWriter
+from rosetta.utils.enum import Enum
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+XmlSide = Enum('Buy', 'Sell')
+
+class XmlOrder(Message):
+    symbol   = StringField(size=8)
+    quantity = IntField(size=4)
+    price    = FloatField(size=8)
+    active   = BoolField()
+    side     = EnumField(enum=XmlSide)
+    levels   = FloatField(size=8, repeated=True, count=4)
+    comment  = StringField(size=16, optional=True)
+
+class XmlTick(Message):
+    sequence = IntField(size=4, encoded_name='seq')
+
+    class Meta:
+        encoded_name = 'Tick'
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class XmlSerializerTest(unittest.TestCase):
+    '''
+    This is the unittest for the converter table driven xml format
+    '''
+
+    def setUp(self):
+        self.order = XmlOrder(symbol='IBM', quantity=10, price=99.5, active=True,
+            side=XmlSide.Sell, levels=[1.5, 2.5])
+
+    def testRoundTrip(self):
+        ''' Test that every field type survives a round trip '''
+        result = XmlSerializer.deserialize(XmlSerializer.serialize(self.order))
+        self.assertTrue(isinstance(result, XmlOrder))
+        for name in ('symbol', 'quantity', 'price', 'active', 'side', 'comment'):
+            self.assertEqual(getattr(result, name), getattr(self.order, name))
+        self.assertEqual(list(result.levels), [1.5, 2.5])
+
+    def testDocument(self):
+        ''' Test the layout of the xml document '''
+        text = XmlSerializer.serialize(self.order)
+        self.assertTrue(text.startswith('<XmlOrder><symbol>IBM</symbol>'))
+        self.assertTrue('<side>Sell</side>' in text)
+        self.assertFalse('<comment>' in text)
+        self.assertEqual(XmlSerializer.serialize(XmlTick(sequence=4)),
+            '<Tick><seq>4</seq></Tick>')
+
+    def testMissingFields(self):
+        ''' Test that missing fields decode to their defaults '''
+        first = XmlSerializer.deserialize('<XmlOrder><quantity>3</quantity></XmlOrder>')
+        second = XmlSerializer.deserialize('<XmlOrder/>')
+        self.assertEqual((first.quantity, first.symbol, first.side), (3, '', XmlSide.Buy))
+        self.assertEqual(len(first.levels), 0)
+        first.levels.append(1.0)
+        self.assertEqual(len(second.levels), 0)
+
+    def testUnknownMessage(self):
+        ''' Test that an unknown message name raises '''
+        self.assertRaises(ConfigurationException, XmlSerializer.deserialize,
+            '<XmlMissing/>')
+
+    def testStream(self):
+        ''' Test writing and streaming back many messages '''
+        stream = StringIO()
+        XmlSerializer.serialize_many([XmlTick(sequence=i) for i in range(3)] + [self.order], stream)
+        result = list(XmlSerializer.iterparse(StringIO(stream.getvalue())))
+        self.assertEqual([m.sequence for m in result[:3]], [0, 1, 2])
+        self.assertEqual(result[3].symbol, 'IBM')
+
+    def testWriterFlush(self):
+        ''' Test that the writer buffers until flushed '''
+        stream = StringIO()
+        writer = XmlWriter(stream, root='ticks')
+        writer.write(XmlTick(sequence=1))
+        self.assertFalse('<Tick>' in stream.getvalue())
+        writer.close()
+        self.assertTrue(stream.getvalue().endswith('<Tick><seq>1</seq></Tick></ticks>\n'))
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import yaml
+import unittest
+from StringIO import StringIO
+from rosetta.core.fields import *
+from rosetta.core.message import Message
+from rosetta.core.exceptions import ConfigurationException
+from rosetta.format.yaml import YamlSerializer
+from rosetta.utils.enum import Enum
+
+#---------------------------------------------------------------------------#
+# Fixtures
+#---------------------------------------------------------------------------#
+YamlSide = Enum('Buy', 'Sell')
+
+class YamlOrder(Message):
+    symbol   = StringField(size=8)
+    quantity = IntField(size=4)
+    price    = FloatField(size=8)
+    active   = BoolField()
+    side     = EnumField(enum=YamlSide)
+    levels   = FloatField(size=8, repeated=True, count=4)
+    comment  = StringField(size=16, optional=True)
+
+class YamlTick(Message):
+    sequence = IntField(size=4, encoded_name='seq')
+
+#---------------------------------------------------------------------------#
+# Tests
+#---------------------------------------------------------------------------#
+class YamlSerializerTest(unittest.TestCase):
+    '''
+    This is the unittest for the converter table driven yaml format
+    '''
+
+    def setUp(self):
+        self.order = YamlOrder(symbol='IBM', quantity=10, price=99.5, active=True,
+            side=YamlSide.Sell, levels=[1.5, 2.5])
+
+    def testRoundTrip(self):
+        ''' Test that every field type survives a round trip '''
+        result = YamlSerializer.deserialize(YamlSerializer.serialize(self.order))
+        self.assertTrue(isinstance(result, YamlOrder))
+        for name in ('symbol', 'quantity', 'price', 'active', 'side', 'comment'):
+            self.assertEqual(getattr(result, name), getattr(self.order, name))
+        self.assertEqual(list(result.levels), [1.5, 2.5])
+
+    def testDocument(self):
+        ''' Test the layout of the yaml document '''
+        document = yaml.safe_load(YamlSerializer.serialize(self.order))
+        self.assertEqual(document['name'], 'YamlOrder')
+        self.assertEqual(document['data']['side'], 'Sell')
+        self.assertFalse('comment' in document['data'])
+        document = yaml.safe_load(YamlSerializer.serialize(YamlTick(sequence=4)))
+        self.assertEqual(document['data'], { 'seq':4 })
+
+    def testMissingFields(self):
+        ''' Test that missing fields decode to their defaults '''
+        first = YamlSerializer.deserialize('{name: YamlOrder, data: {quantity: 3}}')
+        second = YamlSerializer.deserialize('{name: YamlOrder, data: }')
+        self.assertEqual((first.quantity, first.symbol, first.side), (3, '', YamlSide.Buy))
+        self.assertEqual(len(first.levels), 0)
+        first.levels.append(1.0)
+        self.assertEqual(len(second.levels), 0)
+
+    def testUnknownMessage(self):
+        ''' Test that an unknown message name raises '''
+        self.assertRaises(ConfigurationException, YamlSerializer.deserialize,
+            '{name: YamlMissing, data: {}}')
+
+    def testStream(self):
+        ''' Test writing and streaming back many messages '''
+        stream = StringIO()
+        YamlSerializer.serialize_many([YamlTick(sequence=i) for i in range(3)], stream)
+        result = list(YamlSerializer.deserialize_many(stream.getvalue()))
+        self.assertEqual([m.sequence for m in result], [0, 1, 2])
+
+#---------------------------------------------------------------------------#
+# Main
+#---------------------------------------------------------------------------#
+if __name__ == "__main__":
+    unittest.main()